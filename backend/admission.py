@@ -0,0 +1,123 @@
+import asyncio
+import time
+from collections import deque
+
+
+class AdmissionController:
+    """Load-aware admission for join_game and the saturation report behind /health.
+
+    Saturation is the worst of three ratios: smoothed tick time against the
+    tick budget, player count against ``max_players``, and outbound bytes per
+    second against ``max_bytes_per_second``. Below ``busy_threshold`` players
+    are admitted straight away; above it new players join a FIFO queue and
+    are let in from its head, one at a time, for as long as there is room
+    (fewer than ``max_players`` and saturation still under 1.0); at 1.0 (or
+    with a full queue) they are turned away with a retry hint.
+    """
+
+    def __init__(self, governor, outbound, max_players: int = 50,
+                 max_bytes_per_second: float = 5_000_000, busy_threshold: float = 0.85,
+                 queue_timeout: float = 15.0, max_queue: int = 20, retry_after: int = 10):
+        self.governor = governor
+        self.outbound = outbound
+        self.max_players = max_players
+        self.max_bytes_per_second = max_bytes_per_second
+        self.busy_threshold = busy_threshold
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.waiting = deque()  # sids queued for admission, oldest first
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self._bandwidth = 0.0
+        self._bandwidth_sample = (time.monotonic(), 0)
+
+    def bandwidth(self) -> float:
+        """Outbound bytes per second, resampled at most once a second."""
+        now = time.monotonic()
+        sampled_at, sampled_bytes = self._bandwidth_sample
+        if now - sampled_at >= 1.0:
+            self._bandwidth = (self.outbound.bytes_sent - sampled_bytes) / (now - sampled_at)
+            self._bandwidth_sample = (now, self.outbound.bytes_sent)
+        return self._bandwidth
+
+    def saturation(self, player_count: int) -> dict:
+        """Machine-readable load report: a 0..1+ score and an ok/busy/full state."""
+        tick_load = (self.governor.tick_time_avg or 0.0) / self.governor.tick_budget
+        population = player_count / self.max_players
+        bandwidth = self.bandwidth() / self.max_bytes_per_second
+        score = max(tick_load, population, bandwidth)
+        if score >= 1.0:
+            state = 'full'
+        elif score >= self.busy_threshold:
+            state = 'busy'
+        else:
+            state = 'ok'
+        return {
+            'state': state,
+            'saturation': round(score, 3),
+            'tick_load': round(tick_load, 3),
+            'population': player_count,
+            'max_players': self.max_players,
+            'bandwidth_bytes_per_second': round(self.bandwidth()),
+            'degradation_level': self.governor.level,
+            'queued': len(self.waiting),
+            'retry_after': self.retry_after if state != 'ok' else 0,
+        }
+
+    def has_room(self, player_count: int) -> bool:
+        """Whether one more player fits without going over capacity."""
+        return player_count < self.max_players and self.saturation(player_count)['state'] != 'full'
+
+    async def admit(self, sid: str, player_count, notify_queued):
+        """Wait for room to admit ``sid``. Returns ``(admitted, retry_after)``.
+
+        ``player_count`` is a callable returning the current population and
+        ``notify_queued(position)`` is awaited whenever the queue position
+        changes so the client can show it.
+        """
+        report = self.saturation(player_count())
+        if report['state'] == 'ok' and not self.waiting:
+            self.admitted += 1
+            return True, 0
+        if report['state'] == 'full' or len(self.waiting) >= self.max_queue:
+            self.rejected += 1
+            return False, self.retry_after
+
+        self.queued += 1
+        self.waiting.append(sid)
+        deadline = time.monotonic() + self.queue_timeout
+        last_position = None
+        try:
+            while True:
+                if sid not in self.waiting:
+                    return False, 0  # Client disconnected while waiting
+                position = self.waiting.index(sid) + 1
+                if position == 1 and self.has_room(player_count()):
+                    self.admitted += 1
+                    return True, 0
+                if time.monotonic() >= deadline:
+                    self.rejected += 1
+                    return False, self.retry_after
+                if position != last_position:
+                    last_position = position
+                    await notify_queued(position)
+                await asyncio.sleep(0.5)
+        finally:
+            if sid in self.waiting:
+                self.waiting.remove(sid)
+
+    def cancel(self, sid: str):
+        """Drop a queued client (e.g. on disconnect)."""
+        if sid in self.waiting:
+            self.waiting.remove(sid)
+
+    def stats(self) -> dict:
+        """Counters for the /test status endpoint."""
+        return {
+            'admitted': self.admitted,
+            'queued': self.queued,
+            'rejected': self.rejected,
+            'waiting': len(self.waiting),
+        }
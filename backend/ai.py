@@ -1,3 +1,9 @@
+import time
+
+# How long each part of loading this module took (seconds), for the startup report
+INIT_TIMINGS = {}
+_stage_started = time.perf_counter()
+
 try:
     import google.generativeai as genai  # type: ignore
     GENAI_AVAILABLE = True
@@ -6,34 +12,59 @@ except ImportError:
     GENAI_AVAILABLE = False
     genai = None  # type: ignore
 
+INIT_TIMINGS['genai_import'] = time.perf_counter() - _stage_started
+_stage_started = time.perf_counter()
+
 import asyncio
 import os
 import json
 from typing import Tuple, Optional
 from dotenv import load_dotenv
 
+from model_backends import FakeBackend, ModelBackend
+
 load_dotenv()
 
+INIT_TIMINGS['dotenv'] = time.perf_counter() - _stage_started
+
+class GeminiBackend(ModelBackend):
+    """The real thing: Gemini through google-generativeai"""
+
+    name = 'gemini'
+
+    def __init__(self, api_key: str, model_name: str = 'gemini-1.5-flash'):
+        genai.configure(api_key=api_key)  # type: ignore
+        self.model = genai.GenerativeModel(model_name)  # type: ignore
+
+    def generate(self, prompt: str) -> str:
+        response = self.model.generate_content(prompt)
+        return response.text
+
 class AICollisionResolver:
-    def __init__(self, api_key: Optional[str] = None):
-        """Initialize the AI collision resolver with Gemini API"""
+    def __init__(self, api_key: Optional[str] = None, backend: Optional[ModelBackend] = None):
+        """Initialize the AI collision resolver with a model backend (Gemini unless AI_BACKEND=fake)"""
         self.api_key = api_key or os.getenv('GEMINI_API_KEY')
+        self.backend = backend or self._default_backend()
+    
+    def _default_backend(self) -> Optional[ModelBackend]:
+        if os.getenv('AI_BACKEND') == 'fake':
+            # Local stand-in with injected latency and failures (see model_backends.FakeBackend)
+            print("Using the fake AI backend (AI_BACKEND=fake)")
+            return FakeBackend.from_env()
         if not GENAI_AVAILABLE:
             print("Warning: google-generativeai not available. Using random fallback.")
-            self.model = None
-        elif not self.api_key:
+            return None
+        if not self.api_key:
             print("Warning: No Gemini API key found. Set GEMINI_API_KEY environment variable or pass api_key parameter.")
-            self.model = None
-        else:
-            genai.configure(api_key=self.api_key)  # type: ignore
-            self.model = genai.GenerativeModel('gemini-1.5-flash')  # type: ignore
+            return None
+        return GeminiBackend(self.api_key)
     
     async def determine_winner(self, player1_name: str, player2_name: str) -> Tuple[str, str]:
         """
         Use AI to determine which player's name is more powerful and wins the collision.
         Returns (winner_name, loser_name)
         """
-        if not self.model:
+        if self.backend is None:
             # Fallback to random if no API key
             import random
             winner_name = random.choice([player1_name, player2_name])
@@ -52,7 +83,7 @@ class AICollisionResolver:
         try:
             # Run the AI call in a thread to avoid blocking
             loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(None, self._call_gemini, prompt)
+            response = await loop.run_in_executor(None, self._call_model, prompt)
             
             # Clean up the response
             winner_name = response.strip().strip('"').strip("'")
@@ -77,13 +108,14 @@ class AICollisionResolver:
             loser_name = player2_name if winner_name == player1_name else player1_name
             return winner_name, loser_name
     
-    def _call_gemini(self, prompt: str) -> str:
-        """Synchronous wrapper for Gemini API call"""
-        response = self.model.generate_content(prompt)  # type: ignore
-        return response.text
+    def _call_model(self, prompt: str) -> str:
+        """Synchronous model call, run in an executor thread"""
+        return self.backend.generate(prompt)  # type: ignore
 
 # Global AI resolver instance
+_stage_started = time.perf_counter()
 ai_resolver = AICollisionResolver()
+INIT_TIMINGS['resolver'] = time.perf_counter() - _stage_started
 
 
 # --- Persistent Caching Logic ---
@@ -113,7 +145,9 @@ def _save_cache(cache: dict):
         json.dump({k: list(v) for k, v in cache.items()}, f, indent=4)
 
 # Global cache, loaded on startup
+_stage_started = time.perf_counter()
 _cache = _load_cache()
+INIT_TIMINGS['cache_load'] = time.perf_counter() - _stage_started
 
 async def determine_winner_with_cache(player1_name: str, player2_name: str) -> Tuple[str, str]:
     """
@@ -135,12 +169,14 @@ async def determine_winner_with_cache(player1_name: str, player2_name: str) -> T
     
     return winner, loser
 
-async def check_name_appropriateness(player_name: str) -> bool:
+async def check_name_appropriateness(player_name: str) -> Optional[bool]:
     """
     Use AI to determine if a player name is appropriate for the game.
-    Returns True if appropriate, False if inappropriate.
+    Returns True if appropriate, False if inappropriate, None if the AI
+    couldn't be reached or gave no usable answer (the caller decides
+    whether to fail open).
     """
-    if not ai_resolver.model:
+    if ai_resolver.backend is None:
         # Fallback: assume appropriate if no AI available
         print(f"Warning: No AI available for name check, allowing '{player_name}'")
         return True
@@ -164,7 +200,7 @@ async def check_name_appropriateness(player_name: str) -> bool:
     try:
         # Run the AI call in a thread to avoid blocking
         loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(None, ai_resolver._call_gemini, prompt)
+        response = await loop.run_in_executor(None, ai_resolver._call_model, prompt)
         
         # Clean up the response
         result = response.strip().upper()
@@ -175,11 +211,10 @@ async def check_name_appropriateness(player_name: str) -> bool:
         elif result == "INAPPROPRIATE":
             return False
         else:
-            # If AI response doesn't match expected format, be conservative
+            # No verdict: treat it like an unreachable AI
             print(f"Unexpected AI response for name '{player_name}': {result}")
-            return False
+            return None
             
     except Exception as e:
         print(f"AI name check failed for '{player_name}': {e}")
-        # Fallback: be conservative on AI failure
-        return False
+        return None
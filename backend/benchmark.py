@@ -0,0 +1,305 @@
+"""Offline performance benchmarks for the game server.
+
+Builds synthetic worlds directly on top of the server's game state (no sockets
+are opened) and reports CPU time per tick for each benchmark. The ``ai``
+benchmark instead drives the AI module against an in-process fake model and
+reports throughput, latency tails and how long the event loop stalled.
+
+    python benchmark.py                # run everything
+    python benchmark.py snapshot       # run a single benchmark
+"""
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import zlib
+
+import server
+from server import Player, players, minions
+
+
+def build_world(num_players: int, fleet_size: int, seed: int = 1234):
+    """Populate the server's players/minions with a synthetic world."""
+    random.seed(seed)
+    server.rng.seed(seed)
+    players.clear()
+    minions.clear()
+    for i in range(num_players):
+        player = Player(f'bench_{i}', f'Bench Player {i}')
+        players[player.id] = player
+        # Grow the fleet beyond the spawn size without going through collisions
+        for j in range(fleet_size - server.FLEET_SIZE):
+            template = player.get_owned_minions()[0]
+            minion = server.Minion(
+                minion_id=f'{player.id}_extra_{j}',
+                original_name=player.name,
+                owner_id=player.id,
+                x=template.x + random.uniform(-150, 150),
+                y=template.y + random.uniform(-150, 150),
+                color=player.color,
+            )
+            minions[minion.id] = minion
+
+
+def nudge_world(moving_fraction: float):
+    """Move a fraction of the fleets so every tick has some changed entities."""
+    moving = list(players.values())[:int(len(players) * moving_fraction)]
+    moving_ids = {p.id for p in moving}
+    for minion in minions.values():
+        if minion.owner_id in moving_ids:
+            minion.x += random.uniform(-5, 5)
+            minion.y += random.uniform(-5, 5)
+
+
+def cpu_time_per_tick(fn, ticks: int, before_tick=None) -> float:
+    """Average CPU milliseconds spent in ``fn`` per tick."""
+    total = 0.0
+    for _ in range(ticks):
+        if before_tick:
+            before_tick()
+        start = time.process_time()
+        fn()
+        total += time.process_time() - start
+    return total / ticks * 1000
+
+
+def bench_snapshot(ticks: int = 200):
+    """Snapshot build + JSON encode: per-entity to_dict() vs SnapshotBuilder."""
+    print('--- snapshot build (CPU ms per tick) ---')
+    for num_players, fleet_size in [(10, 5), (50, 10), (50, 50)]:
+        build_world(num_players, fleet_size)
+
+        def legacy():
+            json.dumps({
+                'players': [p.to_dict() for p in players.values()],
+                'all_minions': [m.to_dict() for m in minions.values()],
+            }, separators=(',', ':'))
+
+        builder = server.SnapshotBuilder()
+
+        def cached():
+            builder.build(players, minions)
+
+        for moving_fraction in (1.0, 0.25):
+            legacy_ms = cpu_time_per_tick(legacy, ticks, lambda: nudge_world(moving_fraction))
+            cached_ms = cpu_time_per_tick(cached, ticks, lambda: nudge_world(moving_fraction))
+            print(f'{num_players:>3} players x {fleet_size:>2} minions, '
+                  f'{int(moving_fraction * 100):>3}% moving: '
+                  f'legacy {legacy_ms:7.3f} ms  builder {cached_ms:7.3f} ms  '
+                  f'({legacy_ms / max(cached_ms, 1e-9):.1f}x)')
+
+
+def bench_collision(ticks: int = 50):
+    """Collision detection: all-pairs discrete test vs grid broad phase (discrete and swept)."""
+    from collision import candidate_pairs, circles_overlap, swept_circles_collide
+
+    print('--- collision detection (CPU ms per tick) ---')
+    for num_players, fleet_size in [(10, 5), (50, 10), (50, 50)]:
+        build_world(num_players, fleet_size)
+        minion_list = list(minions.values())
+
+        def move():
+            for minion in minion_list:
+                minion.prev_x, minion.prev_y = minion.x, minion.y
+                minion.x += random.uniform(-20, 20)
+                minion.y += random.uniform(-20, 20)
+
+        def all_pairs():
+            hits = 0
+            for i in range(len(minion_list)):
+                for j in range(i + 1, len(minion_list)):
+                    m1, m2 = minion_list[i], minion_list[j]
+                    if m1.owner_id != m2.owner_id and circles_overlap(m1, m2):
+                        hits += 1
+            return hits
+
+        def grid(swept):
+            test = swept_circles_collide if swept else circles_overlap
+            return sum(1 for i, j in candidate_pairs(minion_list, server.COLLISION_CELL_SIZE, swept)
+                       if test(minion_list[i], minion_list[j]))
+
+        move()
+        assert all_pairs() == grid(False), 'grid broad phase disagrees with all-pairs'
+        naive_ms = cpu_time_per_tick(all_pairs, ticks, move)
+        grid_ms = cpu_time_per_tick(lambda: grid(False), ticks, move)
+        swept_ms = cpu_time_per_tick(lambda: grid(True), ticks, move)
+        print(f'{num_players:>3} players x {fleet_size:>2} minions: all-pairs {naive_ms:8.3f} ms  '
+              f'grid {grid_ms:7.3f} ms  grid+swept {swept_ms:7.3f} ms')
+
+    # Two minions crossing head-on at the 0.1 s delta_time clamp (120 px per step each)
+    a = server.Minion('a', 'A', 'pa', 0.0, 0.0, '#fff')
+    b = server.Minion('b', 'B', 'pb', 100.0, 0.0, '#fff')
+    a.x, b.x = 120.0, -20.0
+    print(f'tunnelling at 120 px/step: discrete hit={circles_overlap(a, b)}  '
+          f'swept hit={swept_circles_collide(a, b)}')
+    check_tick_rate_outcomes()
+
+
+async def _fixed_verdict(player1_name, player2_name):
+    """Collision verdicts that depend only on the two names, so runs are comparable."""
+    if zlib.crc32(player1_name.encode()) <= zlib.crc32(player2_name.encode()):
+        return player1_name, player2_name
+    return player2_name, player1_name
+
+
+def scripted_battle(tick_rate: float, collision_mode: str, fleet_size: int = 3, lanes: int = 8,
+                    seconds: float = 4.0) -> dict:
+    """Fleets charging at each other in lanes, from dead-on to glancing; returns who owns each minion afterwards.
+
+    Each lane holds two fleets heading in opposite directions, offset
+    vertically by a little more every lane. Minions that were killed are
+    missing from the result.
+    """
+    saved = server.clock, server.COLLISION_MODE, server.determine_winner_with_cache
+    players.clear()
+    minions.clear()
+    server.collision_cooldowns.clear()
+    now = 1000.0
+    server.clock = lambda: now
+    server.COLLISION_MODE = collision_mode
+    server.determine_winner_with_cache = _fixed_verdict
+    try:
+        for lane in range(lanes):
+            y = 200 + lane * (server.WORLD_HEIGHT - 400) / max(lanes - 1, 1)
+            for side, (x, heading) in enumerate(((800, 1), (server.WORLD_WIDTH - 800, -1))):
+                player = Player(f'lane{lane}_{side}', f'Battle {lane * 2 + side}', spawn_fleet=False)
+                player.direction_dx = heading * 1000
+                players[player.id] = player
+                for k in range(fleet_size):
+                    minion = server.Minion(f'{player.id}_{k}', player.name, player.id,
+                                           x - heading * (60 * k + 17 * lane),
+                                           y + (k - fleet_size // 2) * 40 + side * 6 * lane, player.color)
+                    minion.can_infect_after = 0
+                    minions[minion.id] = minion
+
+        async def play():
+            nonlocal now
+            for _ in range(int(seconds * tick_rate)):
+                now += 1 / tick_rate
+                await server.simulate_tick(now, 1 / tick_rate, 1)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            asyncio.run(play())
+        return {minion_id: minion.owner_id for minion_id, minion in minions.items()}
+    finally:
+        server.clock, server.COLLISION_MODE, server.determine_winner_with_cache = saved
+
+
+def check_tick_rate_outcomes():
+    """Swept collisions at 20 Hz must settle every battle the way discrete 60 Hz does."""
+    print('--- battle outcomes vs discrete 60 Hz ---')
+    for fleet_size in (1, 3, 5):
+        baseline = scripted_battle(60, 'discrete', fleet_size)
+        swept = scripted_battle(20, 'swept', fleet_size)
+        discrete = scripted_battle(20, 'discrete', fleet_size)
+        print(f'fleets of {fleet_size}: swept 20 Hz {"same" if swept == baseline else "DIFFERENT"}  '
+              f'discrete 20 Hz {"same" if discrete == baseline else "different"}')
+        assert swept == baseline, f'swept 20 Hz changes battle outcomes (fleets of {fleet_size})'
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+async def drive_ai(ai, requests: int, concurrency: int, name_check_share: float = 0.2):
+    """Fire ``requests`` AI calls from ``concurrency`` concurrent callers while a probe ticks at TICK_RATE.
+
+    Returns (elapsed seconds, per-call latencies, tick lateness samples).
+    """
+    rng = random.Random(1234)
+    names = [f'Bench Name {i}' for i in range(300)]
+    jobs = []
+    for i in range(requests):
+        if rng.random() < name_check_share:
+            jobs.append(('name', f'Bench Player {i}'))
+        else:
+            jobs.append(('winner', *rng.sample(names, 2)))
+
+    latencies = []
+    lags = []
+    running = True
+
+    async def tick_probe():
+        # Stands in for the game loop: any time the event loop is blocked shows up as lateness
+        interval = 1 / server.TICK_RATE
+        while running:
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            lags.append(time.perf_counter() - started - interval)
+
+    async def caller():
+        while jobs:
+            job = jobs.pop()
+            started = time.perf_counter()
+            if job[0] == 'name':
+                await ai.check_name_appropriateness(job[1])
+            else:
+                await ai.determine_winner_with_cache(job[1], job[2])
+            latencies.append(time.perf_counter() - started)
+
+    probe = asyncio.create_task(tick_probe())
+    started = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    running = False
+    await probe
+    return elapsed, latencies, lags
+
+
+def bench_ai(requests: int = 1000, concurrency: int = 200):
+    """determine_winner_with_cache + check_name_appropriateness under load, against FakeBackend."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        import ai
+    from model_backends import FakeBackend
+
+    scenarios = [
+        ('healthy', {'latency': 'lognormal:0.05:0.5'}),
+        ('slow tail', {'latency': 'lognormal:0.1:1.0'}),
+        ('flaky', {'latency': 'lognormal:0.05:0.5', 'error_rate': 0.05, 'malformed_rate': 0.05}),
+        ('rate limited', {'latency': 'lognormal:0.05:0.5', 'rate_limit': 50}),
+    ]
+    executor_threads = min(32, (os.cpu_count() or 1) + 4)  # asyncio's default executor size
+    print(f'--- AI path, fake model ({requests} calls, {concurrency} concurrent callers, '
+          f'{executor_threads} executor threads) ---')
+    with tempfile.TemporaryDirectory() as tmp:
+        ai.CACHE_FILE = os.path.join(tmp, 'cache.json')  # Keep the real verdict cache out of it
+        for label, config in scenarios:
+            backend = FakeBackend(seed=1234, **config)
+            ai.ai_resolver.backend = backend
+            ai._cache.clear()
+            with contextlib.redirect_stdout(io.StringIO()):
+                elapsed, latencies, lags = asyncio.run(drive_ai(ai, requests, concurrency))
+            latencies.sort()
+            lags.sort()
+            stats = backend.stats()
+            print(f'{label:>12}: {requests / elapsed:7.1f} calls/s  '
+                  f'latency p50 {percentile(latencies, 0.5) * 1000:6.0f} ms  '
+                  f'p99 {percentile(latencies, 0.99) * 1000:6.0f} ms  max {latencies[-1] * 1000:6.0f} ms  '
+                  f'tick stall p99 {percentile(lags, 0.99) * 1000:5.1f} ms  max {lags[-1] * 1000:5.1f} ms  '
+                  f'(model calls {stats["calls"]}, errors {stats["errors"]}, '
+                  f'malformed {stats["malformed"]}, rate limited {stats["rate_limited"]})')
+
+
+BENCHMARKS = {
+    'snapshot': bench_snapshot,
+    'collision': bench_collision,
+    'ai': bench_ai,
+}
+
+
+def main():
+    selected = sys.argv[1:] or list(BENCHMARKS)
+    for name in selected:
+        if name not in BENCHMARKS:
+            print(f'Unknown benchmark: {name} (available: {", ".join(BENCHMARKS)})')
+            continue
+        BENCHMARKS[name]()
+
+
+if __name__ == '__main__':
+    main()
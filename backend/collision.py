@@ -0,0 +1,76 @@
+import math
+from collections import defaultdict
+
+COLLISION_MODES = ('discrete', 'swept')
+
+
+def circles_overlap(minion1, minion2) -> bool:
+    """Discrete test: are the two minions overlapping at their current positions?"""
+    dx = minion1.x - minion2.x
+    dy = minion1.y - minion2.y
+    distance = math.sqrt(dx**2 + dy**2)
+    return distance < (minion1.size + minion2.size) / 2
+
+
+def swept_circles_collide(minion1, minion2) -> bool:
+    """Swept test: did the two minions touch at any point during the last step?
+
+    Both minions are assumed to move in a straight line from (prev_x, prev_y)
+    to (x, y). Working in minion2's frame of reference, minion1 sweeps along
+    the relative motion segment, and the closest approach on that segment is
+    compared against the sum of the radii.
+    """
+    radius = (minion1.size + minion2.size) / 2
+    start_dx = minion1.prev_x - minion2.prev_x
+    start_dy = minion1.prev_y - minion2.prev_y
+    move_dx = (minion1.x - minion1.prev_x) - (minion2.x - minion2.prev_x)
+    move_dy = (minion1.y - minion1.prev_y) - (minion2.y - minion2.prev_y)
+
+    move_len_sq = move_dx * move_dx + move_dy * move_dy
+    if move_len_sq > 0:
+        t = -(start_dx * move_dx + start_dy * move_dy) / move_len_sq
+        t = max(0.0, min(1.0, t))
+    else:
+        t = 0.0
+
+    closest_dx = start_dx + move_dx * t
+    closest_dy = start_dy + move_dy * t
+    return closest_dx * closest_dx + closest_dy * closest_dy < radius * radius
+
+
+def candidate_pairs(minion_list, cell_size: float, swept: bool = False):
+    """Broad phase: index pairs (i, j), i < j, of minions that may be colliding.
+
+    Every minion is inserted into a uniform grid by its bounding box. In swept
+    mode the box covers the whole motion segment from the previous position,
+    so fast movers still meet everything they passed. Same-owner pairs are
+    left out, and pairs come back in the order the all-pairs loop would visit
+    them, so outcomes don't depend on the grid.
+    """
+    grid = defaultdict(list)
+    for index, minion in enumerate(minion_list):
+        radius = minion.size / 2
+        if swept:
+            min_x = min(minion.x, minion.prev_x) - radius
+            max_x = max(minion.x, minion.prev_x) + radius
+            min_y = min(minion.y, minion.prev_y) - radius
+            max_y = max(minion.y, minion.prev_y) + radius
+        else:
+            min_x, max_x = minion.x - radius, minion.x + radius
+            min_y, max_y = minion.y - radius, minion.y + radius
+        for cell_x in range(int(min_x // cell_size), int(max_x // cell_size) + 1):
+            for cell_y in range(int(min_y // cell_size), int(max_y // cell_size) + 1):
+                grid[(cell_x, cell_y)].append(index)
+
+    pairs = set()
+    for members in grid.values():
+        if len(members) < 2:
+            continue
+        for a in range(len(members)):
+            i = members[a]
+            owner_i = minion_list[i].owner_id
+            for b in range(a + 1, len(members)):
+                j = members[b]
+                if minion_list[j].owner_id != owner_i:
+                    pairs.add((i, j) if i < j else (j, i))
+    return sorted(pairs)
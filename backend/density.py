@@ -0,0 +1,99 @@
+import math
+from typing import Optional
+
+
+class DensityGrid:
+    """Coarse occupancy of the whole world, for minimaps and off-screen awareness.
+
+    The world is cut into ``cell_size`` squares; each cell counts its minions
+    per owner. ``update`` walks the minions and only touches the counters of
+    those that changed cell or owner (and of those that are gone), so a
+    refresh costs a lookup per minion plus work proportional to what moved.
+
+    The broadcast form is a packed byte string with two bytes per cell, row
+    by row: the minion count (capped at 255) and an index into ``colors``
+    for the fleet with the most minions in that cell.
+    """
+
+    def __init__(self, world_width: float, world_height: float, cell_size: float = 200):
+        self.cell_size = cell_size
+        self.cols = math.ceil(world_width / cell_size)
+        self.rows = math.ceil(world_height / cell_size)
+        self.counts = [0] * (self.cols * self.rows)
+        self.owners = [{} for _ in range(self.cols * self.rows)]  # per cell: owner id -> minions
+        self.where = {}  # minion id -> (cell, owner id) as of the last update
+        self.changes = 0
+        self._broadcast = None  # payload as last handed out by take_update()
+
+    def _cell(self, x: float, y: float) -> int:
+        col = min(max(int(x // self.cell_size), 0), self.cols - 1)
+        row = min(max(int(y // self.cell_size), 0), self.rows - 1)
+        return row * self.cols + col
+
+    def _add(self, cell: int, owner_id: str):
+        self.counts[cell] += 1
+        owners = self.owners[cell]
+        owners[owner_id] = owners.get(owner_id, 0) + 1
+
+    def _remove(self, cell: int, owner_id: str):
+        self.counts[cell] -= 1
+        owners = self.owners[cell]
+        remaining = owners[owner_id] - 1
+        if remaining:
+            owners[owner_id] = remaining
+        else:
+            del owners[owner_id]
+
+    def update(self, minions: dict):
+        """Catch up with minions that moved to another cell, changed owner, appeared or vanished."""
+        where = self.where
+        for minion_id, minion in minions.items():
+            entry = (self._cell(minion.x, minion.y), minion.owner_id)
+            previous = where.get(minion_id)
+            if previous != entry:
+                if previous is not None:
+                    self._remove(*previous)
+                self._add(*entry)
+                where[minion_id] = entry
+                self.changes += 1
+        if len(where) > len(minions):
+            for minion_id in [k for k in where if k not in minions]:
+                self._remove(*where.pop(minion_id))
+                self.changes += 1
+
+    def encode(self, players: dict) -> dict:
+        colors = {}
+        cells = bytearray(2 * len(self.counts))
+        for cell, count in enumerate(self.counts):
+            if not count:
+                continue
+            owners = self.owners[cell]
+            dominant = max(owners, key=owners.get)
+            player = players.get(dominant)
+            color = player.color if player else '#ffffff'
+            cells[2 * cell] = min(count, 255)
+            cells[2 * cell + 1] = colors.setdefault(color, len(colors))
+        return {
+            'cols': self.cols,
+            'rows': self.rows,
+            'cell_size': self.cell_size,
+            'colors': list(colors),
+            'cells': bytes(cells),
+        }
+
+    def take_update(self, players: dict) -> Optional[dict]:
+        """The grid to broadcast, or None if it looks the same as the last one."""
+        payload = self.encode(players)
+        if payload == self._broadcast:
+            return None
+        self._broadcast = payload
+        return payload
+
+    def stats(self) -> dict:
+        """Counters for the /test status endpoint."""
+        return {
+            'cells': len(self.counts),
+            'occupied': sum(1 for count in self.counts if count),
+            'tracked_minions': len(self.where),
+            'changes': self.changes,
+        }
@@ -0,0 +1,365 @@
+"""Differential check of the simulation engines against the reference step.
+
+Every engine plays the same seeded worlds through the same input script:
+fleets steering at each other's spawn points, pauses and the odd
+delta_time clamp. Collision verdicts come from a fixed function of the two
+names instead of the AI. After every tick the engine's world is diffed
+against the reference run (reference_sim.py, the game loop and payloads
+as they were before the engines were optimised):
+
+- minion positions, within TOLERANCE world units, plus owner and size,
+- infections and max-fleet kills (winner, loser) and eliminations,
+- snapshot payloads, every PAYLOAD_EVERY ticks: SnapshotBuilder output,
+  with each player's ``minion_ids`` expanded back into its minions,
+  against the original update_game_state payload of the reference world.
+
+The engines run in the configuration the original loop had: discrete
+collisions and full separation. Swept collisions and governor-thinned
+separation change outcomes on purpose and are checked on their own
+(benchmark.check_tick_rate_outcomes, tests/test_collision.py).
+
+Each engine's time per tick is reported next to the reference's.
+
+    python differential.py                     # all engines
+    python differential.py inline              # one engine
+"""
+import abc
+import asyncio
+import contextlib
+import json
+import os
+import random
+import sys
+import time
+import zlib
+
+import server
+import reference_sim
+from benchmark import build_world
+from snapshot import SnapshotBuilder
+
+TOLERANCE = 1e-6  # World units
+PAYLOAD_EVERY = 10  # Ticks between payload comparisons
+MAX_REPORTED = 5  # Mismatches printed per scenario and engine
+SCENARIOS = [
+    # (players, fleet size, ticks)
+    (4, 5, 600),
+    (10, 20, 300),
+    (25, 40, 60),
+]
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+async def fixed_verdict(player1_name, player2_name):
+    """Stands in for the AI: the same two names always give the same winner."""
+    if zlib.crc32(player1_name.encode()) <= zlib.crc32(player2_name.encode()):
+        return player1_name, player2_name
+    return player2_name, player1_name
+
+
+def input_script(seed: int, ticks: int) -> list:
+    """Per tick: (delta_time, {player_id: (dx, dy)} for players that change direction)."""
+    rng = random.Random(seed)
+    spawns = {player_id: player.get_fleet_center() for player_id, player in server.players.items()}
+    player_ids = list(spawns)
+    script = []
+    for tick in range(ticks):
+        delta_time = 0.1 if tick % 97 == 96 else 1 / 60  # A lag spike hits the delta_time clamp now and then
+        changes = {}
+        for player_id in player_ids:
+            if tick % 30 != player_ids.index(player_id) % 30:
+                continue
+            roll = rng.random()
+            if roll < 0.6:
+                # Steer at where another fleet started, as a cursor offset from our own start
+                target_x, target_y = spawns[rng.choice(player_ids)]
+                own_x, own_y = spawns[player_id]
+                changes[player_id] = (target_x - own_x, target_y - own_y)
+            elif roll < 0.8:
+                changes[player_id] = (rng.uniform(-400, 400), rng.uniform(-400, 400))
+            else:
+                changes[player_id] = (0, 0)  # Cursor on the fleet: stay put
+        script.append((delta_time, changes))
+    return script
+
+
+class Engine(abc.ABC):
+    name = 'base'
+
+    def start(self, events: list):
+        """Called once the world for a scenario is built; ``events`` collects the tick's emits."""
+
+    @abc.abstractmethod
+    async def tick(self, current_time: float, delta_time: float):
+        """Advance the world by one step and resolve its collisions."""
+
+    def close(self):
+        pass
+
+
+class ReferenceEngine(Engine):
+    """The original game loop (reference_sim.py), from movement to eliminations.
+
+    Only the world it works on and the fixed verdicts are shared with the
+    engines under test; its collision cooldowns and emits are its own.
+    """
+
+    name = 'reference'
+
+    def __init__(self):
+        self.events = None
+        self.cooldowns = {}
+
+    def start(self, events):
+        self.events = events
+        self.cooldowns = {}
+
+    async def tick(self, current_time, delta_time):
+        reference_sim.move_minions(server.players, server.minions, delta_time,
+                                   server.WORLD_WIDTH, server.WORLD_HEIGHT, server.BASE_MAX_SPEED)
+        pairs = reference_sim.colliding_pairs(server.minions)
+        await reference_sim.resolve_collisions(pairs, server.players, server.minions, self.cooldowns, current_time,
+                                               fixed_verdict, server.MAX_FLEET_SIZE, self.events)
+
+
+class InlineEngine(Engine):
+    """What the game loop runs with PHYSICS_ENGINE=inline."""
+
+    name = 'inline'
+
+    async def tick(self, current_time, delta_time):
+        await server.simulate_tick(current_time, delta_time, 1)
+
+
+class ProcessEngine(Engine):
+    """PHYSICS_ENGINE=process, waited on every tick.
+
+    The game loop never waits for the worker, so it resolves collisions a
+    step late; here each step is finished before the next starts, which
+    keeps the worlds in step with the reference and diffs the physics alone.
+    """
+
+    name = 'process'
+
+    def __init__(self):
+        self.worker = None
+
+    def start(self, events):
+        self.close()
+        self.worker = server.PhysicsWorker(server.fleet_physics, server.PHYSICS_CAPACITY, server.COLLISION_CELL_SIZE,
+                                           swept=server.COLLISION_MODE == 'swept')
+
+    async def tick(self, current_time, delta_time):
+        self.worker.start(server.players, server.minions, delta_time, 1)
+        pairs = self.worker.collect()
+        while pairs is None:
+            time.sleep(0.0001)
+            pairs = self.worker.collect()
+        await server.resolve_collisions(pairs, current_time)
+
+    def close(self):
+        if self.worker:
+            self.worker.close()
+            self.worker = None
+
+
+ENGINES = {
+    'inline': InlineEngine,
+    'process': ProcessEngine,
+}
+
+
+def expand_minion_ids(payload: dict) -> dict:
+    """Put each player's minions back inline, the way the original payload carried them."""
+    by_id = {minion['id']: minion for minion in payload.get('all_minions', [])}
+    players = []
+    for player in payload.get('players', []):
+        player = dict(player)
+        player['minions'] = [by_id.get(minion_id) for minion_id in player.pop('minion_ids', [])]
+        players.append(player)
+    return dict(payload, players=players)
+
+
+class Trace:
+    """What happened in one run, tick by tick."""
+
+    def __init__(self):
+        self.positions = []  # per tick: {minion_id: (x, y, owner_id, size)}
+        self.events = []  # per tick: [(event, ...)]
+        self.payloads = {}  # tick -> snapshot payload as decoded JSON
+        self.tick_times = []
+
+
+async def run(engine: Engine, num_players: int, fleet_size: int, ticks: int, seed: int, reference: bool) -> Trace:
+    """Play one scenario on ``engine`` and trace it."""
+    for state in (server.players, server.minions, server.collision_cooldowns, server.sessions):
+        state.clear()
+    clock = FakeClock()
+    server.clock = clock
+    server.server_tick = 0
+    build_world(num_players, fleet_size, seed)
+    server.leaderboard.sync(server.players, server.minions)
+    script = input_script(seed, ticks)
+    builder = SnapshotBuilder()
+
+    trace = Trace()
+    events = []
+    engine.start(events)
+
+    def capture(event, data, to=None, skip_sid=None):
+        if event == 'infection_happened':
+            events.append((event, data['winner']['id'], data['loser']['id'], data['max_fleet_kill']))
+        elif event == 'player_eliminated':
+            events.append((event, data['player_id'], data['eliminated_by']))
+
+    server.outbound.queue_reliable = capture
+    # The simulation logs as it goes; keep that out of the report
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            await play(engine, script, clock, builder, trace, events, reference)
+        finally:
+            del server.outbound.queue_reliable  # Back to the class method
+            engine.close()
+    return trace
+
+
+async def play(engine: Engine, script: list, clock: FakeClock, builder: SnapshotBuilder,
+               trace: Trace, events: list, reference: bool):
+    for tick, (delta_time, changes) in enumerate(script):
+        server.server_tick = tick
+        clock.now += delta_time
+        for player_id, (dx, dy) in changes.items():
+            player = server.players.get(player_id)
+            if player:
+                player.direction_dx, player.direction_dy = dx, dy
+
+        started = time.perf_counter()
+        await engine.tick(clock.now, delta_time)
+        trace.tick_times.append(time.perf_counter() - started)
+
+        trace.positions.append({minion_id: (minion.x, minion.y, minion.owner_id, minion.size)
+                                for minion_id, minion in server.minions.items()})
+        trace.events.append(list(events))
+        events.clear()
+        if tick % PAYLOAD_EVERY == 0:
+            if reference:
+                trace.payloads[tick] = reference_sim.game_state(server.players, server.minions, clock.now)
+            else:
+                payload = json.loads(builder.build(server.players, server.minions, clock.now, tick=tick).json)
+                trace.payloads[tick] = expand_minion_ids(payload)
+
+
+def diff_positions(expected: dict, actual: dict):
+    """Yield a description of every difference between two position maps."""
+    for minion_id in expected.keys() - actual.keys():
+        yield f'minion {minion_id} missing'
+    for minion_id in actual.keys() - expected.keys():
+        yield f'unexpected minion {minion_id}'
+    for minion_id, (x, y, owner_id, size) in expected.items():
+        if minion_id not in actual:
+            continue
+        actual_x, actual_y, actual_owner, actual_size = actual[minion_id]
+        if abs(actual_x - x) > TOLERANCE or abs(actual_y - y) > TOLERANCE:
+            yield f'minion {minion_id} at ({actual_x:.6f}, {actual_y:.6f}), expected ({x:.6f}, {y:.6f})'
+        if actual_owner != owner_id or actual_size != size:
+            yield f'minion {minion_id} owned by {actual_owner} size {actual_size}, expected {owner_id} size {size}'
+
+
+def same_value(expected, actual) -> bool:
+    if isinstance(expected, float) or isinstance(actual, float):
+        return isinstance(actual, (int, float)) and abs(actual - expected) <= TOLERANCE
+    if isinstance(expected, list):
+        return (isinstance(actual, list) and len(actual) == len(expected)
+                and all(same_value(e, a) for e, a in zip(expected, actual)))
+    if isinstance(expected, dict):
+        return (isinstance(actual, dict) and actual.keys() == expected.keys()
+                and all(same_value(value, actual[key]) for key, value in expected.items()))
+    return expected == actual
+
+
+def diff_payloads(expected: dict, actual: dict):
+    """Yield the fields that differ between two snapshot payloads, matched up by entity id."""
+    for key in ('players', 'all_minions'):
+        expected_entities = {entity['id']: entity for entity in expected[key]}
+        actual_entities = {entity['id']: entity for entity in actual.get(key, [])}
+        if list(expected_entities) != list(actual_entities):
+            yield f'{key}: ids or order differ'
+            continue
+        for entity_id, entity in expected_entities.items():
+            for field, value in entity.items():
+                if not same_value(value, actual_entities[entity_id].get(field)):
+                    yield f'{key} {entity_id}.{field} = {actual_entities[entity_id].get(field)!r}, expected {value!r}'
+
+
+def compare(expected: Trace, actual: Trace) -> dict:
+    """Count mismatching ticks per category and keep the first few descriptions."""
+    report = {'positions': 0, 'events': 0, 'payloads': 0, 'max_deviation': 0.0, 'first': []}
+    for tick, (expected_positions, actual_positions) in enumerate(zip(expected.positions, actual.positions)):
+        for minion_id, (x, y, _, _) in expected_positions.items():
+            if minion_id in actual_positions:
+                actual_x, actual_y = actual_positions[minion_id][:2]
+                report['max_deviation'] = max(report['max_deviation'], abs(actual_x - x), abs(actual_y - y))
+        problems = list(diff_positions(expected_positions, actual_positions))
+        if problems:
+            report['positions'] += 1
+        if expected.events[tick] != actual.events[tick]:
+            report['events'] += 1
+            problems.append(f'events {actual.events[tick]}, expected {expected.events[tick]}')
+        if tick in expected.payloads:
+            payload_problems = list(diff_payloads(expected.payloads[tick], actual.payloads[tick]))
+            if payload_problems:
+                report['payloads'] += 1
+                problems += payload_problems
+        for problem in problems[:MAX_REPORTED - len(report['first'])]:
+            report['first'].append(f'tick {tick}: {problem}')
+    return report
+
+
+async def check(engine_names: list, seed: int = 1234) -> bool:
+    ok = True
+    print(f'tolerance {TOLERANCE}, payloads every {PAYLOAD_EVERY} ticks')
+    for num_players, fleet_size, ticks in SCENARIOS:
+        expected = await run(ReferenceEngine(), num_players, fleet_size, ticks, seed, reference=True)
+        reference_ms = sum(expected.tick_times) / ticks * 1000
+        infections = sum(1 for tick_events in expected.events for event in tick_events if event[0] == 'infection_happened')
+        eliminations = sum(1 for tick_events in expected.events for event in tick_events if event[0] == 'player_eliminated')
+        print(f'--- {num_players} players x {fleet_size} minions, {ticks} ticks '
+              f'({infections} infections, {eliminations} eliminations) ---')
+        print(f'{"reference":>10}: {reference_ms:8.3f} ms/tick')
+        for name in engine_names:
+            actual = await run(ENGINES[name](), num_players, fleet_size, ticks, seed, reference=False)
+            engine_ms = sum(actual.tick_times) / ticks * 1000
+            report = compare(expected, actual)
+            mismatched = report['positions'] or report['events'] or report['payloads']
+            ok = ok and not mismatched
+            verdict = 'MISMATCH' if mismatched else 'match'
+            print(f'{name:>10}: {engine_ms:8.3f} ms/tick  {reference_ms / max(engine_ms, 1e-9):6.1f}x  '
+                  f'{verdict} (ticks off: positions {report["positions"]}, events {report["events"]}, '
+                  f'payloads {report["payloads"]}; max deviation {report["max_deviation"]:.2e})')
+            for line in report['first']:
+                print(f'{"":>12}{line}')
+    return ok
+
+
+def main():
+    names = sys.argv[1:] or list(ENGINES)
+    unknown = [name for name in names if name not in ENGINES]
+    if unknown:
+        print(f'Unknown engine(s) {unknown}; choose from {list(ENGINES)}')
+        sys.exit(2)
+
+    server.determine_winner_with_cache = fixed_verdict
+    server.COLLISION_MODE = 'discrete'  # What the original loop did
+    ok = asyncio.run(check(names))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
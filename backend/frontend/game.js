@@ -4,6 +4,9 @@ class AgarioGame {
     constructor() {
         // Game constants
         this.MAX_FLEET_SIZE = 50; // Match backend MAX_FLEET_SIZE
+        this.BASE_MAX_SPEED = 1200; // Match backend BASE_MAX_SPEED (pixels per second)
+        this.PREDICTION_FACTOR = 0.7; // Share of speed the backend gives to the input direction
+        this.MAX_EXTRAPOLATION = 0.1; // Seconds we may run past the newest snapshot
         
         // Game state
         this.socket = null;
@@ -12,10 +15,27 @@ class AgarioGame {
         this.minimapCanvas = null;
         this.minimapCtx = null;
         this.players = new Map();
+        this.leaderboard = []; // Top fleets, ranked by the server
+        this.density = null; // Coarse whole-world occupancy grid for the minimap
+        this.maxFleets = new Set(); // Ids of players at MAX_FLEET_SIZE, from each snapshot
         this.minions = new Map();  // All minions in the game
         this.myPlayerId = null;
+        this.spectating = new URLSearchParams(location.search).has('spectate');  // ?spectate: watch without joining
         this.mouseX = 0;
         this.mouseY = 0;
+        this.inputDx = 0;  // Last direction vector from the mouse
+        this.inputDy = 0;
+        this.inputSeq = 0;  // Sequence number so the server can drop stale input
+        this.INPUT_SEND_INTERVAL = 1000 / 30;  // Send input at most 30 times a second
+        this.lastInputSentAt = 0;
+        this.inputSendTimer = null;
+        this.useBinaryInput = true;  // Send input as a 9-byte packet instead of a JSON event
+        
+        // Snapshot interpolation - the server sends snapshots slower than we render
+        this.snapshots = [];  // Last two snapshots: { tick, serverTime, receivedAt, positions }
+        this.serverTimeOffset = null;  // clientTime - serverTime of the least-delayed snapshot
+        this.snapshotInterval = 1 / 20;  // Smoothed gap between snapshots, in seconds
+        this.lastTick = null;  // Tick of the newest snapshot, so a resumed session only needs what changed since
         this.worldWidth = 4000;  // Increased from 2000 to accommodate 50 players
         this.worldHeight = 3000;  // Increased from 1500 to accommodate 50 players
         this.baseViewWidth = window.innerWidth;
@@ -238,6 +258,7 @@ class AgarioGame {
     
     startRenderLoop() {
         const render = () => {
+            this.applyInterpolation();
             this.updateCamera();
             this.render();
             this.renderMinimap();
@@ -263,6 +284,107 @@ class AgarioGame {
         this.canvas.style.height = `${this.baseViewHeight}px`;
     }
     
+    recordSnapshot(data) {
+        if (data.server_time === undefined) return;
+        const clientTime = performance.now() / 1000;
+        
+        // Track the offset of the least-delayed snapshot, drifting slowly so clock skew can recover
+        const offset = clientTime - data.server_time;
+        if (this.serverTimeOffset === null || offset < this.serverTimeOffset) {
+            this.serverTimeOffset = offset;
+        } else {
+            this.serverTimeOffset += (offset - this.serverTimeOffset) * 0.01;
+        }
+        
+        const latest = this.snapshots[this.snapshots.length - 1];
+        if (latest) {
+            if (data.tick < latest.tick) return; // Older than what we already have
+            const gap = data.server_time - latest.serverTime;
+            if (gap > 0) {
+                this.snapshotInterval += (gap - this.snapshotInterval) * 0.1;
+            }
+            if (data.tick === latest.tick) {
+                this.snapshots.pop(); // Same tick re-sent after an event - keep the newest copy
+            }
+        }
+        
+        const positions = new Map();
+        data.all_minions.forEach(minion => {
+            positions.set(minion.id, { x: minion.x, y: minion.y });
+        });
+        this.snapshots.push({ tick: data.tick, serverTime: data.server_time, receivedAt: clientTime, positions });
+        this.lastTick = data.tick;
+        if (this.snapshots.length > 2) {
+            this.snapshots.shift();
+        }
+    }
+    
+    applyInterpolation() {
+        const count = this.snapshots.length;
+        if (count === 0 || this.serverTimeOffset === null) return;
+        
+        const clientTime = performance.now() / 1000;
+        const latest = this.snapshots[count - 1];
+        const previous = count > 1 ? this.snapshots[0] : null;
+        
+        // Render one snapshot interval in the past so there is usually a pair to blend between,
+        // and allow a short extrapolation past the newest one if the next snapshot is late
+        let alpha = 1;
+        if (previous && latest.serverTime > previous.serverTime) {
+            const span = latest.serverTime - previous.serverTime;
+            const renderTime = clientTime - this.serverTimeOffset - this.snapshotInterval;
+            alpha = (renderTime - previous.serverTime) / span;
+            alpha = Math.max(0, Math.min(alpha, 1 + this.MAX_EXTRAPOLATION / span));
+        }
+        
+        // Our own fleet is drawn at its newest position, predicted forward from our input
+        const prediction = this.predictOwnDisplacement(clientTime - latest.receivedAt);
+        
+        this.minions.forEach((minion, minionId) => {
+            const to = latest.positions.get(minionId);
+            if (!to) return;
+            
+            if (minion.owner_id === this.myPlayerId) {
+                minion.x = to.x + prediction.x;
+                minion.y = to.y + prediction.y;
+                return;
+            }
+            
+            const from = previous ? previous.positions.get(minionId) : null;
+            if (!from) {
+                minion.x = to.x;
+                minion.y = to.y;
+                return;
+            }
+            minion.x = from.x + (to.x - from.x) * alpha;
+            minion.y = from.y + (to.y - from.y) * alpha;
+        });
+    }
+    
+    predictOwnDisplacement(elapsed) {
+        const magnitude = Math.sqrt(this.inputDx ** 2 + this.inputDy ** 2);
+        if (magnitude <= 1) {
+            return { x: 0, y: 0 }; // Backend doesn't move the fleet when the cursor is on it
+        }
+        const t = Math.max(0, Math.min(elapsed, this.snapshotInterval + this.MAX_EXTRAPOLATION));
+        const distance = this.BASE_MAX_SPEED * this.PREDICTION_FACTOR * t;
+        return { x: (this.inputDx / magnitude) * distance, y: (this.inputDy / magnitude) * distance };
+    }
+    
+    getMyFleetCenter() {
+        let sumX = 0;
+        let sumY = 0;
+        let count = 0;
+        this.minions.forEach(minion => {
+            if (minion.owner_id === this.myPlayerId) {
+                sumX += minion.x;
+                sumY += minion.y;
+                count++;
+            }
+        });
+        return count > 0 ? { x: sumX / count, y: sumY / count } : null;
+    }
+    
     updateCamera() {
         const myPlayer = this.players.get(this.myPlayerId);
         if (myPlayer && myPlayer.minion_count > 0) {
@@ -276,9 +398,17 @@ class AgarioGame {
             this.viewWidth = this.baseViewWidth * this.zoom;
             this.viewHeight = this.baseViewHeight * this.zoom;
             
-            // Center camera on the fleet center
-            this.cameraX = myPlayer.fleet_center_x - this.viewWidth / 2;
-            this.cameraY = myPlayer.fleet_center_y - this.viewHeight / 2;
+            // Center camera on the fleet center (using interpolated/predicted positions)
+            const center = this.getMyFleetCenter() || { x: myPlayer.fleet_center_x, y: myPlayer.fleet_center_y };
+            this.cameraX = center.x - this.viewWidth / 2;
+            this.cameraY = center.y - this.viewHeight / 2;
+        } else if (this.spectating) {
+            // Fit the whole arena on screen
+            this.zoom = Math.max(this.worldWidth / this.baseViewWidth, this.worldHeight / this.baseViewHeight);
+            this.viewWidth = this.baseViewWidth * this.zoom;
+            this.viewHeight = this.baseViewHeight * this.zoom;
+            this.cameraX = (this.worldWidth - this.viewWidth) / 2;
+            this.cameraY = (this.worldHeight - this.viewHeight) / 2;
         }
     }
     
@@ -325,16 +455,53 @@ class AgarioGame {
             const dx = canvasX - (this.baseViewWidth / 2);
             const dy = canvasY - (this.baseViewHeight / 2);
 
-            if (this.socket && this.socket.connected && this.myPlayerId) {
-                // Send the raw direction vector
-                this.socket.emit('move_player', {
-                    dx: dx,
-                    dy: dy,
-                });
-            }
+            // Remember the input for own-fleet prediction and the next send
+            this.inputDx = dx;
+            this.inputDy = dy;
+            this.scheduleInputSend();
         });
     }
     
+    scheduleInputSend() {
+        // Throttle sends, but always deliver the latest vector once the interval passes
+        if (this.inputSendTimer) return;
+        const wait = this.INPUT_SEND_INTERVAL - (performance.now() - this.lastInputSentAt);
+        if (wait <= 0) {
+            this.sendInput();
+        } else {
+            this.inputSendTimer = setTimeout(() => {
+                this.inputSendTimer = null;
+                this.sendInput();
+            }, wait);
+        }
+    }
+    
+    sendInput() {
+        if (!this.socket || !this.socket.connected || !this.myPlayerId) return;
+        this.lastInputSentAt = performance.now();
+        this.inputSeq = (this.inputSeq + 1) >>> 0;
+        
+        const engine = this.socket.io && this.socket.io.engine;
+        if (this.useBinaryInput && engine) {
+            // magic 'M', uint32 seq, int16 dx, int16 dy (little-endian) - see backend/inputs.py
+            const clamp = (v) => Math.max(-32768, Math.min(32767, Math.round(v)));
+            const buffer = new ArrayBuffer(9);
+            const view = new DataView(buffer);
+            view.setUint8(0, 0x4D);
+            view.setUint32(1, this.inputSeq, true);
+            view.setInt16(5, clamp(this.inputDx), true);
+            view.setInt16(7, clamp(this.inputDy), true);
+            engine.send(buffer);
+        } else {
+            // Send the raw direction vector
+            this.socket.emit('move_player', {
+                dx: this.inputDx,
+                dy: this.inputDy,
+                seq: this.inputSeq,
+            });
+        }
+    }
+    
     connectToServer() {
         console.log('Attempting to connect to server...');
         // Detect if we're running locally or on a deployed server
@@ -346,13 +513,23 @@ class AgarioGame {
             transports: ['polling', 'websocket'], // Allow both for local development
             timeout: 20000,
             forceNew: true,
-            upgrade: true // Enable WebSocket upgrade for better performance
+            upgrade: true, // Enable WebSocket upgrade for better performance
+            auth: this.spectating ? { spectate: true } : {}
         });
         
         this.socket.on('connect', () => {
             console.log('Connected to server successfully!');
             document.getElementById('connectionStatus').textContent = 'Connected!';
+            if (this.spectating) return; // The server answers with 'spectating'
             document.getElementById('joinButton').disabled = false;
+            
+            // Try to reclaim our fleet (e.g. after a server restart)
+            const sessionToken = sessionStorage.getItem('sessionToken');
+            if (sessionToken) {
+                // With the world still on screen, ask for just the changes since our last snapshot
+                const lastTick = this.myPlayerId ? this.lastTick : null;
+                this.socket.emit('resume_session', { token: sessionToken, last_tick: lastTick });
+            }
         });
         
         this.socket.on('connect_error', (error) => {
@@ -373,10 +550,61 @@ class AgarioGame {
         
         this.socket.on('disconnect', (reason) => {
             console.log('Disconnected from server:', reason);
+            if (this.myPlayerId && reason !== 'io server disconnect' && reason !== 'io client disconnect') {
+                // The server holds our fleet for a while; Socket.IO reconnects and we resume the session
+                this.addChatMessage('Connection lost - reconnecting...', 'leave');
+                return;
+            }
             document.getElementById('connectionStatus').textContent = 'Disconnected from server';
             this.showMenu();
         });
         
+        this.socket.on('spectating', (data) => {
+            this.worldWidth = data.world.width;
+            this.worldHeight = data.world.height;
+            this.players.clear();
+            this.minions.clear();
+            this.snapshots = [];
+            this.snapshotInterval = 1 / data.rate;
+            document.getElementById('playerSize').textContent = 'Spectating';
+            this.showGame();
+        });
+        
+        this.socket.on('spectator_state', (data) => {
+            // Flat arrays with string-table references and quantized positions (see spectator.py)
+            const q = data.quantum;
+            const strings = data.strings;
+            const players = new Map();
+            for (let i = 0; i < data.players.length; i += 3) {
+                const id = data.players[i];
+                players.set(id, { id, name: strings[data.players[i + 1]], color: strings[data.players[i + 2]], minion_count: 0 });
+            }
+            const allMinions = [];
+            for (let i = 0; i < data.minions.length; i += 8) {
+                const m = data.minions;
+                allMinions.push({
+                    id: m[i], x: m[i + 1] * q, y: m[i + 2] * q, size: m[i + 3] * q,
+                    owner_id: m[i + 4], original_name: strings[m[i + 5]], color: strings[m[i + 6]],
+                    is_invulnerable: (m[i + 7] & 1) === 1,
+                });
+                const owner = players.get(m[i + 4]);
+                if (owner) owner.minion_count++;
+            }
+            this.players = players;
+            this.recordSnapshot({ tick: data.tick, server_time: data.server_time, all_minions: allMinions });
+            this.minions = new Map(allMinions.map(minion => [minion.id, minion]));
+            
+            // Spectators rank fleets themselves from the frame
+            const leaderboard = Array.from(players.values())
+                .filter(player => player.minion_count > 0)
+                .sort((a, b) => b.minion_count - a.minion_count)
+                .slice(0, 10);
+            if (JSON.stringify(leaderboard) !== JSON.stringify(this.leaderboard)) {
+                this.leaderboard = leaderboard;
+                this.updateLeaderboard();
+            }
+        });
+        
         this.socket.on('game_state', (data) => {
             console.log('Received game state:', data);
             this.worldWidth = data.world.width;
@@ -385,6 +613,8 @@ class AgarioGame {
             // Clear all existing data to ensure no ghost minions remain
             this.players.clear();
             this.minions.clear();
+            this.snapshots = [];
+            this.recordSnapshot(data);
             
             // Update players
             data.players.forEach(player => {
@@ -470,10 +700,16 @@ class AgarioGame {
         });
         
         this.socket.on('update_game_state', (data) => {
-            // Update players - add new players if they don't exist
-            data.players.forEach(playerData => {
-                this.players.set(playerData.id, playerData);
-            });
+            this.recordSnapshot(data);
+            // Fleets at the size cap, ranked or not (the leaderboard only covers the top few)
+            this.maxFleets = new Set(data.max_fleets || []);
+            
+            // Per-tick snapshots only carry minions; the roster comes from join/leave/rename events
+            if (data.players) {
+                data.players.forEach(playerData => {
+                    this.players.set(playerData.id, playerData);
+                });
+            }
             
             // For minions, we need to be more careful to avoid ghost minions
             // First, remove any minions that are no longer in the server's list
@@ -489,9 +725,53 @@ class AgarioGame {
                 this.minions.set(minionData.id, minionData);
             });
             
+            // Our own fleet size comes straight from the minions we can see
+            const myPlayer = this.players.get(this.myPlayerId);
+            if (myPlayer) {
+                let count = 0;
+                this.minions.forEach(minion => {
+                    if (minion.owner_id === this.myPlayerId) count++;
+                });
+                myPlayer.minion_count = count;
+            }
+            
             this.updateUI();
         });
         
+        this.socket.on('leaderboard', (data) => {
+            this.leaderboard = data.entries;
+            // Keep fleet sizes of ranked players current
+            data.entries.forEach(entry => {
+                const player = this.players.get(entry.id);
+                if (player && entry.id !== this.myPlayerId) {
+                    player.minion_count = entry.minion_count;
+                }
+            });
+            this.updateLeaderboard();
+        });
+        
+        this.socket.on('density', (data) => {
+            // Two bytes per cell, row by row: minion count and an index into colors
+            this.density = {
+                cols: data.cols,
+                rows: data.rows,
+                cellSize: data.cell_size,
+                colors: data.colors,
+                cells: new Uint8Array(data.cells),
+            };
+        });
+        
+        this.socket.on('player_reattached', (data) => {
+            // A player reconnected under a new id - move their fleet over
+            this.players.delete(data.old_id);
+            this.players.set(data.player.id, data.player);
+            this.minions.forEach(minion => {
+                if (minion.owner_id === data.old_id) {
+                    minion.owner_id = data.player.id;
+                }
+            });
+        });
+        
         this.socket.on('infection_happened', (data) => {
             console.log('Infection happened:', data);
             
@@ -560,6 +840,11 @@ class AgarioGame {
         
         this.socket.on('player_respawned', (data) => {
             console.log('Player respawned:', data);
+            const player = this.players.get(data.player_id);
+            if (player) {
+                player.name = data.player_name;
+                player.is_dead = false;
+            }
             
             // Clear ALL minions to ensure no ghost minions remain
             this.minions.clear();
@@ -582,6 +867,57 @@ class AgarioGame {
             }
         });
         
+        this.socket.on('session', (data) => {
+            sessionStorage.setItem('sessionToken', data.token);
+        });
+        
+        this.socket.on('session_resumed', (data) => {
+            // resume_delta or game_state follows and puts us back in the game
+            console.log('Resumed previous session');
+            this.myPlayerId = data.player_id;
+        });
+        
+        this.socket.on('resume_delta', (data) => {
+            // Only what changed while we were away: the roster, new or changed minions and removals.
+            // Positions of everything else arrive with the next snapshot.
+            this.players.clear();
+            data.players.forEach(player => {
+                this.players.set(player.id, player);
+            });
+            data.removed_minions.forEach(minionId => this.minions.delete(minionId));
+            data.changed_minions.forEach(minion => {
+                this.minions.set(minion.id, minion);
+            });
+            this.snapshots = [];
+            this.showGame();
+            this.updateUI();
+            
+            const myPlayer = this.players.get(this.myPlayerId);
+            if (myPlayer && myPlayer.minion_count === 0) {
+                this.showNameChangeModal(myPlayer.name, ' Your fleet was lost while you were away.');
+            }
+        });
+        
+        this.socket.on('resume_failed', () => {
+            sessionStorage.removeItem('sessionToken');
+            if (this.myPlayerId) {
+                // Held too long (or the server restarted) - start over from the menu
+                this.myPlayerId = null;
+                this.players.clear();
+                this.minions.clear();
+                this.snapshots = [];
+                document.getElementById('connectionStatus').textContent = 'Your fleet could not be recovered - join again!';
+                this.showMenu();
+            }
+        });
+        
+        this.socket.on('join_queued', (data) => {
+            // Server is busy - wait on the menu until a slot frees up (game_state will follow)
+            this.showMenu();
+            document.getElementById('joinButton').disabled = true;
+            document.getElementById('connectionStatus').textContent = `Server busy - you are #${data.position} in line...`;
+        });
+        
         this.socket.on('join_failed', (data) => {
             alert(data.message);
             document.getElementById('joinButton').disabled = false;
@@ -842,8 +1178,7 @@ class AgarioGame {
         const isInvulnerable = minion.is_invulnerable || false;
         
         // Check if owner has max fleet size
-        const owner = this.players.get(minion.owner_id);
-        const isAtMaxFleet = owner && owner.minion_count >= this.MAX_FLEET_SIZE;
+        const isAtMaxFleet = this.maxFleets.has(minion.owner_id);
         
         // Draw very subtle glow effect for own minions
         if (isMyMinion) {
@@ -981,6 +1316,23 @@ class AgarioGame {
         const scaleX = 148 / this.worldWidth;
         const scaleY = 110 / this.worldHeight;
         
+        // Whole-world density from the server; individual minions below are only drawn for our own fleet then
+        if (this.density) {
+            const { cols, rows, cellSize, colors, cells } = this.density;
+            for (let row = 0; row < rows; row++) {
+                for (let col = 0; col < cols; col++) {
+                    const index = (row * cols + col) * 2;
+                    const count = cells[index];
+                    if (count === 0) continue;
+                    this.minimapCtx.globalAlpha = 0.25 + 0.6 * Math.min(count / 10, 1);
+                    this.minimapCtx.fillStyle = colors[cells[index + 1]];
+                    this.minimapCtx.fillRect(col * cellSize * scaleX + 1, row * cellSize * scaleY + 1,
+                                             cellSize * scaleX, cellSize * scaleY);
+                }
+            }
+            this.minimapCtx.globalAlpha = 1.0;
+        }
+        
         // Cleanup: Only draw minions with valid owners and original names
         const validPlayerIds = new Set(Array.from(this.players.keys()));
         const validPlayerNames = new Set(Array.from(this.players.values()).map(p => p.name));
@@ -997,6 +1349,7 @@ class AgarioGame {
             const size = Math.max(2, minion.size * scaleX * 0.4);
             
             const isMyMinion = this.players.get(this.myPlayerId)?.id === minion.owner_id;
+            if (this.density && !isMyMinion) return;
             
             // Draw glow for my minions
             if (isMyMinion) {
@@ -1071,17 +1424,13 @@ class AgarioGame {
                 playerSizeElement.style.fontWeight = '';
             }
         }
-        this.updateLeaderboard();
     }
     
     updateLeaderboard() {
         const leaderboardList = document.getElementById('leaderboardList');
         
-        // Convert players Map to array, filter out dead players, and sort by minion count (descending)
-        const sortedPlayers = Array.from(this.players.values())
-            .filter(player => !player.is_dead) // Exclude dead players from leaderboard
-            .sort((a, b) => b.minion_count - a.minion_count)
-            .slice(0, 10); // Show top 10 players
+        // Already ranked (and limited to the top fleets) by the server
+        const sortedPlayers = this.leaderboard;
         
         // Clear current leaderboard
         leaderboardList.innerHTML = '';
@@ -1186,8 +1535,8 @@ class AgarioGame {
             // First change the name if it's different
             const currentPlayer = this.players.get(this.myPlayerId);
             if (currentPlayer && currentPlayer.name !== newName) {
-                // Clear current game state before respawning to prevent ghost minions
-                this.players.clear();
+                // Clear minions before respawning to prevent ghost minions (the roster
+                // stays - per-tick snapshots no longer resend it)
                 this.minions.clear();
                 
                 this.socket.emit('change_name', { name: newName });
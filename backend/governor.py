@@ -0,0 +1,107 @@
+from typing import Optional
+
+
+def build_levels(base_snapshot_rate: float):
+    """Degradation ladder, cheapest-to-notice first. Each level includes the ones before it.
+
+    1. Lower the snapshot rate (clients interpolate, so this is barely visible)
+    2. Shrink the area of interest, so each client only gets minions near its fleet
+    3. Compute separation forces against a subset of the fleet for big fleets
+    """
+    normal = {
+        'name': 'normal',
+        'snapshot_rate': base_snapshot_rate,
+        'aoi_radius': None,  # None = whole world
+        'separation_stride': 1,  # Compare against every Nth fleet mate
+    }
+    steps = [
+        ('snapshot_rate_15', {'snapshot_rate': min(base_snapshot_rate, 15)}),
+        ('snapshot_rate_10', {'snapshot_rate': min(base_snapshot_rate, 10)}),
+        ('aoi_2400', {'aoi_radius': 2400}),
+        ('aoi_1600', {'aoi_radius': 1600}),
+        ('separation_half', {'separation_stride': 2}),
+        ('separation_quarter', {'separation_stride': 4}),
+    ]
+    levels = [normal]
+    for name, changes in steps:
+        level = dict(levels[-1])
+        level.update(changes)
+        level['name'] = name
+        levels.append(level)
+    return levels
+
+
+class TickGovernor:
+    """Watches tick time against its budget and sheds load in a fixed order.
+
+    A smoothed tick time above ``high_water`` of the budget for
+    ``overload_ticks`` consecutive ticks steps one level down the ladder;
+    staying below ``low_water`` for ``recover_ticks`` steps one level back up.
+    The gap between the two watermarks (and the longer recovery window) is
+    the hysteresis that stops it flapping between levels.
+    """
+
+    def __init__(self, tick_budget: float, levels, high_water: float = 0.9,
+                 low_water: float = 0.5, overload_ticks: int = 30,
+                 recover_ticks: int = 180, smoothing: float = 0.1):
+        self.tick_budget = tick_budget
+        self.levels = levels
+        self.high_water = high_water
+        self.low_water = low_water
+        self.overload_ticks = overload_ticks
+        self.recover_ticks = recover_ticks
+        self.smoothing = smoothing
+        self.level = 0
+        self.tick_time_avg: Optional[float] = None
+        self.tick_time_max = 0.0
+        self._over_count = 0
+        self._under_count = 0
+        self.level_changes = 0
+
+    @property
+    def settings(self) -> dict:
+        return self.levels[self.level]
+
+    def record(self, tick_time: float):
+        """Feed the work time of one tick (seconds, excluding the sleep)."""
+        if self.tick_time_avg is None:
+            self.tick_time_avg = tick_time
+        else:
+            self.tick_time_avg += (tick_time - self.tick_time_avg) * self.smoothing
+        self.tick_time_max = max(self.tick_time_max, tick_time)
+
+        load = self.tick_time_avg / self.tick_budget
+        if load > self.high_water:
+            self._over_count += 1
+            self._under_count = 0
+            if self._over_count >= self.overload_ticks and self.level < len(self.levels) - 1:
+                self._set_level(self.level + 1, load)
+        elif load < self.low_water:
+            self._under_count += 1
+            self._over_count = 0
+            if self._under_count >= self.recover_ticks and self.level > 0:
+                self._set_level(self.level - 1, load)
+        else:
+            self._over_count = 0
+            self._under_count = 0
+
+    def _set_level(self, level: int, load: float):
+        direction = 'Degrading' if level > self.level else 'Recovering'
+        self.level = level
+        self.level_changes += 1
+        self._over_count = 0
+        self._under_count = 0
+        print(f'{direction} to level {level} ({self.settings["name"]}): '
+              f'tick time at {load * 100:.0f}% of budget')
+
+    def stats(self) -> dict:
+        """Summary for the /test status endpoint."""
+        return {
+            'level': self.level,
+            'level_name': self.settings['name'],
+            'settings': self.settings,
+            'tick_budget_ms': self.tick_budget * 1000,
+            'tick_time_avg_ms': (self.tick_time_avg or 0.0) * 1000,
+            'tick_time_max_ms': self.tick_time_max * 1000,
+            'level_changes': self.level_changes,
+        }
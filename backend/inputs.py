@@ -0,0 +1,145 @@
+import json
+import math
+import struct
+import time
+from typing import Optional
+
+# Compact binary input packet sent straight over Engine.IO:
+# magic byte, sequence number, dx, dy (little-endian, 9 bytes)
+BINARY_INPUT_MAGIC = 0x4D  # 'M'
+BINARY_INPUT_FORMAT = struct.Struct('<BIhh')
+
+# Text form of a move_player event on the default namespace, as Socket.IO encodes it
+MOVE_EVENT_PREFIX = '2["move_player",'
+
+
+def sequence_number(value) -> Optional[int]:
+    """A client-supplied sequence number, or None if it isn't a plain int."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    return None
+
+
+def direction_component(value) -> Optional[float]:
+    """A client-supplied dx or dy as a finite float, or None if it isn't one."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+def decode_move_packet(data):
+    """Decode a raw Engine.IO message if it is movement input.
+
+    Returns ``(dx, dy, seq)`` for a move_player event or binary input packet,
+    and None for anything else so it can go through normal Socket.IO dispatch.
+    """
+    if isinstance(data, str):
+        if not data.startswith(MOVE_EVENT_PREFIX):
+            return None
+        try:
+            payload = json.loads(data[1:])[1]
+            dx = direction_component(payload.get('dx', 0))
+            dy = direction_component(payload.get('dy', 0))
+            seq = sequence_number(payload.get('seq'))
+        except (ValueError, TypeError, AttributeError, IndexError):
+            return None
+        if dx is None or dy is None:
+            return None
+        return dx, dy, seq
+    if isinstance(data, (bytes, bytearray)) and len(data) == BINARY_INPUT_FORMAT.size \
+            and data[0] == BINARY_INPUT_MAGIC:
+        _, seq, dx, dy = BINARY_INPUT_FORMAT.unpack(data)
+        return float(dx), float(dy), seq
+    return None
+
+
+class InputCoalescer:
+    """Newest-wins buffer for per-client movement input.
+
+    Inputs are stored as they arrive and applied to players once per tick, so
+    only the newest input per client per tick takes effect. Each client has a
+    token bucket limiting how many inputs per second are accepted, and inputs
+    with a sequence number older than one already accepted are discarded, as
+    are inputs whose direction isn't a pair of finite numbers.
+    """
+
+    def __init__(self, max_inputs_per_second: float = 60.0, burst: float = 20.0):
+        self.max_inputs_per_second = max_inputs_per_second
+        self.burst = burst
+        self.pending = {}  # sid -> (dx, dy)
+        self.last_seq = {}  # sid -> newest accepted sequence number
+        self.buckets = {}  # sid -> [tokens, last_refill_time]
+        self.received = 0
+        self.applied = 0
+        self.coalesced = 0
+        self.rate_limited = 0
+        self.out_of_order = 0
+        self.malformed = 0
+
+    def offer(self, sid: str, dx: float, dy: float, seq: Optional[int] = None,
+              now: Optional[float] = None) -> bool:
+        """Record an input for ``sid``; returns False if it was dropped."""
+        self.received += 1
+        dx = direction_component(dx)
+        dy = direction_component(dy)
+        if dx is None or dy is None:
+            self.malformed += 1
+            return False
+        if now is None:
+            now = time.monotonic()
+
+        bucket = self.buckets.get(sid)
+        if bucket is None:
+            bucket = self.buckets[sid] = [self.burst, now]
+        bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.max_inputs_per_second)
+        bucket[1] = now
+        if bucket[0] < 1:
+            self.rate_limited += 1
+            return False
+        bucket[0] -= 1
+
+        if seq is not None:
+            last = self.last_seq.get(sid)
+            if last is not None and seq <= last:
+                self.out_of_order += 1
+                return False
+            self.last_seq[sid] = seq
+
+        if sid in self.pending:
+            self.coalesced += 1
+        self.pending[sid] = (dx, dy)
+        return True
+
+    def apply(self, players: dict) -> int:
+        """Write the newest pending input into each player; called once per tick."""
+        if not self.pending:
+            return 0
+        applied = 0
+        for sid, (dx, dy) in self.pending.items():
+            player = players.get(sid)
+            if player is not None:
+                player.direction_dx = dx
+                player.direction_dy = dy
+                applied += 1
+        self.pending.clear()
+        self.applied += applied
+        return applied
+
+    def remove_client(self, sid: str):
+        self.pending.pop(sid, None)
+        self.last_seq.pop(sid, None)
+        self.buckets.pop(sid, None)
+
+    def stats(self) -> dict:
+        """Counters for the /test status endpoint."""
+        return {
+            'received': self.received,
+            'applied': self.applied,
+            'coalesced': self.coalesced,
+            'rate_limited': self.rate_limited,
+            'out_of_order': self.out_of_order,
+            'malformed': self.malformed,
+            'max_inputs_per_second': self.max_inputs_per_second,
+        }
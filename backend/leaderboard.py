@@ -0,0 +1,124 @@
+import heapq
+from typing import Optional
+
+
+class Leaderboard:
+    """Fleet size per player with an incrementally maintained top-K ranking.
+
+    Counts change only through ``add``/``remove``/``adjust`` (joins, leaves
+    and infections) or a ``sync`` after bulk cleanups, never per tick. A
+    change to a player outside the top K that doesn't beat the K-th entry
+    costs O(1); anything else re-selects the top K. Players without minions
+    are left off the board, and ties keep join order.
+    """
+
+    def __init__(self, size: int = 10):
+        self.size = size
+        self.counts = {}  # player id -> minion count
+        self.names = {}  # player id -> name
+        self.join_order = {}  # player id -> sequence number, for stable ties
+        self._next_join = 0
+        self.top = []  # player ids, best first
+        self._broadcast = None  # entries as last handed out by take_update()
+        self._dirty = False  # Something changed since the last take_update()
+        self.reranks = 0
+
+    def _key(self, player_id):
+        return self.counts[player_id], -self.join_order[player_id]
+
+    def _rerank(self):
+        ranked = [player_id for player_id, count in self.counts.items() if count > 0]
+        self.top = heapq.nlargest(self.size, ranked, key=self._key)
+        self.reranks += 1
+
+    def _changed(self, player_id):
+        self._dirty = True
+        if player_id in self.top or len(self.top) < self.size:
+            self._rerank()
+        elif self.counts.get(player_id, 0) > 0 and self._key(player_id) > self._key(self.top[-1]):
+            self._rerank()
+
+    def add(self, player_id: str, name: str, count: int):
+        self.counts[player_id] = count
+        self.names[player_id] = name
+        self.join_order[player_id] = self._next_join
+        self._next_join += 1
+        self._changed(player_id)
+
+    def remove(self, player_id: str):
+        if player_id not in self.counts:
+            return
+        del self.counts[player_id]
+        del self.names[player_id]
+        del self.join_order[player_id]
+        self._dirty = True
+        if player_id in self.top:
+            self._rerank()
+
+    def adjust(self, player_id: str, delta: int):
+        """A player's fleet gained or lost ``delta`` minions."""
+        if player_id not in self.counts:
+            return
+        self.counts[player_id] += delta
+        self._changed(player_id)
+
+    def rename(self, player_id: str, name: str):
+        if player_id in self.names:
+            self.names[player_id] = name
+            self._dirty = True
+
+    def rekey(self, old_id: str, new_id: str):
+        """A player moved to a new socket id (session resume)."""
+        if old_id not in self.counts:
+            return
+        self.counts[new_id] = self.counts.pop(old_id)
+        self.names[new_id] = self.names.pop(old_id)
+        self.join_order[new_id] = self.join_order.pop(old_id)
+        self.top = [new_id if player_id == old_id else player_id for player_id in self.top]
+        self._dirty = True
+
+    def sync(self, players: dict, minions: dict):
+        """Recount every fleet from scratch, after cleanups that touch many fleets at once."""
+        counts = dict.fromkeys(players, 0)
+        for minion in minions.values():
+            if minion.owner_id in counts:
+                counts[minion.owner_id] += 1
+        for player_id, player in players.items():
+            if player_id not in self.counts:
+                self.join_order[player_id] = self._next_join
+                self._next_join += 1
+            self.names[player_id] = player.name
+        for player_id in list(self.counts):
+            if player_id not in counts:
+                del self.names[player_id]
+                del self.join_order[player_id]
+        self.counts = counts
+        self._dirty = True
+        self._rerank()
+
+    def entries(self) -> list:
+        return [{'id': player_id, 'name': self.names[player_id], 'minion_count': self.counts[player_id]}
+                for player_id in self.top]
+
+    def at_least(self, count: int) -> list:
+        """Ids of every player (ranked or not) with ``count`` or more minions."""
+        return [player_id for player_id, player_count in self.counts.items() if player_count >= count]
+
+    def take_update(self) -> Optional[dict]:
+        """The ranking to broadcast, or None if it hasn't changed since the last one."""
+        if not self._dirty:
+            return None
+        self._dirty = False
+        entries = self.entries()
+        if entries == self._broadcast:
+            return None
+        self._broadcast = entries
+        return {'entries': entries}
+
+    def stats(self) -> dict:
+        """Counters for the /test status endpoint."""
+        return {
+            'players': len(self.counts),
+            'size': self.size,
+            'reranks': self.reranks,
+        }
@@ -0,0 +1,159 @@
+import abc
+import os
+import random
+import re
+import threading
+import time
+
+
+class ModelError(Exception):
+    """The model call failed (server error, timeout...)."""
+
+
+class RateLimitError(ModelError):
+    """The model API refused the call because of its rate limit (HTTP 429)."""
+
+
+class ModelBackend(abc.ABC):
+    """What AICollisionResolver needs from a language model: prompt in, text out.
+
+    ``generate`` is a blocking call; the resolver runs it in an executor
+    thread, so implementations must be thread-safe.
+    """
+
+    name = 'base'
+
+    @abc.abstractmethod
+    def generate(self, prompt: str) -> str:
+        """The model's reply to ``prompt``; raises if the call fails."""
+
+    def stats(self) -> dict:
+        return {'backend': self.name}
+
+
+def parse_latency(spec: str):
+    """Turn a latency spec into ``sample(rng) -> seconds``.
+
+    - ``fixed:S`` - always S seconds
+    - ``uniform:LO:HI`` - anywhere between LO and HI
+    - ``lognormal:MEDIAN:SIGMA`` - long-tailed, like real API latencies
+    """
+    kind, *args = spec.split(':')
+    values = [float(arg) for arg in args]
+    if kind == 'fixed' and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == 'uniform' and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == 'lognormal' and len(values) == 2:
+        median, sigma = values
+        return lambda rng: rng.lognormvariate(0.0, sigma) * median
+    raise ValueError(f'Bad latency spec {spec!r} (use fixed:S, uniform:LO:HI or lognormal:MEDIAN:SIGMA)')
+
+
+_WINNER_PROMPT = re.compile(r'Which is stronger, "(.*)" or "(.*)"\?')
+_NAME_PROMPT = re.compile(r'Is the name "(.*)" appropriate')
+
+
+class FakeBackend(ModelBackend):
+    """In-process stand-in for the Gemini API, for driving the AI path under load.
+
+    Answers the game's two prompts the way the real model is asked to (a
+    winner's name, or APPROPRIATE/INAPPROPRIATE) after a sleep drawn from
+    ``latency``. A share of calls can instead fail (``error_rate``), come
+    back malformed (``malformed_rate``) or be refused with a 429 once more
+    than ``rate_limit`` calls per second arrive (0 = no limit).
+    """
+
+    name = 'fake'
+
+    def __init__(self, latency: str = 'lognormal:0.4:0.5', error_rate: float = 0.0,
+                 malformed_rate: float = 0.0, rate_limit: float = 0.0, seed=None):
+        self.latency_spec = latency
+        self.sample_latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.rate_limit = rate_limit
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()  # generate() runs on executor threads
+        self._tokens = rate_limit
+        self._refilled_at = time.monotonic()
+        self.calls = 0
+        self.errors = 0
+        self.malformed = 0
+        self.rate_limited = 0
+
+    @classmethod
+    def from_env(cls):
+        seed = os.environ.get('FAKE_AI_SEED')
+        return cls(
+            latency=os.environ.get('FAKE_AI_LATENCY', 'lognormal:0.4:0.5'),
+            error_rate=float(os.environ.get('FAKE_AI_ERROR_RATE', 0)),
+            malformed_rate=float(os.environ.get('FAKE_AI_MALFORMED_RATE', 0)),
+            rate_limit=float(os.environ.get('FAKE_AI_RATE_LIMIT', 0)),
+            seed=int(seed) if seed else None,
+        )
+
+    def _take_token(self) -> bool:
+        """Token bucket holding up to one second's worth of calls."""
+        if not self.rate_limit:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.rate_limit, self._tokens + (now - self._refilled_at) * self.rate_limit)
+        self._refilled_at = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def generate(self, prompt: str) -> str:
+        with self.lock:
+            self.calls += 1
+            if not self._take_token():
+                self.rate_limited += 1
+                raise RateLimitError('429 Resource has been exhausted (e.g. check quota).')
+            delay = self.sample_latency(self.rng)
+            roll = self.rng.random()
+            pick = self.rng.random()
+        time.sleep(delay)
+
+        if roll < self.error_rate:
+            with self.lock:
+                self.errors += 1
+            raise ModelError('503 The model is overloaded. Please try again later.')
+        if roll < self.error_rate + self.malformed_rate:
+            with self.lock:
+                self.malformed += 1
+            return self._malformed(prompt, pick)
+        return self._answer(prompt, pick)
+
+    @staticmethod
+    def _answer(prompt: str, pick: float) -> str:
+        match = _WINNER_PROMPT.search(prompt)
+        if match:
+            return match.group(1) if pick < 0.5 else match.group(2)
+        if _NAME_PROMPT.search(prompt):
+            return 'APPROPRIATE'
+        return 'OK'
+
+    @staticmethod
+    def _malformed(prompt: str, pick: float) -> str:
+        match = _WINNER_PROMPT.search(prompt) or _NAME_PROMPT.search(prompt)
+        subject = match.group(1) if match else ''
+        answers = [
+            '',
+            f'**{subject}**',
+            f'The winner is {subject}!',
+            'Both names are equally strong.',
+            'APPROPRIATE, because it is a friendly name.',
+        ]
+        return answers[int(pick * len(answers))]
+
+    def stats(self) -> dict:
+        return {
+            'backend': self.name,
+            'latency': self.latency_spec,
+            'calls': self.calls,
+            'errors': self.errors,
+            'malformed': self.malformed,
+            'rate_limited': self.rate_limited,
+        }
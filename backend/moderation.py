@@ -0,0 +1,222 @@
+import os
+import time
+import unicodedata
+from collections import deque
+
+# Letters from other scripts that render like Latin ones
+CONFUSABLES = str.maketrans({
+    # Cyrillic
+    'а': 'a', 'в': 'b', 'е': 'e', 'ё': 'e', 'з': '3', 'і': 'i', 'ї': 'i', 'ј': 'j', 'к': 'k',
+    'м': 'm', 'н': 'h', 'о': 'o', 'р': 'p', 'с': 'c', 'т': 't', 'у': 'y', 'х': 'x', 'ѕ': 's',
+    'ԁ': 'd', 'ɡ': 'g', 'ս': 'u', 'ո': 'n',
+    # Greek
+    'α': 'a', 'β': 'b', 'ε': 'e', 'η': 'n', 'ι': 'i', 'κ': 'k', 'ν': 'v', 'ο': 'o', 'ρ': 'p',
+    'τ': 't', 'υ': 'u', 'χ': 'x', 'ω': 'w',
+    # Latin letters NFKD leaves alone
+    'ƒ': 'f', 'ł': 'l', 'ø': 'o', 'đ': 'd', 'ı': 'i', 'ß': 'ss',
+})
+
+# Digits and symbols commonly standing in for letters
+LEETSPEAK = str.maketrans({
+    '0': 'o', '1': 'i', '3': 'e', '4': 'a', '5': 's', '6': 'g', '7': 't', '8': 'b',
+    '9': 'g', '@': 'a', '$': 's', '!': 'i', '|': 'l', '+': 't', '€': 'e', '£': 'l', '¡': 'i',
+})
+
+# Repeated-letter matching ("fuuuck") only for terms still this long once runs are collapsed
+MIN_COLLAPSED_TERM = 4
+
+DEFAULT_BLOCKLIST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'name_blocklist.txt')
+DEFAULT_ALLOWLIST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'name_allowlist.txt')
+
+
+def load_word_list(path: str) -> list:
+    """One term per line; blank lines and # comments are ignored."""
+    with open(path, encoding='utf-8') as f:
+        return [line.split('#', 1)[0].strip() for line in f if line.split('#', 1)[0].strip()]
+
+
+def normalize_words(text: str) -> list:
+    """Fold a name down to plain a-z words.
+
+    Compatibility forms (fullwidth, math alphanumerics) are unified, accents
+    dropped, lookalike letters and leetspeak mapped to Latin letters, and
+    everything else treated as a word separator.
+    """
+    text = unicodedata.normalize('NFKD', unicodedata.normalize('NFKC', text).casefold())
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    text = text.translate(CONFUSABLES).translate(LEETSPEAK)
+    words = []
+    current = []
+    for ch in text:
+        if 'a' <= ch <= 'z':
+            current.append(ch)
+        elif current:
+            words.append(''.join(current))
+            current = []
+    if current:
+        words.append(''.join(current))
+    return words
+
+
+def collapse_runs(text: str) -> str:
+    """'fuuuck' -> 'fuck'."""
+    return ''.join(ch for i, ch in enumerate(text) if i == 0 or ch != text[i - 1])
+
+
+def _join_words(words):
+    """Concatenate words (so 'f.u.c.k' scans as one) and remember which word each letter came from."""
+    owners = []
+    for index, word in enumerate(words):
+        owners.extend([index] * len(word))
+    return ''.join(words), owners
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: finds every occurrence of every term in one pass over the text."""
+
+    def __init__(self, terms):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]  # state -> lengths of the terms ending here
+        for term in terms:
+            state = 0
+            for ch in term:
+                next_state = self.goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][ch] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = next_state
+            self.output[state].append(len(term))
+
+        # Breadth-first fail links; each state inherits the outputs of its fail state
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(ch, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def find(self, text: str):
+        """Yield ``(start, end)`` for every match."""
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for index, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length in output[state]:
+                yield index + 1 - length, index + 1
+
+
+class NameFilter:
+    """Local first stage of name moderation, ahead of the AI check.
+
+    ``check`` returns one of:
+
+    - ``'reject'``: a word, or the whole name run together ("f u c k"), is
+      exactly a blocklisted term (repeated letters collapsed or not).
+    - ``'accept'``: every word is on the allowlist (blocklisted terms inside
+      an allowlisted word, like "ass" in "assassin", don't count).
+    - ``'escalate'``: anything else. That includes blocklisted terms found
+      only inside a longer word or across words - plenty of innocent words
+      ("grapes", "analyze", "skyscraper") contain one - which are left to
+      the AI.
+    """
+
+    def __init__(self, blocklist, allowlist):
+        self.allowlist = {word for term in allowlist for word in normalize_words(term)}
+        self.terms = {''.join(normalize_words(term)) for term in blocklist} - {''}
+        self.collapsed_terms = {collapse_runs(term) for term in self.terms
+                                if len(collapse_runs(term)) >= MIN_COLLAPSED_TERM}
+        self.matcher = AhoCorasick(self.terms)
+        self.collapsed_matcher = AhoCorasick(self.collapsed_terms)
+        self.checked = 0
+        self.rejected = 0
+        self.accepted = 0
+        self.escalated = 0
+        self.ai_rejected = 0
+        self.ai_failed = 0
+        self.check_time = 0.0
+
+    @classmethod
+    def from_files(cls, blocklist_path: str = DEFAULT_BLOCKLIST_PATH,
+                   allowlist_path: str = DEFAULT_ALLOWLIST_PATH):
+        return cls(load_word_list(blocklist_path), load_word_list(allowlist_path))
+
+    def _is_blocked(self, text: str) -> bool:
+        """``text`` is exactly a blocklisted term."""
+        return text in self.terms or collapse_runs(text) in self.collapsed_terms
+
+    def _uncertain(self, matcher, scanned, words) -> bool:
+        """Whether a blocklisted term turns up in ``scanned`` across words, or inside a word whose
+        original form (from ``words``) isn't allowlisted."""
+        text, owners = _join_words(scanned)
+        for start, end in matcher.find(text):
+            touched = set(owners[start:end])
+            if len(touched) > 1:
+                return True
+            word = words[owners[start]]
+            if word not in self.allowlist and collapse_runs(word) not in self.allowlist:
+                return True
+        return False
+
+    def classify(self, name: str) -> str:
+        words = normalize_words(name)
+        if not words:
+            return 'escalate'
+        candidates = [word for word in words if word not in self.allowlist]
+        if len(words) > 1:
+            candidates.append(''.join(words))
+        if any(self._is_blocked(candidate) for candidate in candidates):
+            return 'reject'
+
+        collapsed_words = [collapse_runs(word) for word in words]
+        if (self._uncertain(self.matcher, words, words)
+                or self._uncertain(self.collapsed_matcher, collapsed_words, words)):
+            return 'escalate'
+        if all(word in self.allowlist for word in words):
+            return 'accept'
+        return 'escalate'
+
+    def check(self, name: str) -> str:
+        """Classify ``name`` and count the outcome."""
+        started = time.perf_counter()
+        verdict = self.classify(name)
+        self.check_time += time.perf_counter() - started
+        self.checked += 1
+        if verdict == 'reject':
+            self.rejected += 1
+        elif verdict == 'accept':
+            self.accepted += 1
+        else:
+            self.escalated += 1
+        return verdict
+
+    def record_ai_verdict(self, appropriate):
+        """Outcome of an escalated check: True/False, or None if the AI couldn't answer."""
+        if appropriate is None:
+            self.ai_failed += 1
+        elif not appropriate:
+            self.ai_rejected += 1
+
+    def stats(self) -> dict:
+        """Counters and rates for the /test status endpoint."""
+        checked = max(self.checked, 1)
+        return {
+            'checked': self.checked,
+            'rejected_locally': self.rejected,
+            'accepted_locally': self.accepted,
+            'escalated': self.escalated,
+            'ai_rejected': self.ai_rejected,
+            'ai_failed': self.ai_failed,
+            'local_hit_rate': round((self.rejected + self.accepted) / checked, 3),
+            'escalation_rate': round(self.escalated / checked, 3),
+            'avg_check_us': round(self.check_time / checked * 1e6, 1),
+        }
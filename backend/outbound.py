@@ -0,0 +1,245 @@
+import json
+import time
+from collections import deque
+from typing import Optional
+
+from engineio import packet as eio_packet
+from socketio import packet as sio_packet
+
+
+class PreEncodedJSON:
+    """A payload that has already been serialized to a JSON string.
+
+    Queued as-is so builders that cache per-entity encodings (see snapshot.py)
+    don't have their work redone by ``json.dumps`` in the packet encoder.
+    """
+
+    __slots__ = ('json',)
+
+    def __init__(self, json_text: str):
+        self.json = json_text
+
+    def with_fields(self, **fields) -> 'PreEncodedJSON':
+        """Return a copy with extra top-level keys prepended to the object."""
+        if not fields:
+            return self
+        extra = json.dumps(fields, separators=(',', ':'))[1:-1]
+        rest = self.json[1:]
+        return PreEncodedJSON('{' + extra + (',' + rest if rest != '}' else '}'))
+
+
+class ClientSendQueue:
+    """Outbound buffer for a single client.
+
+    Everything goes out in the order it was queued. Snapshots (position
+    updates, the density grid - anything self-contained that the next one
+    supersedes) are latest-wins per event: a newer snapshot replaces any
+    snapshot of the same event that has not been handed to the transport yet
+    (and takes its place at the back of the queue, after any events queued
+    since). Reliable events (joins, infections, eliminations...) are never
+    dropped.
+    """
+
+    def __init__(self, sid: str):
+        self.sid = sid
+        self.pending = deque()  # (eio_packets, nbytes) in emit order, snapshots included
+        self.snapshots = {}  # event -> its pending snapshot's entry
+        self.buffered_bytes = 0
+        self.over_limit_since: Optional[float] = None
+        self.snapshots_sent = 0
+        self.snapshots_replaced = 0
+
+    def put_snapshot(self, event: str, encoded):
+        previous = self.snapshots.get(event)
+        if previous is not None:
+            if self.pending[-1] is previous:
+                self.pending.pop()
+            else:
+                # Events queued after it still go first; the new snapshot follows them
+                self.pending.remove(previous)
+            self.buffered_bytes -= previous[1]
+            self.snapshots_replaced += 1
+        self.snapshots[event] = encoded
+        self.pending.append(encoded)
+        self.buffered_bytes += encoded[1]
+
+    def put_reliable(self, encoded):
+        self.pending.append(encoded)
+        self.buffered_bytes += encoded[1]
+
+    def take_pending(self):
+        """Pop everything that is queued, in order."""
+        pending = list(self.pending)
+        self.pending.clear()
+        self.snapshots_sent += len(self.snapshots)
+        self.snapshots.clear()
+        self.buffered_bytes = 0
+        return pending
+
+
+class OutboundQueues:
+    """Per-client send queues with backpressure for the Socket.IO server.
+
+    Game code queues events here instead of awaiting ``sio.emit`` for every
+    client. Each payload is encoded once, and ``flush()`` (called once per tick)
+    only hands packets to a client's Engine.IO transport once that transport
+    has drained what it was given last time. A slow client therefore only ever
+    holds the newest snapshot of each kind plus its backlog of reliable events; if that
+    backlog stays over ``max_buffered_bytes`` for ``evict_after`` seconds the
+    client is disconnected.
+    """
+
+    def __init__(self, sio, max_buffered_bytes: int = 1_000_000,
+                 evict_after: float = 5.0, namespace: str = '/'):
+        self.sio = sio
+        self.max_buffered_bytes = max_buffered_bytes
+        self.evict_after = evict_after
+        self.namespace = namespace
+        self.queues = {}
+        self.evicted_count = 0
+        self.deferred_flushes = 0
+        self.bytes_sent = 0  # Total handed to transports, for bandwidth-based admission
+        self.broadcast_skips = 0  # Room broadcasts not sent to a member that was still busy
+
+    def add_client(self, sid: str):
+        self.queues[sid] = ClientSendQueue(sid)
+
+    def remove_client(self, sid: str):
+        self.queues.pop(sid, None)
+
+    def _encode(self, event: str, data):
+        """Encode a Socket.IO event once so it can be shared by every recipient."""
+        if isinstance(data, PreEncodedJSON):
+            encoded = self._encode_raw(event, data)
+            return [eio_packet.Packet(eio_packet.MESSAGE, encoded)], len(encoded)
+        pkt = self.sio.packet_class(sio_packet.EVENT, namespace=self.namespace,
+                                    data=[event, data])
+        encoded = pkt.encode()
+        if not isinstance(encoded, list):
+            encoded = [encoded]
+        eio_packets = [eio_packet.Packet(eio_packet.MESSAGE, p) for p in encoded]
+        nbytes = sum(len(p) for p in encoded)
+        return eio_packets, nbytes
+
+    def _encode_raw(self, event: str, data: PreEncodedJSON) -> str:
+        """Frame a pre-encoded payload the same way ``Packet.encode`` would."""
+        prefix = str(sio_packet.EVENT)
+        if self.namespace != '/':
+            prefix += self.namespace + ','
+        return f'{prefix}[{json.dumps(event)},{data.json}]'
+
+    def _recipients(self, to=None, skip_sid=None):
+        if to is not None:
+            queue = self.queues.get(to)
+            return [queue] if queue else []
+        if skip_sid is None or isinstance(skip_sid, str):
+            return [q for sid, q in self.queues.items() if sid != skip_sid]
+        return [q for sid, q in self.queues.items() if sid not in skip_sid]
+
+    def queue_snapshot(self, event: str, data, to=None, skip_sid=None):
+        """Queue a self-contained state update, replacing any unsent ``event`` snapshot per client."""
+        recipients = self._recipients(to, skip_sid)
+        if not recipients:
+            return
+        encoded = self._encode(event, data)
+        for queue in recipients:
+            queue.put_snapshot(event, encoded)
+
+    def queue_reliable(self, event: str, data, to=None, skip_sid=None):
+        """Queue an event that must be delivered, in order, to each recipient."""
+        recipients = self._recipients(to, skip_sid)
+        if not recipients:
+            return
+        encoded = self._encode(event, data)
+        for queue in recipients:
+            queue.put_reliable(encoded)
+
+    async def broadcast(self, event: str, data, room: str) -> int:
+        """Send one payload to every member of a Socket.IO ``room``, encoded once.
+
+        Room members have no send queue here: the payload goes straight to
+        each member whose transport has drained the previous one, and
+        members that are still busy skip it. Only for self-contained,
+        replaceable payloads (like spectator frames). Returns how many
+        members it was sent to.
+        """
+        members = list(self.sio.manager.get_participants(self.namespace, room))
+        if not members:
+            return 0
+        eio_packets, nbytes = self._encode(event, data)
+        sent = 0
+        for _, eio_sid in members:
+            socket = self.sio.eio.sockets.get(eio_sid)
+            if socket is None:
+                continue
+            if socket.queue.qsize() > 0:
+                self.broadcast_skips += 1
+                continue
+            for p in eio_packets:
+                await self.sio.eio.send_packet(eio_sid, p)
+            self.bytes_sent += nbytes
+            sent += 1
+        return sent
+
+    def _transport_backlog(self, sid: str) -> int:
+        """Number of packets still waiting in the client's Engine.IO queue."""
+        eio_sid = self.sio.manager.eio_sid_from_sid(sid, self.namespace)
+        socket = self.sio.eio.sockets.get(eio_sid) if eio_sid else None
+        if socket is None:
+            return 0
+        return socket.queue.qsize()
+
+    async def flush(self):
+        """Hand queued packets to every client whose transport is ready."""
+        current_time = time.time()
+        to_evict = []
+
+        for sid, queue in list(self.queues.items()):
+            if not queue.pending:
+                queue.over_limit_since = None
+                continue
+
+            if self._transport_backlog(sid) > 0:
+                # Client hasn't drained the last flush yet - keep buffering here
+                self.deferred_flushes += 1
+                if queue.buffered_bytes > self.max_buffered_bytes:
+                    if queue.over_limit_since is None:
+                        queue.over_limit_since = current_time
+                    elif current_time - queue.over_limit_since >= self.evict_after:
+                        to_evict.append(sid)
+                else:
+                    queue.over_limit_since = None
+                continue
+
+            queue.over_limit_since = None
+            eio_sid = self.sio.manager.eio_sid_from_sid(sid, self.namespace)
+            if eio_sid is None:
+                continue
+            for eio_packets, nbytes in queue.take_pending():
+                self.bytes_sent += nbytes
+                for p in eio_packets:
+                    await self.sio.eio.send_packet(eio_sid, p)
+
+        for sid in to_evict:
+            queue = self.queues.pop(sid, None)
+            if queue is None:
+                continue
+            self.evicted_count += 1
+            print(f'Evicting slow client {sid}: {queue.buffered_bytes} bytes buffered '
+                  f'for over {self.evict_after}s')
+            await self.sio.disconnect(sid)
+
+    def stats(self) -> dict:
+        """Summary for the /test status endpoint."""
+        buffered = [q.buffered_bytes for q in self.queues.values()]
+        return {
+            'clients': len(self.queues),
+            'buffered_bytes_total': sum(buffered),
+            'buffered_bytes_max': max(buffered, default=0),
+            'max_buffered_bytes': self.max_buffered_bytes,
+            'snapshots_replaced': sum(q.snapshots_replaced for q in self.queues.values()),
+            'deferred_flushes': self.deferred_flushes,
+            'evicted_clients': self.evicted_count,
+            'bytes_sent': self.bytes_sent,
+            'broadcast_skips': self.broadcast_skips,
+        }
@@ -0,0 +1,149 @@
+import mmap
+import os
+import struct
+import time
+
+# Binary world image, little-endian:
+#   header | string table | players | minions | collision cooldowns
+# Every string (ids, names, colors, session tokens) is stored once in the
+# table and referenced by index. Timers are stored relative to the save time
+# so invulnerability and cooldowns resume where they left off.
+WORLD_MAGIC = b'IMW1'
+WORLD_VERSION = 2
+HEADER = struct.Struct('<4sHdQIIII')  # magic, version, saved_at, tick, strings, players, minions, cooldowns
+STRING_LEN = struct.Struct('<I')  # Byte length of each string; names grow with every adjective picked up
+STRING_LENS = {1: struct.Struct('<H'), WORLD_VERSION: STRING_LEN}  # Version 1 images still load
+PLAYER = struct.Struct('<IIIIdd')  # id, name, color, session_token, direction_dx, direction_dy
+MINION = struct.Struct('<IIIIddddd')  # id, original_name, owner_id, color, x, y, size, last_infection, can_infect_after
+COOLDOWN = struct.Struct('<Id')  # key, time
+
+
+class _StringTable:
+    def __init__(self):
+        self.index = {}
+        self.strings = []
+
+    def ref(self, value: str) -> int:
+        idx = self.index.get(value)
+        if idx is None:
+            idx = self.index[value] = len(self.strings)
+            self.strings.append(value)
+        return idx
+
+    def encode(self) -> bytes:
+        parts = []
+        for value in self.strings:
+            data = value.encode('utf-8')
+            parts.append(STRING_LEN.pack(len(data)))
+            parts.append(data)
+        return b''.join(parts)
+
+
+def encode_world(players: dict, minions: dict, collision_cooldowns: dict, tick: int,
+                 saved_at=None) -> bytes:
+    """Serialize the arena (players, minions, ownership, timers, cooldowns) to bytes."""
+    if saved_at is None:
+        saved_at = time.time()
+    strings = _StringTable()
+
+    player_data = bytearray()
+    for player in players.values():
+        player_data += PLAYER.pack(
+            strings.ref(player.id), strings.ref(player.name), strings.ref(player.color),
+            strings.ref(player.session_token),
+            float(player.direction_dx), float(player.direction_dy),
+        )
+
+    minion_data = bytearray()
+    for minion in minions.values():
+        minion_data += MINION.pack(
+            strings.ref(minion.id), strings.ref(minion.original_name),
+            strings.ref(minion.owner_id), strings.ref(minion.color),
+            minion.x, minion.y, float(minion.size),
+            minion.last_infection_time - saved_at, minion.can_infect_after - saved_at,
+        )
+
+    cooldown_data = bytearray()
+    for key, when in collision_cooldowns.items():
+        cooldown_data += COOLDOWN.pack(strings.ref(key), when - saved_at)
+
+    string_data = strings.encode()
+    header = HEADER.pack(WORLD_MAGIC, WORLD_VERSION, saved_at, tick, len(strings.strings),
+                         len(players), len(minions), len(collision_cooldowns))
+    return b''.join([header, string_data, bytes(player_data), bytes(minion_data), bytes(cooldown_data)])
+
+
+def decode_world(buffer, now=None) -> dict:
+    """Parse a world image from any buffer (bytes or an mmap) into plain records.
+
+    Timers come back as absolute times rebased on ``now``.
+    """
+    if now is None:
+        now = time.time()
+    magic, version, saved_at, tick, n_strings, n_players, n_minions, n_cooldowns = \
+        HEADER.unpack_from(buffer, 0)
+    if magic != WORLD_MAGIC or version not in STRING_LENS:
+        raise ValueError(f'Not a world image (magic={magic!r}, version={version})')
+    string_len = STRING_LENS[version]
+
+    view = memoryview(buffer)
+    offset = HEADER.size
+    strings = []
+    for _ in range(n_strings):
+        (length,) = string_len.unpack_from(buffer, offset)
+        offset += string_len.size
+        strings.append(str(view[offset:offset + length], 'utf-8'))
+        offset += length
+
+    end = offset + PLAYER.size * n_players
+    players = [
+        {
+            'id': strings[pid], 'name': strings[name], 'color': strings[color],
+            'session_token': strings[token], 'direction_dx': dx, 'direction_dy': dy,
+        }
+        for pid, name, color, token, dx, dy in PLAYER.iter_unpack(view[offset:end])
+    ]
+    offset = end
+
+    end = offset + MINION.size * n_minions
+    minions = [
+        {
+            'id': strings[mid], 'original_name': strings[name], 'owner_id': strings[owner],
+            'color': strings[color], 'x': x, 'y': y, 'size': size,
+            'last_infection_time': now + last_infection, 'can_infect_after': now + can_infect,
+        }
+        for mid, name, owner, color, x, y, size, last_infection, can_infect
+        in MINION.iter_unpack(view[offset:end])
+    ]
+    offset = end
+
+    end = offset + COOLDOWN.size * n_cooldowns
+    cooldowns = {strings[key]: now + when for key, when in COOLDOWN.iter_unpack(view[offset:end])}
+    view.release()
+
+    return {
+        'saved_at': saved_at,
+        'tick': tick,
+        'players': players,
+        'minions': minions,
+        'cooldowns': cooldowns,
+    }
+
+
+def save_world_file(path: str, data: bytes):
+    """Write atomically: a crash mid-write leaves the previous image intact."""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_world_file(path: str, now=None):
+    """Memory-map and decode a world image; returns None if there is nothing to restore."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return decode_world(buffer, now)
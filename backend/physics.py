@@ -0,0 +1,164 @@
+import math
+
+
+class FleetPhysics:
+    """Fleet movement rules, free of the server's globals.
+
+    The inline engine in server.py and the physics worker process (see
+    physics_worker.py) both move fleets through ``move_fleet``, so they
+    compute the same floats in the same order.
+    """
+
+    def __init__(self, world_width: float, world_height: float, base_speed: float, quality_threshold: int):
+        self.world_width = world_width
+        self.world_height = world_height
+        self.base_speed = base_speed
+        self.quality_threshold = quality_threshold  # Fleets bigger than this may thin out separation
+
+    @staticmethod
+    def speed_multiplier(minion_count: int) -> float:
+        # Highest speed: 1.0x (baseline)
+        # Worst case: 0.95x (95% of highest speed) - much less severe debuff
+        if minion_count <= 3:
+            # Small fleets are very agile (1.0x speed)
+            return 1.0
+        elif minion_count <= 8:
+            # Medium fleets have very slight speed reduction
+            return 1.0 - (minion_count - 3) * 0.005  # 1.0x -> 0.975x
+        else:
+            # Large fleets are only slightly slower, capped at 0.95x minimum
+            return max(0.95, 0.975 - (minion_count - 8) * 0.002)
+
+    def move_fleet(self, owned_minions: list, direction_dx: float, direction_dy: float,
+                   delta_time: float, separation_stride: int = 1):
+        """Move one fleet a step towards its direction vector.
+
+        Minions need ``id``, ``x``, ``y`` and ``size``. Returns the speed
+        multiplier applied, or None if the fleet stayed put because the
+        cursor is on it.
+        """
+        direction_magnitude = math.sqrt(direction_dx**2 + direction_dy**2)
+        if direction_magnitude <= 1:  # The cursor is on the player
+            return None
+
+        world_width = self.world_width
+        world_height = self.world_height
+
+        # Calculate fleet center for cohesion force
+        fleet_center_x = sum(m.x for m in owned_minions) / len(owned_minions)
+        fleet_center_y = sum(m.y for m in owned_minions) / len(owned_minions)
+
+        minion_count = len(owned_minions)
+        speed_multiplier = self.speed_multiplier(minion_count)
+
+        # Calculate displacement based on speed, time, and fleet size
+        displacement = self.base_speed * delta_time * speed_multiplier
+
+        # Under load the governor has big fleets check separation against every Nth fleet mate
+        fleet_separation_stride = separation_stride if minion_count > self.quality_threshold else 1
+
+        # Move each minion towards the target with some spread
+        for i, minion in enumerate(owned_minions):
+            # Add some variation to prevent all minions from stacking
+            spread_angle = (i / len(owned_minions)) * 2 * math.pi
+            spread_radius = 20
+            spread_x = math.cos(spread_angle) * spread_radius
+            spread_y = math.sin(spread_angle) * spread_radius
+
+            # Calculate direction with spread
+            target_dx = direction_dx + spread_x
+            target_dy = direction_dy + spread_y
+            target_magnitude = math.sqrt(target_dx**2 + target_dy**2)
+
+            # Add cohesion force toward fleet center (natural blob gravity)
+            cohesion_dx = fleet_center_x - minion.x
+            cohesion_dy = fleet_center_y - minion.y
+            cohesion_distance = math.sqrt(cohesion_dx**2 + cohesion_dy**2)
+
+            # Apply cohesion force - natural blob attraction
+            if cohesion_distance > 0:
+                # Stronger attraction for closer blobs (like surface tension)
+                if cohesion_distance < 80:
+                    # Close to center - strong natural attraction
+                    cohesion_strength = min(cohesion_distance / 120, 0.6)  # Strong but not excessive
+                else:
+                    # Farther away - moderate attraction to stay together
+                    cohesion_strength = min(cohesion_distance / 100, 0.7)  # Moderate pull
+
+                cohesion_dx = (cohesion_dx / cohesion_distance) * cohesion_strength * displacement
+                cohesion_dy = (cohesion_dy / cohesion_distance) * cohesion_strength * displacement
+            else:
+                cohesion_dx = cohesion_dy = 0
+
+            # Add separation force from other minions in the same fleet - FLUID BLOB behavior
+            separation_dx = 0
+            separation_dy = 0
+
+            # Smaller separation radius for more natural clustering (like fluid blobs)
+            separation_radius = minion.size * 1.3  # Much closer together for blob-like feel
+
+            for other_minion in owned_minions[i % fleet_separation_stride::fleet_separation_stride]:
+                if other_minion.id != minion.id:
+                    dx = minion.x - other_minion.x
+                    dy = minion.y - other_minion.y
+                    distance = math.sqrt(dx**2 + dy**2)
+
+                    # Only separate when actually overlapping (like squishy blobs)
+                    if distance < separation_radius and distance > 0:
+                        # Gentle, elastic separation (like bouncing fluid blobs)
+                        separation_strength = (separation_radius - distance) / separation_radius
+
+                        # Soft bounce effect - stronger when very close but not harsh
+                        if distance < minion.size * 0.8:
+                            # Very close - gentle elastic bounce
+                            separation_strength = separation_strength * 0.4  # Gentle bounce
+                        else:
+                            # Slight overlap - very gentle nudge
+                            separation_strength = separation_strength * 0.2  # Very gentle
+
+                        separation_dx += (dx / distance) * separation_strength * displacement
+                        separation_dy += (dy / distance) * separation_strength * displacement
+
+            # Scale a thinned-out separation sum back up to the full-fleet estimate
+            separation_dx *= fleet_separation_stride
+            separation_dy *= fleet_separation_stride
+
+            if target_magnitude > 0:
+                # Natural fluid blob behavior - prioritize cohesion with gentle separation
+                target_factor = 0.7    # Direct movement is primary
+                cohesion_factor = 0.4   # Strong natural attraction (like surface tension)
+                separation_factor = 0.15 # Gentle bounce when overlapping
+
+                # Large fleets still want to cluster but with gentle spacing
+                if minion_count > 20:
+                    cohesion_factor = 0.45  # Even stronger attraction for large groups
+                    separation_factor = 0.2  # Slightly more gentle bouncing
+
+                move_x = (target_dx / target_magnitude) * displacement * target_factor + cohesion_dx * cohesion_factor + separation_dx * separation_factor
+                move_y = (target_dy / target_magnitude) * displacement * target_factor + cohesion_dy * cohesion_factor + separation_dy * separation_factor
+
+                minion.x += move_x
+                minion.y += move_y
+            else:
+                # When not moving, maintain natural blob clustering with gentle spacing
+                cohesion_idle_factor = 0.5   # Natural attraction when idle
+                separation_idle_factor = 0.3  # Gentle bouncing to prevent hard overlap
+
+                minion.x += cohesion_dx * cohesion_idle_factor + separation_dx * separation_idle_factor
+                minion.y += cohesion_dy * cohesion_idle_factor + separation_dy * separation_idle_factor
+
+            # Keep within bounds with soft bouncing to fix edge glitches
+            margin = minion.size / 2
+
+            # Soft boundary constraints to prevent edge glitches
+            if minion.x < margin:
+                minion.x = margin + (margin - minion.x) * 0.1  # Soft bounce from left edge
+            elif minion.x > world_width - margin:
+                minion.x = world_width - margin - (minion.x - (world_width - margin)) * 0.1  # Soft bounce from right edge
+
+            if minion.y < margin:
+                minion.y = margin + (margin - minion.y) * 0.1  # Soft bounce from top edge
+            elif minion.y > world_height - margin:
+                minion.y = world_height - margin - (minion.y - (world_height - margin)) * 0.1  # Soft bounce from bottom edge
+
+        return speed_multiplier
@@ -0,0 +1,336 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.connection import Connection
+
+from collision import candidate_pairs, circles_overlap, swept_circles_collide
+from physics import FleetPhysics
+
+# Header slots (int64)
+PUBLISHED = 0  # Which position buffer holds the newest finished step
+STEP = 1  # Number of the newest finished step
+PAIR_COUNT = 2  # Colliding pairs the newest step found
+PAIRS_DROPPED = 3  # Pairs that didn't fit the pair buffer
+STEP_MICROS = 4  # How long the newest step took in the worker
+HEADER_SLOTS = 8
+
+POSITION_FIELDS = 4  # x, y, prev_x, prev_y
+
+
+class PhysicsWorkerDied(Exception):
+    """The worker process is gone; whatever step it was running is lost."""
+
+
+class SharedWorld:
+    """Views onto the shared memory block both processes work from.
+
+    - ``positions``: two buffers of ``capacity`` slots x (x, y, prev_x, prev_y).
+      The worker reads the published one and writes the other, then flips
+      ``header[PUBLISHED]``, so the event loop always has a complete step to
+      read from.
+    - ``size``, ``owner``: per slot; ``owner`` indexes ``direction`` when it
+      is below the player count, anything else never moves.
+    - ``order``: the slots to simulate, in ``minions`` dict order, so fleets
+      and collision pairs come out in the same order as the inline engine.
+    - ``direction``: (dx, dy) per player, written by the event loop.
+    - ``pairs``: slot pairs of the newest step's collisions.
+    """
+
+    def __init__(self, capacity: int, name=None):
+        self.capacity = capacity
+        self.max_pairs = capacity * 4
+        layout = [
+            ('header', 'q', HEADER_SLOTS),
+            ('positions', 'd', 2 * capacity * POSITION_FIELDS),
+            ('size', 'd', capacity),
+            ('direction', 'd', 2 * capacity),
+            ('owner', 'i', capacity),
+            ('order', 'i', capacity),
+            ('pairs', 'i', 2 * self.max_pairs),
+        ]
+        item_sizes = {'q': 8, 'd': 8, 'i': 4}
+        total = sum(item_sizes[code] * count for _, code, count in layout)
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=total)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.views = []
+        offset = 0
+        for field, code, count in layout:
+            length = item_sizes[code] * count
+            view = self.shm.buf[offset:offset + length].cast(code)
+            setattr(self, field, view)
+            self.views.append(view)
+            offset += length
+
+    def buffer_offset(self, index: int) -> int:
+        return index * self.capacity * POSITION_FIELDS
+
+    def close(self, unlink: bool = False):
+        for view in self.views:
+            view.release()
+        self.views = []
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+class Body:
+    """What the worker knows about a minion: enough to move it and collide it."""
+
+    __slots__ = ('id', 'x', 'y', 'prev_x', 'prev_y', 'size', 'owner_id')
+
+    def __init__(self, slot: int):
+        self.id = slot
+        self.x = self.y = self.prev_x = self.prev_y = 0.0
+        self.size = 0.0
+        self.owner_id = -1
+
+
+def step_world(world: SharedWorld, bodies: list, physics: FleetPhysics, count: int, player_count: int,
+               delta_time: float, separation_stride: int, cell_size: float, swept: bool):
+    """One simulation step from the published buffer into the other one."""
+    published = world.header[PUBLISHED]
+    target = 1 - published
+    source_offset = world.buffer_offset(published)
+    target_offset = world.buffer_offset(target)
+    positions, size, owner, order = world.positions, world.size, world.owner, world.order
+
+    minion_list = []
+    fleets = {}
+    for slot in order[:count]:
+        body = bodies[slot]
+        base = source_offset + slot * POSITION_FIELDS
+        body.x = body.prev_x = positions[base]
+        body.y = body.prev_y = positions[base + 1]
+        body.size = size[slot]
+        body.owner_id = owner[slot]
+        minion_list.append(body)
+        fleets.setdefault(body.owner_id, []).append(body)
+
+    direction = world.direction
+    for player_index in range(player_count):
+        owned = fleets.get(player_index)
+        if owned:
+            physics.move_fleet(owned, direction[2 * player_index], direction[2 * player_index + 1],
+                               delta_time, separation_stride)
+
+    for body in minion_list:
+        base = target_offset + body.id * POSITION_FIELDS
+        positions[base] = body.x
+        positions[base + 1] = body.y
+        positions[base + 2] = body.prev_x
+        positions[base + 3] = body.prev_y
+
+    collide = swept_circles_collide if swept else circles_overlap
+    pairs = world.pairs
+    found = 0
+    dropped = 0
+    for i, j in candidate_pairs(minion_list, cell_size, swept=swept):
+        if collide(minion_list[i], minion_list[j]):
+            if found < world.max_pairs:
+                pairs[2 * found] = minion_list[i].id
+                pairs[2 * found + 1] = minion_list[j].id
+                found += 1
+            else:
+                dropped += 1
+
+    world.header[PAIR_COUNT] = found
+    world.header[PAIRS_DROPPED] = dropped
+    world.header[PUBLISHED] = target
+
+
+def run_worker(conn):
+    """Worker process: wait for a step request, run it, report back, repeat until told to stop."""
+    try:
+        name, capacity, physics, cell_size, swept = conn.recv()
+    except (EOFError, KeyboardInterrupt):
+        return
+    world = SharedWorld(capacity, name=name)
+    # The server owns (and unlinks) the block; don't let this process's tracker remove it too
+    resource_tracker.unregister(world.shm._name, 'shared_memory')
+    bodies = [Body(slot) for slot in range(capacity)]
+    try:
+        while True:
+            request = conn.recv()
+            if request is None:
+                break
+            step, count, player_count, delta_time, separation_stride = request
+            started = time.perf_counter()
+            step_world(world, bodies, physics, count, player_count, delta_time, separation_stride, cell_size, swept)
+            world.header[STEP_MICROS] = int((time.perf_counter() - started) * 1e6)
+            world.header[STEP] = step
+            conn.send(step)
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        world.close()
+
+
+class PhysicsWorker:
+    """Runs fleet movement and collision detection in a separate process.
+
+    Each tick the event loop calls ``collect`` and, if the previous step is
+    done, gets its positions copied onto the minions plus the colliding pairs
+    it found, then calls ``start`` to hand over the next step. Neither call
+    blocks: while the worker is still busy, ``collect`` returns None and the
+    world simply stays where it is for that tick. Collisions are therefore
+    resolved a step after the movement that caused them, and anything the
+    event loop changes (new minions, infections, removals) reaches the worker
+    with the next step.
+
+    Everything else - snapshots, spectators, the minimap - keeps reading the
+    minion objects, which only change in ``collect``.
+
+    The worker runs this file as its own script rather than through
+    multiprocessing, so it never imports server.py. If it dies, ``collect``
+    and ``start`` raise PhysicsWorkerDied.
+    """
+
+    def __init__(self, physics: FleetPhysics, capacity: int, cell_size: float, swept: bool):
+        self.world = SharedWorld(capacity)
+        self.capacity = capacity
+        self.slots = {}  # minion id -> slot
+        self.slot_minions = [None] * capacity
+        self.free_slots = list(range(capacity - 1, -1, -1))
+        self.in_flight = None  # [(slot, minion)] the running step was started with
+        self.step = 0
+        self.steps = 0
+        self.busy_ticks = 0
+        self.overflow = 0
+        self.pairs_dropped = 0
+        self.step_time = 0.0
+        parent_socket, worker_socket = socket.socketpair()
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), str(worker_socket.fileno())],
+            pass_fds=(worker_socket.fileno(),),
+        )
+        worker_socket.close()
+        self.conn = Connection(parent_socket.detach())
+        self._send((self.world.shm.name, capacity, physics, cell_size, swept))
+
+    def _send(self, message):
+        try:
+            self.conn.send(message)
+        except OSError as e:
+            raise PhysicsWorkerDied(f'physics worker {self.process.pid} is gone: {e!r}') from e
+
+    def collect(self):
+        """Apply the finished step to the minions and return its colliding ``(minion1, minion2)`` pairs.
+
+        Returns [] before the first step and None while a step is still running.
+        """
+        if self.in_flight is None:
+            return []
+        try:
+            if not self.conn.poll():
+                self.busy_ticks += 1
+                return None
+            self.conn.recv()
+        except (EOFError, OSError) as e:
+            raise PhysicsWorkerDied(f'physics worker {self.process.pid} is gone: {e!r}') from e
+        world = self.world
+        header = world.header
+        positions = world.positions
+        offset = world.buffer_offset(header[PUBLISHED])
+        for slot, minion in self.in_flight:
+            base = offset + slot * POSITION_FIELDS
+            minion.x = positions[base]
+            minion.y = positions[base + 1]
+            minion.prev_x = positions[base + 2]
+            minion.prev_y = positions[base + 3]
+        pairs = world.pairs
+        slot_minions = self.slot_minions
+        collisions = [(slot_minions[pairs[2 * k]], slot_minions[pairs[2 * k + 1]])
+                      for k in range(header[PAIR_COUNT])]
+        self.pairs_dropped += header[PAIRS_DROPPED]
+        self.step_time += header[STEP_MICROS] / 1e6
+        self.steps += 1
+        self.in_flight = None
+        return collisions
+
+    def start(self, players: dict, minions: dict, delta_time: float, separation_stride: int):
+        """Hand the current world to the worker and start the next step. Call only after ``collect`` returned a list."""
+        world = self.world
+        slots = self.slots
+        slot_minions = self.slot_minions
+        positions = world.positions
+        offset = world.buffer_offset(world.header[PUBLISHED])
+        size, owner, order, direction = world.size, world.owner, world.order, world.direction
+
+        owner_index = {}
+        for index, (player_id, player) in enumerate(players.items()):
+            owner_index[player_id] = index
+            direction[2 * index] = player.direction_dx
+            direction[2 * index + 1] = player.direction_dy
+        player_count = len(owner_index)
+
+        # Nobody reads the slots of removed minions any more (no step is running)
+        if len(slots) > len(minions):
+            for minion_id in [k for k in slots if k not in minions]:
+                slot = slots.pop(minion_id)
+                slot_minions[slot] = None
+                self.free_slots.append(slot)
+
+        in_flight = []
+        for minion_id, minion in minions.items():
+            slot = slots.get(minion_id)
+            if slot is None or slot_minions[slot] is not minion:
+                if slot is None:
+                    if not self.free_slots:
+                        self.overflow += 1
+                        continue  # Out of room: this minion sits still until a slot frees up
+                    slot = slots[minion_id] = self.free_slots.pop()
+                slot_minions[slot] = minion
+                # New to the worker: seed the published buffer with where the server put it
+                base = offset + slot * POSITION_FIELDS
+                positions[base] = minion.x
+                positions[base + 1] = minion.y
+            # Minions of players that are gone get an index of their own, so they still collide but never move
+            index = owner_index.get(minion.owner_id)
+            if index is None:
+                index = owner_index[minion.owner_id] = len(owner_index)
+            order[len(in_flight)] = slot
+            owner[slot] = index
+            size[slot] = minion.size
+            in_flight.append((slot, minion))
+
+        self.step += 1
+        self.in_flight = in_flight
+        self._send((self.step, len(in_flight), player_count, delta_time, separation_stride))
+
+    def stats(self) -> dict:
+        """Counters for the /test status endpoint."""
+        return {
+            'engine': 'process',
+            'alive': self.process.poll() is None,
+            'steps': self.steps,
+            'busy_ticks': self.busy_ticks,
+            'avg_step_ms': round(self.step_time / max(self.steps, 1) * 1000, 3),
+            'last_step_ms': round(self.world.header[STEP_MICROS] / 1000, 3),
+            'slots_used': len(self.slots),
+            'capacity': self.capacity,
+            'overflow': self.overflow,
+            'pairs_dropped': self.pairs_dropped,
+        }
+
+    def close(self):
+        """Stop the worker process and free the shared memory."""
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            self.process.terminate()
+            self.process.wait(timeout=1)
+        self.conn.close()
+        self.world.close(unlink=True)
+
+
+if __name__ == '__main__':
+    run_worker(Connection(int(sys.argv[1])))
@@ -0,0 +1,207 @@
+import os
+import struct
+import time
+import zlib
+
+# Session recording, little-endian and append-only:
+#   header | world image (persistence.py format, may be empty) | records...
+# Each record is a one-byte kind followed by a fixed-size body. Strings (socket
+# ids, names) are written once as a STRING record the first time they are used
+# and referred to by index after that.
+SESSION_MAGIC = b'IMS1'
+SESSION_VERSION = 2
+HEADER = struct.Struct('<4sHQdQ16sI')  # magic, version, seed, started_at, tick, collision mode, world image size
+STRING_LEN = struct.Struct('<I')
+STRING_LENS = {1: struct.Struct('<H'), SESSION_VERSION: STRING_LEN}  # Version 1 recordings still replay
+
+RECORD_FORMATS = {
+    b'T': struct.Struct('<QddB'),  # tick: tick, current_time, delta_time, separation_stride
+    b'I': struct.Struct('<Idd'),   # input: player, direction_dx, direction_dy
+    b'J': struct.Struct('<dII'),   # join: time, player, name
+    b'L': struct.Struct('<I'),     # leave: player
+    b'N': struct.Struct('<dII'),   # rename: time, player, new name
+    b'R': struct.Struct('<dI'),    # respawn: time, player
+    b'A': struct.Struct('<II'),    # reattach: old player id, new player id
+    b'V': struct.Struct('<II'),    # verdict: winner name, loser name
+    b'D': struct.Struct('<QI'),    # digest: tick, crc32 of the world
+}
+STRING_FIELDS = {
+    b'I': (0,),
+    b'J': (1, 2),
+    b'L': (0,),
+    b'N': (1, 2),
+    b'R': (1,),
+    b'A': (0, 1),
+    b'V': (0, 1),
+}
+
+_PLAYER_DIGEST = struct.Struct('<dd')
+_MINION_DIGEST = struct.Struct('<ddd')
+
+
+def world_digest(players: dict, minions: dict) -> int:
+    """CRC32 over everything the simulation decides: fleets, ownership, names and positions."""
+    crc = 0
+    for player in players.values():
+        crc = zlib.crc32(f'{player.id}\0{player.name}\0'.encode('utf-8'), crc)
+        crc = zlib.crc32(_PLAYER_DIGEST.pack(player.direction_dx, player.direction_dy), crc)
+    for minion in minions.values():
+        crc = zlib.crc32(f'{minion.id}\0{minion.owner_id}\0{minion.original_name}\0{minion.color}\0'
+                         .encode('utf-8'), crc)
+        crc = zlib.crc32(_MINION_DIGEST.pack(minion.x, minion.y, minion.size), crc)
+    return crc
+
+
+class SessionRecorder:
+    """Writes everything that changes the world, in the order it happened.
+
+    That is per-tick clock readings, the movement input applied each tick,
+    joins, leaves, renames, respawns, reattaches and every collision verdict.
+    Together with the RNG seed in the header this is enough for replay.py to
+    re-run the session exactly. Every ``digest_interval`` ticks a CRC of the
+    world is written so the replay can prove it stayed in lockstep.
+    """
+
+    def __init__(self, path: str, seed: int, started_at: float, tick: int, collision_mode: str,
+                 world_image: bytes = b'', digest_interval: int = 60, flush_bytes: int = 64 * 1024):
+        self.path = path
+        self.digest_interval = digest_interval
+        self.flush_bytes = flush_bytes
+        self.strings = {}
+        self.directions = {}  # player id -> last recorded (dx, dy)
+        self.buffer = bytearray(HEADER.pack(SESSION_MAGIC, SESSION_VERSION, seed, started_at, tick,
+                                            collision_mode.encode('ascii'), len(world_image)))
+        self.buffer += world_image
+        self.records = 0
+        self.bytes_written = 0
+        self.file = open(path, 'ab')
+        self.flush()
+
+    def _ref(self, value: str) -> int:
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+            data = value.encode('utf-8')
+            self.buffer += b'S'
+            self.buffer += STRING_LEN.pack(len(data))
+            self.buffer += data
+        return index
+
+    def _write(self, kind: bytes, *fields):
+        self.buffer += kind
+        self.buffer += RECORD_FORMATS[kind].pack(*fields)
+        self.records += 1
+
+    def inputs(self, players: dict):
+        """Record the direction of every player whose input changed since the last tick."""
+        for player in players.values():
+            direction = (player.direction_dx, player.direction_dy)
+            if self.directions.get(player.id, (0, 0)) != direction:
+                self.directions[player.id] = direction
+                self._write(b'I', self._ref(player.id), float(direction[0]), float(direction[1]))
+
+    def tick(self, tick: int, current_time: float, delta_time: float, separation_stride: int):
+        self._write(b'T', tick, current_time, delta_time, separation_stride)
+
+    def end_tick(self, tick: int, players: dict, minions: dict):
+        if tick % self.digest_interval == 0:
+            self._write(b'D', tick, world_digest(players, minions))
+        if len(self.buffer) >= self.flush_bytes:
+            self.flush()
+
+    def join(self, current_time: float, player_id: str, name: str):
+        self._write(b'J', current_time, self._ref(player_id), self._ref(name))
+
+    def leave(self, player_id: str):
+        self.directions.pop(player_id, None)
+        self._write(b'L', self._ref(player_id))
+
+    def rename(self, current_time: float, player_id: str, name: str):
+        self._write(b'N', current_time, self._ref(player_id), self._ref(name))
+
+    def respawn(self, current_time: float, player_id: str):
+        self._write(b'R', current_time, self._ref(player_id))
+
+    def reattach(self, old_id: str, new_id: str):
+        self.directions.pop(old_id, None)
+        self._write(b'A', self._ref(old_id), self._ref(new_id))
+
+    def verdict(self, winner_name: str, loser_name: str):
+        self._write(b'V', self._ref(winner_name), self._ref(loser_name))
+
+    def flush(self):
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.file.flush()
+            self.bytes_written += len(self.buffer)
+            self.buffer.clear()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def stats(self) -> dict:
+        """Counters for the /test status endpoint."""
+        return {
+            'path': self.path,
+            'records': self.records,
+            'bytes_written': self.bytes_written + len(self.buffer),
+        }
+
+
+class SessionReader:
+    """Reads a recording back: ``header`` and ``world_image`` up front, then iterate for records.
+
+    Iterating yields ``(kind, fields)`` with string references already
+    resolved. A record cut short at the end of the file (the server died
+    mid-write) ends the iteration.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self.data = f.read()
+        magic, version, seed, started_at, tick, collision_mode, image_size = HEADER.unpack_from(self.data, 0)
+        if magic != SESSION_MAGIC or version not in STRING_LENS:
+            raise ValueError(f'Not a session recording (magic={magic!r}, version={version})')
+        self.string_len = STRING_LENS[version]
+        self.header = {
+            'seed': seed,
+            'started_at': started_at,
+            'tick': tick,
+            'collision_mode': collision_mode.rstrip(b'\0').decode('ascii'),
+        }
+        self.world_image = self.data[HEADER.size:HEADER.size + image_size]
+        self.start = HEADER.size + image_size
+
+    def __iter__(self):
+        data = self.data
+        string_len = self.string_len
+        strings = []
+        offset = self.start
+        while offset < len(data):
+            kind = data[offset:offset + 1]
+            offset += 1
+            if kind == b'S':
+                if offset + string_len.size > len(data):
+                    return
+                (length,) = string_len.unpack_from(data, offset)
+                offset += string_len.size
+                strings.append(data[offset:offset + length].decode('utf-8'))
+                offset += length
+                continue
+            record = RECORD_FORMATS.get(kind)
+            if record is None:
+                raise ValueError(f'Unknown record kind {kind!r} at offset {offset - 1}')
+            if offset + record.size > len(data):
+                return
+            fields = list(record.unpack_from(data, offset))
+            offset += record.size
+            for index in STRING_FIELDS.get(kind, ()):
+                fields[index] = strings[fields[index]]
+            yield kind, fields
+
+
+def session_path(directory: str, started_at: float) -> str:
+    """A fresh file name per server start, so restarts never append to an old session."""
+    stamp = time.strftime('%Y%m%d-%H%M%S', time.gmtime(started_at))
+    return os.path.join(directory, f'session-{stamp}.rec')
@@ -0,0 +1,315 @@
+"""Reference simulation step: the game loop as it was before the engines were optimised.
+
+Movement, collision detection and collision resolution are lifted from
+the original in-line game_loop and handle_minion_collision - fleets found
+by scanning every minion, full separation against every fleet mate, a
+plain overlap test on every pair, infections and eliminations - and so are
+the original Player/Minion to_dict() payloads. Nothing here touches
+server.py, so a regression there can't hide on both sides. differential.py runs the
+server's engines against it, so leave it alone when optimising them - its
+job is to stay the ground truth.
+"""
+import math
+
+
+def check_minion_collision(minion1, minion2) -> bool:
+    """Check if two minions are colliding"""
+    dx = minion1.x - minion2.x
+    dy = minion1.y - minion2.y
+    distance = math.sqrt(dx**2 + dy**2)
+    return distance < (minion1.size + minion2.size) / 2
+
+
+def move_minions(players: dict, minions: dict, delta_time: float,
+                 world_width: float, world_height: float, base_speed: float):
+    """Fleet movement for one step, in place."""
+    for player in players.values():
+        owned_minions = [m for m in minions.values() if m.owner_id == player.id]
+
+        if not owned_minions:
+            continue  # Player has no minions left
+
+        # Calculate fleet center for cohesion force
+        fleet_center_x = sum(m.x for m in owned_minions) / len(owned_minions)
+        fleet_center_y = sum(m.y for m in owned_minions) / len(owned_minions)
+
+        # Calculate movement for all owned minions
+        direction_magnitude = math.sqrt(player.direction_dx**2 + player.direction_dy**2)
+
+        if direction_magnitude > 1:  # If the cursor is not on the player
+            # Calculate fleet size speed multiplier
+            # Highest speed: 1.0x (baseline)
+            # Worst case: 0.95x (95% of highest speed) - much less severe debuff
+            minion_count = len(owned_minions)
+            if minion_count <= 3:
+                # Small fleets are very agile (1.0x speed)
+                speed_multiplier = 1.0
+            elif minion_count <= 8:
+                # Medium fleets have very slight speed reduction
+                speed_multiplier = 1.0 - (minion_count - 3) * 0.005  # 1.0x -> 0.975x
+            else:
+                # Large fleets are only slightly slower, capped at 0.95x minimum
+                speed_multiplier = max(0.95, 0.975 - (minion_count - 8) * 0.002)
+
+            # Calculate displacement based on speed, time, and fleet size
+            displacement = base_speed * delta_time * speed_multiplier
+
+            # Move each minion towards the target with some spread
+            for i, minion in enumerate(owned_minions):
+                # Add some variation to prevent all minions from stacking
+                spread_angle = (i / len(owned_minions)) * 2 * math.pi
+                spread_radius = 20
+                spread_x = math.cos(spread_angle) * spread_radius
+                spread_y = math.sin(spread_angle) * spread_radius
+
+                # Calculate direction with spread
+                target_dx = player.direction_dx + spread_x
+                target_dy = player.direction_dy + spread_y
+                target_magnitude = math.sqrt(target_dx**2 + target_dy**2)
+
+                # Add cohesion force toward fleet center (natural blob gravity)
+                cohesion_dx = fleet_center_x - minion.x
+                cohesion_dy = fleet_center_y - minion.y
+                cohesion_distance = math.sqrt(cohesion_dx**2 + cohesion_dy**2)
+
+                # Apply cohesion force - natural blob attraction
+                if cohesion_distance > 0:
+                    # Stronger attraction for closer blobs (like surface tension)
+                    if cohesion_distance < 80:
+                        # Close to center - strong natural attraction
+                        cohesion_strength = min(cohesion_distance / 120, 0.6)  # Strong but not excessive
+                    else:
+                        # Farther away - moderate attraction to stay together
+                        cohesion_strength = min(cohesion_distance / 100, 0.7)  # Moderate pull
+
+                    cohesion_dx = (cohesion_dx / cohesion_distance) * cohesion_strength * displacement
+                    cohesion_dy = (cohesion_dy / cohesion_distance) * cohesion_strength * displacement
+                else:
+                    cohesion_dx = cohesion_dy = 0
+
+                # Add separation force from other minions in the same fleet - FLUID BLOB behavior
+                separation_dx = 0
+                separation_dy = 0
+
+                # Smaller separation radius for more natural clustering (like fluid blobs)
+                separation_radius = minion.size * 1.3  # Much closer together for blob-like feel
+
+                for other_minion in owned_minions:
+                    if other_minion.id != minion.id:
+                        dx = minion.x - other_minion.x
+                        dy = minion.y - other_minion.y
+                        distance = math.sqrt(dx**2 + dy**2)
+
+                        # Only separate when actually overlapping (like squishy blobs)
+                        if distance < separation_radius and distance > 0:
+                            # Gentle, elastic separation (like bouncing fluid blobs)
+                            separation_strength = (separation_radius - distance) / separation_radius
+
+                            # Soft bounce effect - stronger when very close but not harsh
+                            if distance < minion.size * 0.8:
+                                # Very close - gentle elastic bounce
+                                separation_strength = separation_strength * 0.4  # Gentle bounce
+                            else:
+                                # Slight overlap - very gentle nudge
+                                separation_strength = separation_strength * 0.2  # Very gentle
+
+                            separation_dx += (dx / distance) * separation_strength * displacement
+                            separation_dy += (dy / distance) * separation_strength * displacement
+
+                if target_magnitude > 0:
+                    # Natural fluid blob behavior - prioritize cohesion with gentle separation
+                    target_factor = 0.7    # Direct movement is primary
+                    cohesion_factor = 0.4   # Strong natural attraction (like surface tension)
+                    separation_factor = 0.15 # Gentle bounce when overlapping
+
+                    # Large fleets still want to cluster but with gentle spacing
+                    if minion_count > 20:
+                        cohesion_factor = 0.45  # Even stronger attraction for large groups
+                        separation_factor = 0.2  # Slightly more gentle bouncing
+
+                    move_x = (target_dx / target_magnitude) * displacement * target_factor + cohesion_dx * cohesion_factor + separation_dx * separation_factor
+                    move_y = (target_dy / target_magnitude) * displacement * target_factor + cohesion_dy * cohesion_factor + separation_dy * separation_factor
+
+                    minion.x += move_x
+                    minion.y += move_y
+                else:
+                    # When not moving, maintain natural blob clustering with gentle spacing
+                    cohesion_idle_factor = 0.5   # Natural attraction when idle
+                    separation_idle_factor = 0.3  # Gentle bouncing to prevent hard overlap
+
+                    minion.x += cohesion_dx * cohesion_idle_factor + separation_dx * separation_idle_factor
+                    minion.y += cohesion_dy * cohesion_idle_factor + separation_dy * separation_idle_factor
+
+                # Keep within bounds with soft bouncing to fix edge glitches
+                margin = minion.size / 2
+
+                # Soft boundary constraints to prevent edge glitches
+                if minion.x < margin:
+                    minion.x = margin + (margin - minion.x) * 0.1  # Soft bounce from left edge
+                elif minion.x > world_width - margin:
+                    minion.x = world_width - margin - (minion.x - (world_width - margin)) * 0.1  # Soft bounce from right edge
+
+                if minion.y < margin:
+                    minion.y = margin + (margin - minion.y) * 0.1  # Soft bounce from top edge
+                elif minion.y > world_height - margin:
+                    minion.y = world_height - margin - (minion.y - (world_height - margin)) * 0.1  # Soft bounce from bottom edge
+
+
+def colliding_pairs(minions: dict) -> list:
+    """Every overlapping pair, in the original all-pairs order.
+
+    The original loop checked ownership pair by pair as it resolved them, so
+    same-fleet pairs are left in for ``resolve_collisions`` to skip.
+    """
+    minion_list = list(minions.values())
+    pairs = []
+    for i in range(len(minion_list)):
+        for j in range(i + 1, len(minion_list)):
+            minion1 = minion_list[i]
+            minion2 = minion_list[j]
+            if check_minion_collision(minion1, minion2):
+                pairs.append((minion1, minion2))
+    return pairs
+
+
+async def resolve_collisions(pairs: list, players: dict, minions: dict, collision_cooldowns: dict,
+                             current_time: float, determine_winner, max_fleet_size: int, events: list):
+    """Infections and eliminations for ``pairs``, in place.
+
+    ``determine_winner(name1, name2)`` stands in for the AI. Each emit of the
+    original is appended to ``events`` as ``('infection_happened', winner id,
+    loser id, max_fleet_kill)`` or ``('player_eliminated', player id,
+    eliminator name)``.
+    """
+    for minion1, minion2 in pairs:
+        # Skip if either minion no longer exists or same owner
+        if (minion1.id not in minions or minion2.id not in minions or
+                minion1.owner_id == minion2.owner_id):
+            continue
+
+        # Check collision cooldown
+        collision_key = f"{minion1.id}-{minion2.id}"
+
+        if collision_key in collision_cooldowns:
+            if current_time - collision_cooldowns[collision_key] < 1.0:  # 1 second cooldown
+                continue
+
+        # Check invulnerability periods (2 second invulnerability after infection)
+        minion1_vulnerable = current_time - minion1.last_infection_time > 2.0
+        minion2_vulnerable = current_time - minion2.last_infection_time > 2.0
+
+        # Only allow infection if both minions are vulnerable
+        if minion1_vulnerable and minion2_vulnerable:
+            # Set cooldown
+            collision_cooldowns[collision_key] = current_time
+
+            await handle_minion_collision(minion1, minion2, players, minions, current_time,
+                                          determine_winner, max_fleet_size, events)
+
+
+async def handle_minion_collision(minion1, minion2, players: dict, minions: dict, current_time: float,
+                                  determine_winner, max_fleet_size: int, events: list):
+    """Handle collision between two minions - winner infects loser"""
+    # Don't handle collision if minions have same owner
+    if minion1.owner_id == minion2.owner_id:
+        return
+
+    # Check if either minion is invulnerable
+    if (current_time - minion1.last_infection_time < 2.0 or
+            current_time - minion2.last_infection_time < 2.0):
+        return
+
+    # Check if either minion cannot infect yet (prevents chain reactions)
+    if (current_time < minion1.can_infect_after or
+            current_time < minion2.can_infect_after):
+        return
+
+    winner_name, original_loser_name = await determine_winner(minion1.original_name, minion2.original_name)
+
+    # Find the actual minion objects
+    winner = minion1 if winner_name == minion1.original_name else minion2
+    loser = minion2 if winner == minion1 else minion1
+
+    # Check if winner's fleet is already at maximum size
+    winner_owner = players.get(winner.owner_id)
+    winner_at_max = False
+    if winner_owner:
+        winner_fleet_size = len([m for m in minions.values() if m.owner_id == winner_owner.id])
+        winner_at_max = winner_fleet_size >= max_fleet_size
+
+    # Store the old owner ID for elimination check
+    old_owner_id = loser.owner_id
+
+    if winner_at_max:
+        # Winner is at max fleet size - loser dies but winner doesn't gain the minion
+        del minions[loser.id]
+        events.append(('infection_happened', winner.id, loser.id, True))
+    else:
+        # Winner infects loser - loser changes owner, color, and takes on winner's name
+        loser.owner_id = winner.owner_id
+        loser.color = winner.color
+        loser.original_name = winner.original_name
+        loser.last_infection_time = current_time
+        loser.can_infect_after = current_time + 1.5
+        events.append(('infection_happened', winner.id, loser.id, False))
+
+    # Check if any player has lost all their minions (regardless of takeover or kill)
+    old_owner = players.get(old_owner_id)
+    if old_owner and not any(m.owner_id == old_owner_id for m in minions.values()):
+        winner_owner = players.get(winner.owner_id)
+        eliminator_name = winner_owner.name if winner_owner else "Unknown"
+
+        # 1. Remove minions still owned by this player
+        minions_to_remove = [m_id for m_id, m in minions.items() if m.owner_id == old_owner_id]
+        for m_id in minions_to_remove:
+            del minions[m_id]
+
+        # 2. Remove minions with the eliminated player's name as original_name (infected minions)
+        minions_to_remove_by_name = [m_id for m_id, m in minions.items() if m.original_name == old_owner.name]
+        for m_id in minions_to_remove_by_name:
+            del minions[m_id]
+
+        events.append(('player_eliminated', old_owner_id, eliminator_name))
+
+
+def minion_to_dict(minion, current_time: float) -> dict:
+    is_invulnerable = current_time - minion.last_infection_time < 2.0
+
+    return {
+        'id': minion.id,
+        'original_name': minion.original_name,
+        'owner_id': minion.owner_id,
+        'x': minion.x,
+        'y': minion.y,
+        'size': minion.size,
+        'color': minion.color,
+        'is_invulnerable': is_invulnerable,
+        'can_infect': current_time >= minion.can_infect_after,
+    }
+
+
+def player_to_dict(player, minions: dict, current_time: float) -> dict:
+    owned_minions = [m for m in minions.values() if m.owner_id == player.id]
+    if owned_minions:
+        center_x = sum(m.x for m in owned_minions) / len(owned_minions)
+        center_y = sum(m.y for m in owned_minions) / len(owned_minions)
+    else:
+        center_x, center_y = 0, 0
+
+    return {
+        'id': player.id,
+        'name': player.name,
+        'color': player.color,
+        'minion_count': len(owned_minions),
+        'fleet_center_x': center_x,
+        'fleet_center_y': center_y,
+        'minions': [minion_to_dict(m, current_time) for m in owned_minions],
+    }
+
+
+def game_state(players: dict, minions: dict, current_time: float) -> dict:
+    """The original update_game_state payload."""
+    return {
+        'players': [player_to_dict(p, minions, current_time) for p in players.values()],
+        'all_minions': [minion_to_dict(m, current_time) for m in minions.values()],
+    }
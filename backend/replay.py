@@ -0,0 +1,144 @@
+"""Headless replay of a recorded game session.
+
+Start the server with RECORD_SESSION_DIR set and it writes every session to a
+compact log (see recording.py). This script re-runs such a log through the
+server's simulation as fast as it can - no sockets, no sleeping - checks the
+world against the digests taken while recording, and reports how long the
+simulation took, turning a production session into a repeatable benchmark.
+
+    RECORD_SESSION_DIR=recordings python server.py
+    python replay.py recordings/session-20250101-120000.rec
+"""
+import asyncio
+import contextlib
+import os
+import sys
+import time
+
+import server
+from persistence import decode_world
+from recording import SessionReader, world_digest
+
+
+class ReplayError(Exception):
+    pass
+
+
+class Replayer:
+    """Feeds a recording back into the server module's game state.
+
+    The server's clock is pointed at the recorded times, its RNGs are
+    reseeded from the header and collision verdicts come from the log, so
+    the simulation makes exactly the decisions it made while recording.
+    """
+
+    def __init__(self, reader: SessionReader):
+        self.reader = reader
+        self.records = iter(reader)
+        self.now = reader.header['started_at']
+        self.tick_times = []
+        self.simulated_seconds = 0.0
+        self.digests_checked = 0
+        self.mismatches = []  # (tick, recorded, replayed)
+
+    def clock(self):
+        return self.now
+
+    async def next_verdict(self, player1_name, player2_name):
+        """Stands in for the AI: replays whatever happened up to the recorded verdict."""
+        for kind, fields in self.records:
+            if kind == b'V':
+                return fields[0], fields[1]
+            if kind == b'T':
+                raise ReplayError(f'Expected a verdict for ({player1_name}, {player2_name}), got tick {fields[0]}')
+            self.apply(kind, fields)
+        raise ReplayError(f'Recording ends while waiting for a verdict for ({player1_name}, {player2_name})')
+
+    def setup(self):
+        header = self.reader.header
+        for state in (server.players, server.minions, server.collision_cooldowns, server.sessions):
+            state.clear()
+        server.recorder = None
+        server.clock = self.clock
+        server.determine_winner_with_cache = self.next_verdict
+        server.COLLISION_MODE = header['collision_mode']
+        server.load_world(decode_world(self.reader.world_image, now=0.0), self.now)
+        server.rng.seed(header['seed'])
+        server.fallback_rng.seed(header['seed'] + 1)
+
+    def apply(self, kind: bytes, fields):
+        """Apply one non-tick record the same way the server did."""
+        if kind == b'I':
+            player = server.players.get(fields[0])
+            if player is not None:
+                player.direction_dx, player.direction_dy = fields[1], fields[2]
+        elif kind == b'J':
+            self.now = fields[0]
+            server.add_player(fields[1], fields[2], fields[0])
+        elif kind == b'L':
+            server.remove_player(fields[0])
+        elif kind == b'N':
+            self.now = fields[0]
+            server.rename_player(fields[1], fields[2], fields[0])
+        elif kind == b'R':
+            self.now = fields[0]
+            server.respawn_fleet(fields[1], fields[0])
+        elif kind == b'A':
+            server.reattach_player(server.players[fields[0]], fields[1])
+        elif kind == b'D':
+            tick, recorded = fields
+            replayed = world_digest(server.players, server.minions)
+            self.digests_checked += 1
+            if replayed != recorded:
+                self.mismatches.append((tick, recorded, replayed))
+        else:
+            raise ReplayError(f'Unexpected {kind!r} record outside a tick')
+
+    async def run(self):
+        self.setup()
+        for kind, fields in self.records:
+            if kind != b'T':
+                self.apply(kind, fields)
+                continue
+            tick, current_time, delta_time, separation_stride = fields
+            server.server_tick = tick
+            self.now = current_time
+            self.simulated_seconds += delta_time
+            started = time.perf_counter()
+            await server.simulate_tick(current_time, delta_time, separation_stride)
+            self.tick_times.append(time.perf_counter() - started)
+
+
+def main():
+    if len(sys.argv) != 2:
+        print(f'Usage: {sys.argv[0]} SESSION_FILE')
+        sys.exit(2)
+
+    replayer = Replayer(SessionReader(sys.argv[1]))
+    started = time.perf_counter()
+    # The simulation logs as it goes; keep that out of the report and out of the timing
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        asyncio.run(replayer.run())
+    elapsed = time.perf_counter() - started
+
+    tick_times = sorted(replayer.tick_times)
+    if not tick_times:
+        print('No simulated ticks in this recording')
+        return
+    ticks = len(tick_times)
+    print(f'Replayed {ticks} ticks ({replayer.simulated_seconds:.1f} s of play) in {elapsed:.2f} s - '
+          f'{replayer.simulated_seconds / elapsed:.1f}x real time')
+    print(f'Simulation per tick: avg {sum(tick_times) / ticks * 1000:.3f} ms  '
+          f'p99 {tick_times[int(ticks * 0.99)] * 1000:.3f} ms  max {tick_times[-1] * 1000:.3f} ms')
+    print(f'Final world: {len(server.players)} players, {len(server.minions)} minions, '
+          f'digest {world_digest(server.players, server.minions):08x}')
+    if replayer.mismatches:
+        tick, recorded, replayed = replayer.mismatches[0]
+        print(f'World digests: {len(replayer.mismatches)} of {replayer.digests_checked} DIFFER '
+              f'(first at tick {tick}: recorded {recorded:08x}, replayed {replayed:08x})')
+        sys.exit(1)
+    print(f'World digests: all {replayer.digests_checked} match')
+
+
+if __name__ == '__main__':
+    main()
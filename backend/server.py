@@ -1,33 +1,121 @@
+import time
+STARTUP_STARTED = time.perf_counter()
+
 import socketio
 import aiohttp.web
 import uuid
 import asyncio
+import importlib
 import random
 import math
-import time
 import os
+import struct
+
+# Startup cost breakdown in seconds, filled in as the server comes up (see /test)
+startup_timings = {'framework_imports': time.perf_counter() - STARTUP_STARTED}
+
+from admission import AdmissionController
+from collision import COLLISION_MODES, candidate_pairs, circles_overlap, swept_circles_collide
+from density import DensityGrid
+from governor import TickGovernor, build_levels
+from inputs import InputCoalescer, decode_move_packet, sequence_number
+from leaderboard import Leaderboard
+from moderation import DEFAULT_ALLOWLIST_PATH, DEFAULT_BLOCKLIST_PATH, NameFilter
+from outbound import OutboundQueues
+from persistence import encode_world, load_world_file, save_world_file
+from physics import FleetPhysics
+from physics_worker import PhysicsWorker, PhysicsWorkerDied
+from recording import SessionRecorder, session_path
+from snapshot import SnapshotBuilder
+from spectator import SpectatorStream
+
+startup_timings['game_modules'] = time.perf_counter() - STARTUP_STARTED - startup_timings['framework_imports']
+
+# The AI module (Gemini client, dotenv, cache.json) is slow to import, so it is loaded
+# in the background once the server is up (see load_ai_module). Until then, and if it
+# can't be loaded at all, collisions and name checks use the fallbacks below.
+AI_AVAILABLE = False
+ai_module = None
+ai_wait_time = 0.0  # Seconds spent awaiting AI verdicts; kept out of the governor's tick timing
+
+async def fallback_determine_winner(player1_name, player2_name):
+    winner_name = fallback_rng.choice([player1_name, player2_name])
+    loser_name = player2_name if winner_name == player1_name else player1_name
+    return winner_name, loser_name
+
+async def fallback_check_name_appropriateness(player_name):
+    # Fallback: assume appropriate if AI module not available
+    print(f"Warning: No AI module available for name check, allowing '{player_name}'")
+    return True
+
+async def determine_winner_with_cache(player1_name, player2_name):
+    global ai_wait_time
+    if ai_module is None:
+        winner_name, loser_name = await fallback_determine_winner(player1_name, player2_name)
+    else:
+        started = time.perf_counter()
+        winner_name, loser_name = await ai_module.determine_winner_with_cache(player1_name, player2_name)
+        ai_wait_time += time.perf_counter() - started
+    if recorder:
+        recorder.verdict(winner_name, loser_name)
+    return winner_name, loser_name
+
+async def check_name_appropriateness(player_name):
+    """Settle what the local word lists can, and only ask the AI about the rest"""
+    verdict = name_filter.check(player_name)
+    if verdict != 'escalate':
+        return verdict == 'accept'
+    if ai_module is None:
+        appropriate = await fallback_check_name_appropriateness(player_name)
+    else:
+        appropriate = await ai_module.check_name_appropriateness(player_name)
+    name_filter.record_ai_verdict(appropriate)
+    if appropriate is None:
+        # The AI couldn't be reached; the blocklist already caught the obvious cases
+        return NAME_CHECK_FAIL_OPEN
+    return appropriate
 
-# Try to import AI module, but don't fail if it's not available
-try:
-    from ai import determine_winner_with_cache, check_name_appropriateness
+async def load_ai_module():
+    """Import the AI module off the event loop, then switch collisions and name checks over to it"""
+    global AI_AVAILABLE, ai_module
+    started = time.perf_counter()
+    try:
+        module = await asyncio.get_running_loop().run_in_executor(None, importlib.import_module, 'ai')
+    except ImportError as e:
+        print(f"Warning: AI module not available: {e}")
+        return
+    ai_module = module
     AI_AVAILABLE = True
-except ImportError as e:
-    print(f"Warning: AI module not available: {e}")
-    AI_AVAILABLE = False
-    
-    # Fallback functions
-    async def determine_winner_with_cache(player1_name, player2_name):
-        winner_name = random.choice([player1_name, player2_name])
-        loser_name = player2_name if winner_name == player1_name else player1_name
-        return winner_name, loser_name
-    
-    async def check_name_appropriateness(player_name):
-        # Fallback: assume appropriate if AI module not available
-        print(f"Warning: No AI module available for name check, allowing '{player_name}'")
-        return True
+    startup_timings['ai_load'] = time.perf_counter() - started
+    for stage, seconds in module.INIT_TIMINGS.items():
+        startup_timings[f'ai_{stage}'] = seconds
+    stages = ' | '.join(f'{name} {seconds * 1000:.1f}' for name, seconds in module.INIT_TIMINGS.items())
+    print(f"AI module ready {startup_timings['ai_load'] * 1000:.1f} ms after the server came up ({stages} ms)")
+
+# Movement input is coalesced per client and applied once per tick
+input_coalescer = InputCoalescer(
+    max_inputs_per_second=float(os.environ.get('INPUT_RATE_LIMIT', 60)),
+    burst=float(os.environ.get('INPUT_RATE_BURST', 20)),
+)
+
+class GameSocketServer(socketio.AsyncServer):
+    """Socket.IO server that takes movement input off the event dispatch path"""
+
+    async def _handle_eio_message(self, eio_sid, data):
+        # move_player (and the binary input packet) only overwrite a direction vector,
+        # so skip the full packet decode and handler task and hand it to the coalescer
+        if eio_sid not in self._binary_packet:
+            move = decode_move_packet(data)
+            if move is not None:
+                sid = self.manager.sid_from_eio_sid(eio_sid, '/')
+                if sid in players:  # Spectators and clients that haven't joined have nothing to steer
+                    dx, dy, seq = move
+                    input_coalescer.offer(sid, dx, dy, seq)
+                return
+        await super()._handle_eio_message(eio_sid, data)
 
 # Create a Socket.IO server
-sio = socketio.AsyncServer(
+sio = GameSocketServer(
     cors_allowed_origins="*",  # Changed from ["*"] to "*" - string format works better
     cors_credentials=False,
     logger=False,  # Disable logging to reduce CORS error spam
@@ -40,6 +128,13 @@ sio = socketio.AsyncServer(
 app = aiohttp.web.Application()
 sio.attach(app)
 
+# Per-client outbound queues - snapshots are latest-wins, slow clients get evicted
+outbound = OutboundQueues(
+    sio,
+    max_buffered_bytes=int(os.environ.get('OUTBOUND_MAX_BUFFERED_BYTES', 1_000_000)),
+    evict_after=float(os.environ.get('OUTBOUND_EVICT_AFTER', 5.0)),
+)
+
 # Add CORS middleware
 @aiohttp.web.middleware
 async def cors_middleware(request, handler):
@@ -57,16 +152,34 @@ app.middlewares.append(cors_middleware)
 
 # Add static file serving
 async def health_check(request):
-    """Health check endpoint for OnRender"""
-    return aiohttp.web.Response(text='OK', content_type='text/plain')
+    """Health check endpoint - reports saturation so a proxy/autoscaler can route new sessions elsewhere"""
+    report = admission.saturation(len(players))
+    # Plain checks always get 200 so a busy machine isn't restarted; ?strict=1 returns 503 when full
+    status = 503 if report['state'] == 'full' and request.query.get('strict') else 200
+    response = aiohttp.web.json_response(report, status=status)
+    response.headers['X-Saturation'] = str(report['saturation'])
+    response.headers['X-Saturation-State'] = report['state']
+    return response
 
 async def test_endpoint(request):
     """Test endpoint to verify server is working"""
     status = {
         'status': 'running',
         'ai_available': AI_AVAILABLE,
+        'startup_ms': {name: round(seconds * 1000, 1) for name, seconds in startup_timings.items()},
         'players_count': len(players),
         'minions_count': len(minions),
+        'outbound': outbound.stats(),
+        'inputs': input_coalescer.stats(),
+        'governor': governor.stats(),
+        'admission': admission.stats(),
+        'leaderboard': leaderboard.stats(),
+        'density': density_grid.stats(),
+        'resumes': resume_stats,
+        'spectators': dict(spectator_stream.stats(), watching=len(spectators)),
+        'moderation': name_filter.stats(),
+        'physics': dict(physics_worker.stats() if physics_worker else {'engine': 'inline'}, restarts=physics_restarts),
+        'recording': recorder.stats() if recorder else None,
         'timestamp': time.time()
     }
     return aiohttp.web.json_response(status)
@@ -147,8 +260,27 @@ MAX_FLEET_SIZE = 50  # Maximum 50 minions per player
 INITIAL_SIZE = 50  # Initial size for respawned players
 # --- Constants for a professional, time-based physics model ---
 # Speeds are now in pixels per SECOND, not pixels per tick.
+TICK_RATE = int(os.environ.get('TICK_RATE', 60))  # Simulation steps per second
+MAX_DELTA_TIME = 0.1  # Longest step the simulation takes, so a lag spike can't fling fleets across the map
+SNAPSHOT_RATE = float(os.environ.get('SNAPSHOT_RATE', 20))  # Position snapshots per second; clients interpolate between them
 BASE_MAX_SPEED = 1200.0   # Base speed for minions (reduced from 2400.0 - was too fast)
 MIN_SPEED = 750.0         # Minimum speed (reduced from 1500.0 - was too fast)
+# 'swept' tests each minion's whole motion segment for the tick, so fast movers can't
+# tunnel through each other at low tick rates or when delta_time hits its clamp
+COLLISION_MODE = os.environ.get('COLLISION_MODE', 'swept')
+if COLLISION_MODE not in COLLISION_MODES:
+    print(f"Warning: unknown COLLISION_MODE '{COLLISION_MODE}', using 'swept'")
+    COLLISION_MODE = 'swept'
+COLLISION_CELL_SIZE = MINION_SIZE * 2  # Broad-phase grid cell size
+SEPARATION_QUALITY_THRESHOLD = 20  # Fleets bigger than this get cheaper separation when the server is overloaded
+# 'process' steps movement and collision detection in a worker process over shared memory,
+# keeping the event loop free for sockets; 'inline' runs them in the game loop (needed to record)
+PHYSICS_ENGINE = os.environ.get('PHYSICS_ENGINE', 'inline')
+if PHYSICS_ENGINE not in ('inline', 'process'):
+    print(f"Warning: unknown PHYSICS_ENGINE '{PHYSICS_ENGINE}', using 'inline'")
+    PHYSICS_ENGINE = 'inline'
+PHYSICS_CAPACITY = int(os.environ.get('PHYSICS_CAPACITY', 4096))  # Minion slots in the shared-memory world
+PHYSICS_RESTARTS = int(os.environ.get('PHYSICS_RESTARTS', 3))  # Worker crashes to recover from before staying inline
 
 # Original Matplotlib Pastel1 color palette for beautiful blob colors
 PASTEL_COLORS = [
@@ -162,6 +294,53 @@ PASTEL_COLORS = [
     "#fddaec",  # Light magenta
 ]
 collision_cooldowns = {}  # Track collision cooldowns
+sessions = {}  # session_token -> player id, for reattaching after restarts
+WORLD_STATE_PATH = os.environ.get(
+    'WORLD_STATE_PATH',
+    '/data/world_state.bin' if os.path.isdir('/data') else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'world_state.bin'),
+)
+MAX_NAME_LENGTH = int(os.environ.get('MAX_NAME_LENGTH', 64))  # Characters in a name a player types; the client allows 20
+RESTORE_GRACE_PERIOD = float(os.environ.get('RESTORE_GRACE_PERIOD', 60))  # Seconds restored fleets wait for their owner
+RECONNECT_GRACE_PERIOD = float(os.environ.get('RECONNECT_GRACE_PERIOD', 30))  # Seconds a dropped player's fleet is held (0 = remove at once)
+# Caches per-entity encodings between ticks, and remembers enough history to catch up reconnecting clients
+snapshot_builder = SnapshotBuilder(history_ticks=int((RECONNECT_GRACE_PERIOD + 5) * TICK_RATE))
+resume_stats = {'delta': 0, 'full_state': 0, 'delta_bytes': 0}
+leaderboard = Leaderboard(size=int(os.environ.get('LEADERBOARD_SIZE', 10)))  # Broadcast only when the ranking changes
+name_filter = NameFilter.from_files(  # Local blocklist/allowlist pass in front of the AI name check
+    os.environ.get('NAME_BLOCKLIST_PATH', DEFAULT_BLOCKLIST_PATH),
+    os.environ.get('NAME_ALLOWLIST_PATH', DEFAULT_ALLOWLIST_PATH),
+)
+NAME_CHECK_FAIL_OPEN = os.environ.get('NAME_CHECK_FAIL_OPEN', '1') != '0'  # Allow names the AI couldn't check
+density_grid = DensityGrid(WORLD_WIDTH, WORLD_HEIGHT, cell_size=float(os.environ.get('DENSITY_CELL_SIZE', 200)))  # Whole-world minimap
+DENSITY_RATE = float(os.environ.get('DENSITY_RATE', 2))  # Minimap grid broadcasts per second (only sent when it changed)
+SPECTATOR_ROOM = 'spectators'
+SPECTATOR_RATE = float(os.environ.get('SPECTATOR_RATE', 10))  # Shared spectator frames per second
+MAX_SPECTATORS = int(os.environ.get('MAX_SPECTATORS', 1000))
+spectators = set()  # sids connected with auth={'spectate': true}; they never join the game
+spectator_stream = SpectatorStream(quantum=float(os.environ.get('SPECTATOR_QUANTUM', 2)))  # Positions rounded to this many world units
+server_tick = 0  # Incremented once per simulation step, stamped on every snapshot
+
+# Injectable time and randomness: everything that shapes the world reads these instead of
+# time.time()/random, so a recorded session can be replayed exactly (see replay.py)
+SIM_SEED = int(os.environ.get('SIM_SEED') or random.SystemRandom().randrange(2**32))
+clock = time.time
+rng = random.Random(SIM_SEED)  # Colors and spawn points
+fallback_rng = random.Random(SIM_SEED + 1)  # Collision verdicts while the AI is unavailable
+RECORD_SESSION_DIR = os.environ.get('RECORD_SESSION_DIR')  # Record every session here when set
+recorder = None  # SessionRecorder while recording
+fleet_physics = FleetPhysics(WORLD_WIDTH, WORLD_HEIGHT, BASE_MAX_SPEED, SEPARATION_QUALITY_THRESHOLD)
+physics_worker = None  # PhysicsWorker when PHYSICS_ENGINE is 'process'
+physics_step_time = None  # clock() when the worker's running step was started
+physics_restarts = 0  # Times the physics worker died and was replaced
+# Sheds load (snapshot rate, then area of interest, then separation quality) when ticks overrun
+governor = TickGovernor(tick_budget=1 / TICK_RATE, levels=build_levels(SNAPSHOT_RATE))
+# Queues or turns away new players when tick headroom, population or bandwidth runs out
+admission = AdmissionController(
+    governor,
+    outbound,
+    max_players=int(os.environ.get('MAX_PLAYERS', 50)),
+    max_bytes_per_second=float(os.environ.get('MAX_OUTBOUND_BYTES_PER_SECOND', 5_000_000)),
+)
 
 class Minion:
     def __init__(self, minion_id, original_name, owner_id, x, y, color):
@@ -170,6 +349,8 @@ class Minion:
         self.owner_id = owner_id  # Which player currently owns this minion
         self.x = x
         self.y = y
+        self.prev_x = x  # Position at the start of the current tick (for swept collisions)
+        self.prev_y = y
         self.size = MINION_SIZE
         self.color = color
         self.direction_dx = 0
@@ -182,8 +363,9 @@ class Minion:
         self.invulnerable_until = 0
         self.respawn_time = 0
         
-    def to_dict(self):
-        current_time = time.time()
+    def to_dict(self, current_time=None):
+        if current_time is None:
+            current_time = clock()
         is_invulnerable = current_time - self.last_infection_time < 2.0
         
         return {
@@ -199,21 +381,27 @@ class Minion:
         }
 
 class Player:
-    def __init__(self, player_id, name):
+    def __init__(self, player_id, name, spawn_fleet=True):
         self.id = player_id
         self.name = name
-        self.color = random.choice(PASTEL_COLORS)
+        self.color = rng.choice(PASTEL_COLORS)
         self.direction_dx = 0
         self.direction_dy = 0
+        self.session_token = uuid.uuid4().hex  # Lets a reconnecting client reclaim this fleet
+        self.detached_until = 0  # While no socket owns this player: time after which it is removed
         
-        # Create fleet of minions
-        self.create_fleet()
+        # Create fleet of minions (skipped when restoring a saved world)
+        if spawn_fleet:
+            self.create_fleet()
         
-    def create_fleet(self):
+    def create_fleet(self, current_time=None):
         """Create 5 minions for this player in a cluster formation"""
+        if current_time is None:
+            current_time = clock()
+        
         # Find a good spawn location
-        center_x = random.randint(100, WORLD_WIDTH - 100)
-        center_y = random.randint(100, WORLD_HEIGHT - 100)
+        center_x = rng.randint(100, WORLD_WIDTH - 100)
+        center_y = rng.randint(100, WORLD_HEIGHT - 100)
         
         for i in range(FLEET_SIZE):
             # Arrange minions in a circular formation
@@ -221,7 +409,7 @@ class Player:
             offset_x = math.cos(angle) * 50  # 50 pixel radius
             offset_y = math.sin(angle) * 50
             
-            minion_id = f"{self.id}_minion_{i}_{int(time.time() * 1000000)}"
+            minion_id = f"{self.id}_minion_{i}_{int(current_time * 1000000)}"
             minion = Minion(
                 minion_id=minion_id,
                 original_name=self.name,
@@ -250,8 +438,13 @@ class Player:
     
     def to_dict(self):
         owned_minions = self.get_owned_minions()
-        center_x, center_y = self.get_fleet_center()
+        if owned_minions:
+            center_x = sum(m.x for m in owned_minions) / len(owned_minions)
+            center_y = sum(m.y for m in owned_minions) / len(owned_minions)
+        else:
+            center_x, center_y = 0, 0
         
+        # Minions are sent once in 'all_minions'; summaries only reference them by id
         return {
             'id': self.id,
             'name': self.name,
@@ -259,24 +452,59 @@ class Player:
             'minion_count': len(owned_minions),
             'fleet_center_x': center_x,
             'fleet_center_y': center_y,
-            'minions': [m.to_dict() for m in owned_minions],
+            'minion_ids': [m.id for m in owned_minions],
         }
 
+def encode_game_state():
+    """Encode the whole world, stamped with the current tick and monotonic server time"""
+    return snapshot_builder.build(players, minions, extra={
+        'tick': server_tick,
+        'server_time': time.monotonic(),
+    }, tick=server_tick)
+
+def queue_game_state_snapshot(aoi_radius=None):
+    """Queue the per-tick snapshot, limited to each player's area of interest when a radius is set
+
+    Per-tick snapshots carry minions only - the roster travels in join/leave/rename
+    events and fleet sizes in the 'leaderboard' event, which only ranks the top fleets.
+    ``max_fleets`` lists everyone at MAX_FLEET_SIZE so clients can mark those fleets.
+    """
+    extra = {
+        'tick': server_tick,
+        'server_time': time.monotonic(),
+        'max_fleets': leaderboard.at_least(MAX_FLEET_SIZE),
+    }
+    if aoi_radius is None:
+        outbound.queue_snapshot('update_game_state', snapshot_builder.build(players, minions, extra=extra, include_players=False, tick=server_tick))
+        return
+    
+    views, full = snapshot_builder.build_area_of_interest(players, minions, aoi_radius, extra=extra, include_players=False, tick=server_tick)
+    for sid, payload in views.items():
+        outbound.queue_snapshot('update_game_state', payload, to=sid)
+    # Players without a fleet and clients still in the menu get the whole world
+    outbound.queue_snapshot('update_game_state', full, skip_sid=set(views))
+
+async def broadcast_spectator_frame(current_time):
+    """Encode the spectator view once and send it to the whole spectator room"""
+    frame = spectator_stream.build(players, minions, current_time, extra={
+        'tick': server_tick,
+        'server_time': time.monotonic(),
+    })
+    await outbound.broadcast('spectator_state', frame, SPECTATOR_ROOM)
+
 def check_minion_collision(minion1, minion2):
-    """Check if two minions are colliding"""
-    dx = minion1.x - minion2.x
-    dy = minion1.y - minion2.y
-    distance = math.sqrt(dx**2 + dy**2)
-    return distance < (minion1.size + minion2.size) / 2
+    """Check if two minions are colliding (anywhere along this tick's movement in swept mode)"""
+    if COLLISION_MODE == 'swept':
+        return swept_circles_collide(minion1, minion2)
+    return circles_overlap(minion1, minion2)
 
-async def handle_minion_collision(minion1, minion2):
+async def handle_minion_collision(minion1, minion2, current_time):
     """Handle collision between two minions - winner infects loser"""
     # Don't handle collision if minions have same owner
     if minion1.owner_id == minion2.owner_id:
         return
 
     # Check if either minion is invulnerable
-    current_time = time.time()
     if (current_time - minion1.last_infection_time < 2.0 or 
         current_time - minion2.last_infection_time < 2.0):
         return
@@ -303,7 +531,7 @@ async def handle_minion_collision(minion1, minion2):
     print(f"AI determined '{winner.original_name}' wins over '{original_loser_name}' - infecting!")
     
     # Preserve the loser's data before it's changed
-    loser_dict = loser.to_dict()
+    loser_dict = loser.to_dict(current_time)
     loser_dict['original_name'] = original_loser_name
 
     # Store the old owner ID for elimination check
@@ -315,10 +543,11 @@ async def handle_minion_collision(minion1, minion2):
         
         # Remove the losing minion completely
         del minions[loser.id]
+        leaderboard.adjust(old_owner_id, -1)
         
         # Emit a special event for max fleet size kill
-        await sio.emit('infection_happened', {
-            'winner': winner.to_dict(),
+        outbound.queue_reliable('infection_happened', {
+            'winner': winner.to_dict(current_time),
             'loser': loser_dict,
             'max_fleet_kill': True
         })
@@ -330,10 +559,12 @@ async def handle_minion_collision(minion1, minion2):
         loser.original_name = winner.original_name  # Infected minion takes on winner's name
         loser.last_infection_time = current_time  # Set invulnerability period
         loser.can_infect_after = current_time + 1.5  # Prevent newly infected minion from infecting for 1.5 seconds
+        leaderboard.adjust(winner.owner_id, 1)
+        leaderboard.adjust(old_owner_id, -1)
         
         # Emit infection event with correct original names
-        await sio.emit('infection_happened', {
-            'winner': winner.to_dict(),
+        outbound.queue_reliable('infection_happened', {
+            'winner': winner.to_dict(current_time),
             'loser': loser_dict,
             'max_fleet_kill': False
         })
@@ -359,82 +590,183 @@ async def handle_minion_collision(minion1, minion2):
         for m_id in minions_to_remove_by_name:
             del minions[m_id]
             print(f'Removed infected minion with original name: {m_id}')
+        leaderboard.sync(players, minions)
         
         # Send updated game state to ALL players to ensure ghost minions are removed
-        game_state_data = {
-            'players': [p.to_dict() for p in players.values()],
-            'world': {'width': WORLD_WIDTH, 'height': WORLD_HEIGHT},
-            'all_minions': [m.to_dict() for m in minions.values()],
-        }
+        game_state_data = encode_game_state()
         
         # Emit elimination event first with eliminator info
-        await sio.emit('player_eliminated', {
+        outbound.queue_reliable('player_eliminated', {
             'player_id': old_owner_id,
             'player_name': old_owner.name,
             'eliminated_by': eliminator_name
         })
         
         # Then send updated game state to all players
-        await sio.emit('update_game_state', {
-            'players': game_state_data['players'],
-            'all_minions': game_state_data['all_minions']
-        })
+        outbound.queue_snapshot('update_game_state', game_state_data)
         
         print(f'Player {old_owner.name} has been eliminated by {eliminator_name}! Removed all associated minions.')
 
 @sio.event
-async def connect(sid, environ):
+async def connect(sid, environ, auth=None):
+    if isinstance(auth, dict) and auth.get('spectate'):
+        await add_spectator(sid)
+        return
     print(f'Client {sid} connected')
+    outbound.add_client(sid)
     print(f'Connection details: {environ.get("HTTP_USER_AGENT", "Unknown")}')
     print(f'Remote address: {environ.get("REMOTE_ADDR", "Unknown")}')
     print(f'HTTP headers: {dict(environ)}')
 
+async def add_spectator(sid):
+    """Put a client in the spectator room instead of the player broadcast set"""
+    if len(spectators) >= MAX_SPECTATORS:
+        raise socketio.exceptions.ConnectionRefusedError('Too many spectators right now, please try again later.')
+    spectators.add(sid)
+    await sio.enter_room(sid, SPECTATOR_ROOM)
+    await sio.emit('spectating', {
+        'world': {'width': WORLD_WIDTH, 'height': WORLD_HEIGHT},
+        'rate': SPECTATOR_RATE,
+    }, room=sid)
+    print(f'Spectator {sid} connected ({len(spectators)} watching)')
+
 @sio.event
 async def disconnect(sid):
+    if sid in spectators:
+        spectators.discard(sid)
+        input_coalescer.remove_client(sid)
+        print(f'Spectator {sid} disconnected ({len(spectators)} watching)')
+        return
     print(f'Client {sid} disconnected')
-    if sid in players:
-        player_name = players[sid].name
-        print(f'Player {player_name} disconnected - comprehensive cleanup')
-        
-        # Comprehensive cleanup: Remove ALL minions associated with this player
-        # 1. Remove minions owned by this player
-        minions_to_remove = [m_id for m_id, m in minions.items() if m.owner_id == sid]
-        for m_id in minions_to_remove:
-            del minions[m_id]
-            print(f'Removed owned minion: {m_id}')
-        
-        # 2. Remove minions with the disconnected player's name as original_name (infected minions)
-        minions_to_remove_by_name = [m_id for m_id, m in minions.items() if m.original_name == player_name]
-        for m_id in minions_to_remove_by_name:
-            del minions[m_id]
-            print(f'Removed infected minion with original name: {m_id}')
-        
-        del players[sid]
-        
-        # Send updated game state to all remaining players
-        game_state_data = {
-            'players': [p.to_dict() for p in players.values()],
-            'world': {'width': WORLD_WIDTH, 'height': WORLD_HEIGHT},
-            'all_minions': [m.to_dict() for m in minions.values()],
-        }
-        
-        await sio.emit('player_left', {'player_id': sid})
-        await sio.emit('update_game_state', {
-            'players': game_state_data['players'],
-            'all_minions': game_state_data['all_minions']
-        })
-        
-        print(f'Player {player_name} removed from game - all associated minions cleaned up')
+    outbound.remove_client(sid)
+    input_coalescer.remove_client(sid)
+    admission.cancel(sid)
+    if sid in players and RECONNECT_GRACE_PERIOD > 0:
+        detach_player(sid)
+    elif sid in players:
+        print(f'Player {players[sid].name} disconnected - comprehensive cleanup')
+        remove_player(sid)
     else:
         print(f'Client {sid} disconnected without joining game')
 
+def detach_player(player_id):
+    """Hold a dropped player's fleet for RECONNECT_GRACE_PERIOD in case they resume their session"""
+    player = players[player_id]
+    player.direction_dx = 0  # The fleet idles while its owner is away
+    player.direction_dy = 0
+    player.detached_until = clock() + RECONNECT_GRACE_PERIOD
+    print(f'Player {player.name} disconnected - holding their fleet for {RECONNECT_GRACE_PERIOD:g}s')
+
+def remove_player(player_id):
+    """Remove a player and every minion associated with them, and tell everyone"""
+    if recorder:
+        recorder.leave(player_id)
+    player = players[player_id]
+    player_name = player.name
+    
+    # Comprehensive cleanup: Remove ALL minions associated with this player
+    # 1. Remove minions owned by this player
+    minions_to_remove = [m_id for m_id, m in minions.items() if m.owner_id == player_id]
+    for m_id in minions_to_remove:
+        del minions[m_id]
+        print(f'Removed owned minion: {m_id}')
+    
+    # 2. Remove minions with the disconnected player's name as original_name (infected minions)
+    minions_to_remove_by_name = [m_id for m_id, m in minions.items() if m.original_name == player_name]
+    for m_id in minions_to_remove_by_name:
+        del minions[m_id]
+        print(f'Removed infected minion with original name: {m_id}')
+    
+    del players[player_id]
+    sessions.pop(player.session_token, None)
+    if minions_to_remove_by_name:
+        leaderboard.sync(players, minions)  # Other fleets lost minions too
+    else:
+        leaderboard.remove(player_id)
+    
+    # Clients drop the fleet themselves; the next regular snapshot confirms it
+    outbound.queue_reliable('player_left', {'player_id': player_id})
+    
+    print(f'Player {player_name} removed from game - all associated minions cleaned up')
+
+def reattach_player(player, sid):
+    """Move a detached player (and their fleet) over to a new socket id"""
+    old_id = player.id
+    if recorder:
+        recorder.reattach(old_id, sid)
+    del players[old_id]
+    for minion in minions.values():
+        if minion.owner_id == old_id:
+            minion.owner_id = sid
+    player.id = sid
+    player.detached_until = 0
+    players[sid] = player
+    sessions[player.session_token] = sid
+    leaderboard.rekey(old_id, sid)
+    outbound.queue_reliable('player_reattached', {'old_id': old_id, 'player': player.to_dict()}, skip_sid=sid)
+
+def reap_detached_players(current_time):
+    """Remove detached players whose owner didn't come back in time"""
+    expired = [p.id for p in players.values() if p.detached_until and current_time >= p.detached_until]
+    for player_id in expired:
+        print(f'Player {players[player_id].name} was not reclaimed in time')
+        remove_player(player_id)
+
+@sio.event
+async def resume_session(sid, data):
+    """Reattach a reconnecting client to the fleet its session token belongs to"""
+    token = (data or {}).get('token')
+    since_tick = (data or {}).get('last_tick')
+    player_id = sessions.get(token)
+    player = players.get(player_id) if player_id else None
+    if player is None or not player.detached_until or sid in players or sid in spectators:
+        await sio.emit('resume_failed', {}, room=sid)
+        return
+    
+    reattach_player(player, sid)
+    outbound.queue_reliable('session_resumed', {'player_id': sid, 'token': token}, to=sid)
+    
+    # A client that still has the world from a recent tick only needs what changed since
+    delta = None
+    if isinstance(since_tick, int):
+        delta = snapshot_builder.build_delta(players, minions, since_tick, server_tick, extra={
+            'tick': server_tick,
+            'server_time': time.monotonic(),
+        })
+    if delta is not None:
+        resume_stats['delta'] += 1
+        resume_stats['delta_bytes'] += len(delta.json)
+        outbound.queue_reliable('resume_delta', delta, to=sid)
+    else:
+        resume_stats['full_state'] += 1
+        outbound.queue_reliable('game_state', encode_game_state().with_fields(world={'width': WORLD_WIDTH, 'height': WORLD_HEIGHT}), to=sid)
+    outbound.queue_reliable('leaderboard', {'entries': leaderboard.entries()}, to=sid)
+    outbound.queue_snapshot('density', density_grid.encode(players), to=sid)
+    print(f'Player {player.name} resumed their session as {sid}')
+
+def add_player(sid, player_name, current_time):
+    """Create a player with a fresh fleet"""
+    if recorder:
+        recorder.join(current_time, sid, player_name)
+    player = Player(sid, player_name, spawn_fleet=False)
+    player.create_fleet(current_time)
+    players[sid] = player
+    sessions[player.session_token] = sid
+    leaderboard.add(sid, player_name, FLEET_SIZE)
+    return player
+
 @sio.event
 async def join_game(sid, data):
+    if sid in spectators:
+        return
     player_name = data.get('name', '').strip()
     
     if not player_name:
         await sio.emit('join_failed', {'message': 'Please enter a name.'}, room=sid)
         return
+    if len(player_name) > MAX_NAME_LENGTH:
+        await sio.emit('join_failed', {'message': f'Names can be at most {MAX_NAME_LENGTH} characters.'}, room=sid)
+        return
 
     # Check if name is appropriate
     is_appropriate = await check_name_appropriateness(player_name)
@@ -442,43 +774,52 @@ async def join_game(sid, data):
         await sio.emit('join_failed', {'message': 'Please be civil and PG in your naming. Spread love, not hate. The world is a nasty place. As creators, our goal is to make it a better one. Got it? Good luck and have fun!'}, room=sid)
         return
 
+    # Check server capacity - queue the player if busy, turn them away if full
+    async def notify_queued(position):
+        await sio.emit('join_queued', {'position': position}, room=sid)
+    
+    admitted, retry_after = await admission.admit(sid, lambda: len(players), notify_queued)
+    if not admitted:
+        if retry_after:
+            await sio.emit('join_failed', {
+                'message': f'The server is full right now. Please try again in {retry_after} seconds.',
+                'retry_after': retry_after,
+            }, room=sid)
+        return
+
     # Check if name is already in use
     existing_names = {p.name for p in players.values()}
     if player_name in existing_names:
         await sio.emit('join_failed', {'message': f'The name "{player_name}" is already taken.'}, room=sid)
         return
     
-    player = Player(sid, player_name)
-    players[sid] = player
+    player = add_player(sid, player_name, clock())
+    
+    # Token to reclaim this fleet after a reconnect or server restart
+    outbound.queue_reliable('session', {'token': player.session_token}, to=sid)
     
     # Send current game state to new player
-    game_state_data = {
-        'players': [p.to_dict() for p in players.values()],
-        'world': {'width': WORLD_WIDTH, 'height': WORLD_HEIGHT},
-        'all_minions': [m.to_dict() for m in minions.values()],
-    }
-    await sio.emit('game_state', game_state_data, room=sid)
+    game_state_data = encode_game_state()
+    outbound.queue_reliable('game_state', game_state_data.with_fields(world={'width': WORLD_WIDTH, 'height': WORLD_HEIGHT}), to=sid)
+    outbound.queue_reliable('leaderboard', {'entries': leaderboard.entries()}, to=sid)
+    outbound.queue_snapshot('density', density_grid.encode(players), to=sid)
     
     # Send updated game state to ALL other players so they can see the new player and their minions
-    await sio.emit('update_game_state', {
-        'players': game_state_data['players'],
-        'all_minions': game_state_data['all_minions']
-    }, skip_sid=sid)
+    outbound.queue_snapshot('update_game_state', game_state_data, skip_sid=sid)
     
     # Also send the join message for chat
-    await sio.emit('player_joined', player.to_dict(), skip_sid=sid)
+    outbound.queue_reliable('player_joined', player.to_dict(), skip_sid=sid)
     
     print(f'Player {player_name} joined the game with {FLEET_SIZE} minions')
 
 @sio.event
 async def move_player(sid, data):
-    if sid not in players:
+    # Normally intercepted by GameSocketServer; this handles anything that slips past it
+    if sid not in players or not isinstance(data, dict):
         return
         
-    player = players[sid]
-    # Client sends a direction vector {dx, dy}
-    player.direction_dx = data.get('dx', 0)
-    player.direction_dy = data.get('dy', 0)
+    # Client sends a direction vector {dx, dy, seq}; offer() drops it unless dx/dy are finite numbers
+    input_coalescer.offer(sid, data.get('dx', 0), data.get('dy', 0), sequence_number(data.get('seq')))
 
 @sio.event
 async def change_name(sid, data):
@@ -486,7 +827,6 @@ async def change_name(sid, data):
     if sid not in players:
         return
         
-    player = players[sid]
     new_name = data.get('name', '').strip()
     
     if not new_name:
@@ -496,6 +836,11 @@ async def change_name(sid, data):
     is_adjective_collection = data.get('from_adjective_collection', False)
     
     if not is_adjective_collection:
+        # Adjectives pile up on a name with every pickup, so only typed names are capped
+        if len(new_name) > MAX_NAME_LENGTH:
+            await sio.emit('name_change_failed', {'message': f'Names can be at most {MAX_NAME_LENGTH} characters.'}, room=sid)
+            return
+
         # Check if name is appropriate (only for user-entered names)
         is_appropriate = await check_name_appropriateness(new_name)
         if not is_appropriate:
@@ -508,6 +853,13 @@ async def change_name(sid, data):
         await sio.emit('name_change_failed', {'message': f'The name "{new_name}" is already taken.'}, room=sid)
         return
     
+    rename_player(sid, new_name, clock())
+
+def rename_player(sid, new_name, current_time):
+    """Rename a player (respawning them if they have been eliminated) and tell everyone"""
+    if recorder:
+        recorder.rename(current_time, sid, new_name)
+    player = players[sid]
     old_name = player.name
     player.name = new_name
     
@@ -535,30 +887,24 @@ async def change_name(sid, data):
             del minions[m_id]
         
         # Create new fleet for respawned player
-        player.color = random.choice(PASTEL_COLORS)  # Get new color
-        player.create_fleet()
+        player.color = rng.choice(PASTEL_COLORS)  # Get new color
+        player.create_fleet(current_time)
+        leaderboard.sync(players, minions)
         
         # Emit respawn event to trigger frontend cleanup
-        await sio.emit('player_respawned', {
+        outbound.queue_reliable('player_respawned', {
             'player_id': sid,
             'player_name': new_name
         })
         
         # Send updated game state to ALL players to ensure synchronization
-        game_state_data = {
-            'players': [p.to_dict() for p in players.values()],
-            'world': {'width': WORLD_WIDTH, 'height': WORLD_HEIGHT},
-            'all_minions': [m.to_dict() for m in minions.values()],
-        }
+        game_state_data = encode_game_state()
         
         # Send to the respawned player first
-        await sio.emit('game_state', game_state_data, room=sid)
+        outbound.queue_reliable('game_state', game_state_data.with_fields(world={'width': WORLD_WIDTH, 'height': WORLD_HEIGHT}), to=sid)
         
         # Send to all other players as well to keep everyone in sync
-        await sio.emit('update_game_state', {
-            'players': game_state_data['players'],
-            'all_minions': game_state_data['all_minions']
-        }, skip_sid=sid)
+        outbound.queue_snapshot('update_game_state', game_state_data, skip_sid=sid)
         
         print(f'Player {new_name} respawned with {FLEET_SIZE} new minions')
     elif not same_name:
@@ -566,22 +912,16 @@ async def change_name(sid, data):
         for minion in minions.values():
             if minion.original_name == old_name:
                 minion.original_name = new_name
+        leaderboard.rename(sid, new_name)
         
         # Send updated game state to ALL players to ensure synchronization
-        game_state_data = {
-            'players': [p.to_dict() for p in players.values()],
-            'world': {'width': WORLD_WIDTH, 'height': WORLD_HEIGHT},
-            'all_minions': [m.to_dict() for m in minions.values()],
-        }
+        game_state_data = encode_game_state()
         
         # Send to all players to keep everyone in sync
-        await sio.emit('update_game_state', {
-            'players': game_state_data['players'],
-            'all_minions': game_state_data['all_minions']
-        })
+        outbound.queue_snapshot('update_game_state', game_state_data)
         
         # Also send the name change notification for chat
-        await sio.emit('player_name_changed', {
+        outbound.queue_reliable('player_name_changed', {
             'player_id': sid,
             'old_name': old_name,
             'new_name': new_name
@@ -607,8 +947,13 @@ async def respawn_player(sid, data):
     if sid not in players:
         return
         
+    respawn_fleet(sid, clock())
+
+def respawn_fleet(sid, current_time):
+    """Replace a player's fleet with a fresh one and tell everyone"""
+    if recorder:
+        recorder.respawn(current_time, sid)
     player = players[sid]
-    current_time = time.time()
     
     # Comprehensive cleanup: Remove ALL minions associated with this player
     # 1. Remove minions owned by this player
@@ -629,35 +974,29 @@ async def respawn_player(sid, data):
     
     # Respawn the player
     player.is_dead = False
-    player.color = random.choice(PASTEL_COLORS)
+    player.color = rng.choice(PASTEL_COLORS)
     
     # Create new fleet for respawned player
-    player.create_fleet()
+    player.create_fleet(current_time)
+    leaderboard.sync(players, minions)
     
     # Give 3 seconds of invulnerability
     player.invulnerable_until = current_time + 3.0
     
     # Emit respawn event to trigger frontend cleanup
-    await sio.emit('player_respawned', {
+    outbound.queue_reliable('player_respawned', {
         'player_id': sid,
         'player_name': player.name
     })
     
     # Send updated game state to ALL players to ensure synchronization
-    game_state_data = {
-        'players': [p.to_dict() for p in players.values()],
-        'world': {'width': WORLD_WIDTH, 'height': WORLD_HEIGHT},
-        'all_minions': [m.to_dict() for m in minions.values()],
-    }
+    game_state_data = encode_game_state()
     
     # Send to the respawned player first
-    await sio.emit('game_state', game_state_data, room=sid)
+    outbound.queue_reliable('game_state', game_state_data.with_fields(world={'width': WORLD_WIDTH, 'height': WORLD_HEIGHT}), to=sid)
     
     # Send to all other players as well to keep everyone in sync
-    await sio.emit('update_game_state', {
-        'players': game_state_data['players'],
-        'all_minions': game_state_data['all_minions']
-    }, skip_sid=sid)
+    outbound.queue_snapshot('update_game_state', game_state_data, skip_sid=sid)
     
     print(f'Player {player.name} respawned with {FLEET_SIZE} new minions')
 
@@ -669,221 +1008,308 @@ async def connect_error(sid, data):
 async def error(sid, data):
     print(f'Error for {sid}: {data}')
 
+async def simulate_tick(current_time, delta_time, separation_stride):
+    """Advance the world by one step: fleet movement, then minion collisions.
+
+    The outcome depends only on the arguments, the world, player input and collision
+    verdicts - which is what lets replay.py re-run a recorded session exactly.
+    """
+    # --- Minion Movement ---
+    # Remember where every minion started this tick for swept collision tests
+    for minion in minions.values():
+        minion.prev_x = minion.x
+        minion.prev_y = minion.y
+    
+    for player in players.values():
+        owned_minions = player.get_owned_minions()
+        
+        if not owned_minions:
+            continue  # Player has no minions left
+        
+        speed_multiplier = fleet_physics.move_fleet(owned_minions, player.direction_dx, player.direction_dy,
+                                                    delta_time, separation_stride)
+        
+        # Debug output (can be removed later)
+        minion_count = len(owned_minions)
+        if speed_multiplier is not None and minion_count != getattr(player, '_last_logged_count', -1):
+            print(f'Player {player.name}: {minion_count} minions, speed multiplier: {speed_multiplier:.2f}x')
+            player._last_logged_count = minion_count
+
+    # --- Minion Collision Detection ---
+    minion_list = list(minions.values())
+    # Grid broad phase - only pairs whose (swept) bounds share a cell are tested
+    pairs = [(minion_list[i], minion_list[j])
+             for i, j in candidate_pairs(minion_list, COLLISION_CELL_SIZE, swept=COLLISION_MODE == 'swept')
+             if check_minion_collision(minion_list[i], minion_list[j])]
+    await resolve_collisions(pairs, current_time)
+
+async def resolve_collisions(pairs, current_time):
+    """Let touching minions infect each other, pair by pair; ``pairs`` have already passed check_minion_collision"""
+    for minion1, minion2 in pairs:
+        try:
+            # Skip if either minion no longer exists or same owner
+            if (minion1.id not in minions or minion2.id not in minions or 
+                minion1.owner_id == minion2.owner_id):
+                continue
+            
+            # Check collision cooldown
+            collision_key = f"{minion1.id}-{minion2.id}"
+            
+            if collision_key in collision_cooldowns:
+                if current_time - collision_cooldowns[collision_key] < 1.0:  # 1 second cooldown
+                    continue
+            
+            # Check invulnerability periods (2 second invulnerability after infection)
+            minion1_vulnerable = current_time - minion1.last_infection_time > 2.0
+            minion2_vulnerable = current_time - minion2.last_infection_time > 2.0
+            
+            # Only allow infection if both minions are vulnerable
+            if minion1_vulnerable and minion2_vulnerable:
+                # Set cooldown
+                collision_cooldowns[collision_key] = current_time
+                
+                await handle_minion_collision(minion1, minion2, current_time)
+        except Exception as e:
+            print(f"Error in minion collision detection: {e}")
+            continue
+
+async def step_physics_worker(current_time, delta_time, separation_stride):
+    """PHYSICS_ENGINE=process: take the worker's finished step, start the next, then resolve its collisions.
+    
+    Never waits for the worker - if it's still busy the world holds still for this tick, and
+    the next step covers the time since the last one started instead of just one tick.
+    """
+    global physics_step_time
+    try:
+        collisions = physics_worker.collect()
+        if collisions is None:
+            return
+        if physics_step_time is not None:
+            delta_time = min(current_time - physics_step_time, MAX_DELTA_TIME)
+        physics_step_time = current_time
+        physics_worker.start(players, minions, delta_time, separation_stride)
+    except PhysicsWorkerDied as e:
+        print(f'Error in physics worker: {e}')
+        replace_physics_worker()
+        return
+    await resolve_collisions(collisions, current_time)
+
 async def game_loop():
     """Main game loop - fleet-based movement and minion collision detection"""
-    last_time = time.time()
+    global server_tick
+    last_time = clock()
+    last_snapshot_time = 0.0
+    last_spectator_time = 0.0
+    last_density_time = 0.0
+    last_reap_time = 0.0
     
     while True:
+        server_tick += 1
+        tick_started = time.perf_counter()
+        ai_wait_before = ai_wait_time
+        settings = governor.settings  # Current degradation level
+        
         # --- Delta Time Calculation ---
-        current_time = time.time()
+        current_time = clock()
         delta_time = current_time - last_time
         last_time = current_time
         # Clamp delta_time to prevent huge jumps if server has a major lag spike
-        delta_time = min(delta_time, 0.1)
+        delta_time = min(delta_time, MAX_DELTA_TIME)
+        
+        # Apply the newest movement input from each client
+        input_coalescer.apply(players)
+        if recorder:
+            recorder.inputs(players)
+        
+        # Drop restored fleets nobody came back for
+        if current_time - last_reap_time >= 1.0:
+            last_reap_time = current_time
+            reap_detached_players(current_time)
 
-        # --- Minion Movement ---
+        # --- Minion Movement and Collisions ---
         if len(players) >= 1:
-            for player in players.values():
-                owned_minions = player.get_owned_minions()
-                
-                if not owned_minions:
-                    continue  # Player has no minions left
-                
-                # Calculate fleet center for cohesion force
-                fleet_center_x, fleet_center_y = player.get_fleet_center()
-                
-                # Calculate movement for all owned minions
-                direction_magnitude = math.sqrt(player.direction_dx**2 + player.direction_dy**2)
-                
-                if direction_magnitude > 1:  # If the cursor is not on the player
-                    # Calculate fleet size speed multiplier
-                    # Highest speed: 1.0x (baseline)
-                    # Worst case: 0.95x (95% of highest speed) - much less severe debuff
-                    minion_count = len(owned_minions)
-                    if minion_count <= 3:
-                        # Small fleets are very agile (1.0x speed)
-                        speed_multiplier = 1.0
-                    elif minion_count <= 8:
-                        # Medium fleets have very slight speed reduction
-                        speed_multiplier = 1.0 - (minion_count - 3) * 0.005  # 1.0x -> 0.975x
-                    else:
-                        # Large fleets are only slightly slower, capped at 0.95x minimum
-                        speed_multiplier = max(0.95, 0.975 - (minion_count - 8) * 0.002)
-                    
-                    # Calculate displacement based on speed, time, and fleet size
-                    displacement = BASE_MAX_SPEED * delta_time * speed_multiplier
-                    
-                    # Debug output (can be removed later)
-                    if minion_count != getattr(player, '_last_logged_count', -1):
-                        print(f'Player {player.name}: {minion_count} minions, speed multiplier: {speed_multiplier:.2f}x')
-                        player._last_logged_count = minion_count
-                    
-                    # Move each minion towards the target with some spread
-                    for i, minion in enumerate(owned_minions):
-                        # Add some variation to prevent all minions from stacking
-                        spread_angle = (i / len(owned_minions)) * 2 * math.pi
-                        spread_radius = 20
-                        spread_x = math.cos(spread_angle) * spread_radius
-                        spread_y = math.sin(spread_angle) * spread_radius
-                        
-                        # Calculate direction with spread
-                        target_dx = player.direction_dx + spread_x
-                        target_dy = player.direction_dy + spread_y
-                        target_magnitude = math.sqrt(target_dx**2 + target_dy**2)
-                        
-                        # Add cohesion force toward fleet center (natural blob gravity)
-                        cohesion_dx = fleet_center_x - minion.x
-                        cohesion_dy = fleet_center_y - minion.y
-                        cohesion_distance = math.sqrt(cohesion_dx**2 + cohesion_dy**2)
-                        
-                        # Apply cohesion force - natural blob attraction
-                        if cohesion_distance > 0:
-                            # Stronger attraction for closer blobs (like surface tension)
-                            if cohesion_distance < 80:
-                                # Close to center - strong natural attraction
-                                cohesion_strength = min(cohesion_distance / 120, 0.6)  # Strong but not excessive
-                            else:
-                                # Farther away - moderate attraction to stay together
-                                cohesion_strength = min(cohesion_distance / 100, 0.7)  # Moderate pull
-                            
-                            cohesion_dx = (cohesion_dx / cohesion_distance) * cohesion_strength * displacement
-                            cohesion_dy = (cohesion_dy / cohesion_distance) * cohesion_strength * displacement
-                        else:
-                            cohesion_dx = cohesion_dy = 0
-                        
-                        # Add separation force from other minions in the same fleet - FLUID BLOB behavior
-                        separation_dx = 0
-                        separation_dy = 0
-                        
-                        # Smaller separation radius for more natural clustering (like fluid blobs)
-                        separation_radius = minion.size * 1.3  # Much closer together for blob-like feel
-                        
-                        for other_minion in owned_minions:
-                            if other_minion.id != minion.id:
-                                dx = minion.x - other_minion.x
-                                dy = minion.y - other_minion.y
-                                distance = math.sqrt(dx**2 + dy**2)
-                                
-                                # Only separate when actually overlapping (like squishy blobs)
-                                if distance < separation_radius and distance > 0:
-                                    # Gentle, elastic separation (like bouncing fluid blobs)
-                                    separation_strength = (separation_radius - distance) / separation_radius
-                                    
-                                    # Soft bounce effect - stronger when very close but not harsh
-                                    if distance < minion.size * 0.8:
-                                        # Very close - gentle elastic bounce
-                                        separation_strength = separation_strength * 0.4  # Gentle bounce
-                                    else:
-                                        # Slight overlap - very gentle nudge
-                                        separation_strength = separation_strength * 0.2  # Very gentle
-                                    
-                                    separation_dx += (dx / distance) * separation_strength * displacement
-                                    separation_dy += (dy / distance) * separation_strength * displacement
-                        
-                        if target_magnitude > 0:
-                            # Natural fluid blob behavior - prioritize cohesion with gentle separation
-                            target_factor = 0.7    # Direct movement is primary
-                            cohesion_factor = 0.4   # Strong natural attraction (like surface tension)
-                            separation_factor = 0.15 # Gentle bounce when overlapping
-                            
-                            # Large fleets still want to cluster but with gentle spacing
-                            if minion_count > 20:
-                                cohesion_factor = 0.45  # Even stronger attraction for large groups
-                                separation_factor = 0.2  # Slightly more gentle bouncing
-                            
-                            move_x = (target_dx / target_magnitude) * displacement * target_factor + cohesion_dx * cohesion_factor + separation_dx * separation_factor
-                            move_y = (target_dy / target_magnitude) * displacement * target_factor + cohesion_dy * cohesion_factor + separation_dy * separation_factor
-                            
-                            minion.x += move_x
-                            minion.y += move_y
-                        else:
-                            # When not moving, maintain natural blob clustering with gentle spacing
-                            cohesion_idle_factor = 0.5   # Natural attraction when idle
-                            separation_idle_factor = 0.3  # Gentle bouncing to prevent hard overlap
-                            
-                            minion.x += cohesion_dx * cohesion_idle_factor + separation_dx * separation_idle_factor
-                            minion.y += cohesion_dy * cohesion_idle_factor + separation_dy * separation_idle_factor
-                        
-                        # Keep within bounds with soft bouncing to fix edge glitches
-                        margin = minion.size / 2
-                        
-                        # Soft boundary constraints to prevent edge glitches
-                        if minion.x < margin:
-                            minion.x = margin + (margin - minion.x) * 0.1  # Soft bounce from left edge
-                        elif minion.x > WORLD_WIDTH - margin:
-                            minion.x = WORLD_WIDTH - margin - (minion.x - (WORLD_WIDTH - margin)) * 0.1  # Soft bounce from right edge
-                            
-                        if minion.y < margin:
-                            minion.y = margin + (margin - minion.y) * 0.1  # Soft bounce from top edge
-                        elif minion.y > WORLD_HEIGHT - margin:
-                            minion.y = WORLD_HEIGHT - margin - (minion.y - (WORLD_HEIGHT - margin)) * 0.1  # Soft bounce from bottom edge
-
-            # --- Minion Collision Detection ---
-            minion_list = list(minions.values())
-            for i in range(len(minion_list)):
-                for j in range(i + 1, len(minion_list)):
-                    try:
-                        minion1 = minion_list[i]
-                        minion2 = minion_list[j]
-                        
-                        # Skip if either minion no longer exists or same owner
-                        if (minion1.id not in minions or minion2.id not in minions or 
-                            minion1.owner_id == minion2.owner_id):
-                            continue
-                        
-                        # Check collision cooldown
-                        collision_key = f"{minion1.id}-{minion2.id}"
-                        current_time = time.time()
-                        
-                        if collision_key in collision_cooldowns:
-                            if current_time - collision_cooldowns[collision_key] < 1.0:  # 1 second cooldown
-                                continue
-                        
-                        if check_minion_collision(minion1, minion2):
-                            # Check invulnerability periods (2 second invulnerability after infection)
-                            minion1_vulnerable = current_time - minion1.last_infection_time > 2.0
-                            minion2_vulnerable = current_time - minion2.last_infection_time > 2.0
-                            
-                            # Only allow infection if both minions are vulnerable
-                            if minion1_vulnerable and minion2_vulnerable:
-                                # Set cooldown
-                                collision_cooldowns[collision_key] = current_time
-                                
-                                await handle_minion_collision(minion1, minion2)
-                    except Exception as e:
-                        print(f"Error in minion collision detection: {e}")
-                        continue
+            if physics_worker:
+                await step_physics_worker(current_time, delta_time, settings['separation_stride'])
+            else:
+                if recorder:
+                    recorder.tick(server_tick, current_time, delta_time, settings['separation_stride'])
+                await simulate_tick(current_time, delta_time, settings['separation_stride'])
+            if recorder:
+                recorder.end_tick(server_tick, players, minions)
             
-            # Send updated game state to all clients
-            await sio.emit('update_game_state', {
-                'players': [p.to_dict() for p in players.values()],
-                'all_minions': [m.to_dict() for m in minions.values()],
-            })
+            # Send updated game state to all clients at the snapshot rate -
+            # clients interpolate between snapshots using their tick stamps
+            snapshot_now = time.monotonic()
+            if snapshot_now - last_snapshot_time >= 1 / settings['snapshot_rate']:
+                last_snapshot_time = snapshot_now
+                queue_game_state_snapshot(settings['aoi_radius'])
+        
+        # Where everyone is, coarsely - lets clients draw a minimap without the whole world
+        if time.monotonic() - last_density_time >= 1 / DENSITY_RATE:
+            last_density_time = time.monotonic()
+            density_grid.update(minions)
+            density_update = density_grid.take_update(players)
+            if density_update:
+                outbound.queue_snapshot('density', density_update)
+        
+        # One shared frame for all spectators, however many there are
+        if spectators and time.monotonic() - last_spectator_time >= 1 / SPECTATOR_RATE:
+            last_spectator_time = time.monotonic()
+            await broadcast_spectator_frame(current_time)
+        
+        # Fleet sizes changed the ranking (infections, joins, leaves) - tell everyone
+        leaderboard_update = leaderboard.take_update()
+        if leaderboard_update:
+            outbound.queue_reliable('leaderboard', leaderboard_update)
+        
+        # Hand queued events and the newest snapshot to clients that are keeping up
+        await outbound.flush()
+        
+        # Only the server's own work counts - waiting on the model is network latency, not load
+        governor.record(time.perf_counter() - tick_started - (ai_wait_time - ai_wait_before))
         
         # Yield control to the event loop
-        await asyncio.sleep(1/60)
+        await asyncio.sleep(1 / TICK_RATE)
 
 # --- Aiohttp application setup for clean-up ---
 
+def save_world():
+    """Write the whole arena to WORLD_STATE_PATH (atomically)"""
+    started = time.perf_counter()
+    data = encode_world(players, minions, collision_cooldowns, server_tick)
+    save_world_file(WORLD_STATE_PATH, data)
+    print(f'Saved world ({len(players)} players, {len(minions)} minions, {len(data)} bytes) '
+          f'to {WORLD_STATE_PATH} in {(time.perf_counter() - started) * 1000:.1f} ms')
+
+def restore_world():
+    """Load a saved arena, if there is one; restored players wait for their owners to reconnect"""
+    started = time.perf_counter()
+    try:
+        world = load_world_file(WORLD_STATE_PATH, clock())
+    except (OSError, ValueError, struct.error) as e:
+        print(f'Could not restore world from {WORLD_STATE_PATH}: {e}')
+        return
+    if world is None:
+        return
+    
+    load_world(world, clock())
+    
+    # Don't restore the same image twice if we crash before the next save
+    os.replace(WORLD_STATE_PATH, f'{WORLD_STATE_PATH}.restored')
+    print(f'Restored world ({len(players)} players, {len(minions)} minions) from {WORLD_STATE_PATH} '
+          f'in {(time.perf_counter() - started) * 1000:.1f} ms')
+
+def load_world(world, current_time):
+    """Rebuild players and minions from decoded world records (see persistence.decode_world)"""
+    global server_tick
+    server_tick = world['tick']
+    for record in world['players']:
+        player = Player(record['id'], record['name'], spawn_fleet=False)
+        player.color = record['color']
+        player.session_token = record['session_token']
+        player.detached_until = current_time + RESTORE_GRACE_PERIOD
+        players[player.id] = player
+        sessions[player.session_token] = player.id
+    for record in world['minions']:
+        minion = Minion(record['id'], record['original_name'], record['owner_id'],
+                        record['x'], record['y'], record['color'])
+        minion.size = record['size']
+        minion.last_infection_time = record['last_infection_time']
+        minion.can_infect_after = record['can_infect_after']
+        minions[minion.id] = minion
+    collision_cooldowns.update(world['cooldowns'])
+    leaderboard.sync(players, minions)
+
+def start_recording():
+    """Record this session to RECORD_SESSION_DIR, starting from the world as it is now"""
+    global recorder
+    started_at = clock()
+    # Timers are stored relative to saved_at; 0 keeps them bit-exact for the replay
+    world_image = encode_world(players, minions, collision_cooldowns, server_tick, saved_at=0.0)
+    rng.seed(SIM_SEED)
+    fallback_rng.seed(SIM_SEED + 1)
+    os.makedirs(RECORD_SESSION_DIR, exist_ok=True)
+    recorder = SessionRecorder(session_path(RECORD_SESSION_DIR, started_at), SIM_SEED, started_at,
+                               server_tick, COLLISION_MODE, world_image)
+    print(f'Recording session to {recorder.path} (seed {SIM_SEED})')
+
+def start_physics_worker():
+    """Move the simulation to a worker process (PHYSICS_ENGINE=process)"""
+    global physics_worker
+    physics_worker = PhysicsWorker(fleet_physics, PHYSICS_CAPACITY, COLLISION_CELL_SIZE, swept=COLLISION_MODE == 'swept')
+    print(f'Physics running in worker process {physics_worker.process.pid} ({PHYSICS_CAPACITY} minion slots)')
+
+def replace_physics_worker():
+    """The worker died: start a fresh one, or move physics back in-line once it keeps dying.
+
+    The minions stay where the last finished step left them; the new worker
+    picks them up from there on its first step.
+    """
+    global physics_worker, physics_step_time, physics_restarts
+    physics_worker.close()
+    physics_worker = None
+    physics_step_time = None
+    if physics_restarts >= PHYSICS_RESTARTS:
+        print(f'Physics worker died {physics_restarts + 1} times, running physics in-line from now on')
+        return
+    physics_restarts += 1
+    try:
+        start_physics_worker()
+    except OSError as e:
+        print(f'Could not restart the physics worker, running physics in-line: {e}')
+
+def print_startup_report():
+    timings = startup_timings
+    print(f"Startup timing: framework imports {timings['framework_imports'] * 1000:.1f} ms | "
+          f"game modules {timings['game_modules'] * 1000:.1f} ms | "
+          f"app setup {timings['app_setup'] * 1000:.1f} ms | "
+          f"world restore {timings['world_restore'] * 1000:.1f} ms | "
+          f"ready to serve after {timings['ready'] * 1000:.1f} ms")
+
 async def start_background_tasks(app):
-    """Starts the game loop as a background task."""
+    """Restores any saved world, then starts the game loop and AI loading as background tasks."""
+    started = time.perf_counter()
+    restore_world()
+    startup_timings['world_restore'] = time.perf_counter() - started
+    if RECORD_SESSION_DIR:
+        start_recording()
+    elif PHYSICS_ENGINE == 'process':
+        start_physics_worker()
     app['game_loop'] = asyncio.create_task(game_loop())
+    app['ai_loader'] = asyncio.create_task(load_ai_module())
+    startup_timings['ready'] = time.perf_counter() - STARTUP_STARTED
+    print_startup_report()
+
+async def save_world_on_shutdown(app):
+    """Runs on SIGTERM/SIGINT before client connections are closed"""
+    try:
+        save_world()
+    except (OSError, struct.error) as e:
+        print(f'Could not save world to {WORLD_STATE_PATH}: {e}')
 
 async def cleanup_background_tasks(app):
     """Cancels the game loop task on shutdown."""
+    app['ai_loader'].cancel()
     app['game_loop'].cancel()
     try:
         await app['game_loop']
     except asyncio.CancelledError:
         pass
+    if recorder:
+        recorder.close()
+    if physics_worker:
+        physics_worker.close()
 
 app.on_startup.append(start_background_tasks)
+app.on_shutdown.append(save_world_on_shutdown)
 app.on_cleanup.append(cleanup_background_tasks)
+startup_timings['app_setup'] = (time.perf_counter() - STARTUP_STARTED
+                                - startup_timings['framework_imports'] - startup_timings['game_modules'])
 
 if __name__ == '__main__':
     import os
     port = int(os.environ.get('PORT', 5000))
     print(f"Starting InfiniMunch server on port {port}")
-    print(f"AI module available: {AI_AVAILABLE}")
+    print("AI module will load in the background; using fallbacks until it is ready")
     print(f"Server will be accessible at: http://0.0.0.0:{port}")
     aiohttp.web.run_app(app, host='0.0.0.0', port=port)
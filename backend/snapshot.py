@@ -0,0 +1,237 @@
+import json
+import time
+from collections import deque
+from typing import Optional
+
+from outbound import PreEncodedJSON
+
+
+def _json_number(value) -> str:
+    """Encode a number the way json.dumps would, without the call overhead."""
+    if isinstance(value, float):
+        return float.__repr__(value)
+    return str(value)
+
+
+class SnapshotBuilder:
+    """Builds world snapshots in a single pass with cached entity encodings.
+
+    Every minion and player keeps the JSON fragment it was last encoded as,
+    and the fragment is reused until one of its fields changes. Player
+    summaries reference their minions by id (``minion_ids``) instead of
+    embedding them a second time next to ``all_minions``.
+
+    The cache doubles as change history: each minion remembers the tick at
+    which its owner, name, size or color last changed, and minions that
+    disappear are logged for ``history_ticks``. ``build_delta`` uses both to
+    catch a reconnecting client up from the last tick it saw.
+    """
+
+    def __init__(self, history_ticks: int = 3600):
+        # minion_id -> [static_key, static_prefix, dynamic_key, fragment, changed_tick]
+        self._minion_cache = {}
+        # player_id -> [key, fragment]
+        self._player_cache = {}
+        self.history_ticks = history_ticks
+        self._tick = 0  # Tick of the build in progress
+        self._removals = deque()  # (tick, minion_id) for minions that have gone
+        self._horizon = None  # Oldest tick a delta can start from
+        self.builds = 0
+        self.minion_encodes = 0
+
+    def _encode_minion(self, minion, current_time: float) -> str:
+        static_key = (minion.original_name, minion.owner_id, minion.size, minion.color)
+        dynamic_key = (
+            minion.x,
+            minion.y,
+            current_time - minion.last_infection_time < 2.0,
+            current_time >= minion.can_infect_after,
+        )
+        cached = self._minion_cache.get(minion.id)
+        if cached is not None:
+            if cached[0] == static_key:
+                if cached[2] == dynamic_key:
+                    return cached[3]
+            else:
+                cached[0] = static_key
+                cached[1] = self._minion_prefix(minion)
+                cached[4] = self._tick
+        else:
+            cached = [static_key, self._minion_prefix(minion), None, None, self._tick]
+            self._minion_cache[minion.id] = cached
+
+        x, y, is_invulnerable, can_infect = dynamic_key
+        cached[2] = dynamic_key
+        cached[3] = (
+            f'{cached[1]},"x":{_json_number(x)},"y":{_json_number(y)}'
+            f',"is_invulnerable":{"true" if is_invulnerable else "false"}'
+            f',"can_infect":{"true" if can_infect else "false"}}}'
+        )
+        self.minion_encodes += 1
+        return cached[3]
+
+    @staticmethod
+    def _minion_prefix(minion) -> str:
+        # Everything but the closing brace, so the per-tick fields can follow
+        return json.dumps({
+            'id': minion.id,
+            'original_name': minion.original_name,
+            'owner_id': minion.owner_id,
+            'size': minion.size,
+            'color': minion.color,
+        }, separators=(',', ':'))[:-1]
+
+    def _encode_player(self, player, minion_ids, center_x, center_y) -> str:
+        key = (player.name, player.color, center_x, center_y, tuple(minion_ids))
+        cached = self._player_cache.get(player.id)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        fragment = json.dumps({
+            'id': player.id,
+            'name': player.name,
+            'color': player.color,
+            'minion_count': len(minion_ids),
+            'fleet_center_x': center_x,
+            'fleet_center_y': center_y,
+            'minion_ids': minion_ids,
+        }, separators=(',', ':'))
+        self._player_cache[player.id] = [key, fragment]
+        return fragment
+
+    def _walk(self, players: dict, minions: dict, current_time: float, include_players: bool = True, tick: int = 0):
+        """One pass over the world: minion fragments (with positions), player fragments, fleet centers."""
+        self._tick = tick
+        if self._horizon is None:
+            self._horizon = tick
+        fleets = {player_id: [[], 0.0, 0.0] for player_id in players}
+        minion_entries = []
+        for minion in minions.values():
+            minion_entries.append((minion.x, minion.y, self._encode_minion(minion, current_time)))
+            fleet = fleets.get(minion.owner_id)
+            if fleet is not None:
+                fleet[0].append(minion.id)
+                fleet[1] += minion.x
+                fleet[2] += minion.y
+
+        player_fragments = []
+        centers = {}
+        for player_id, player in players.items():
+            minion_ids, sum_x, sum_y = fleets[player_id]
+            count = len(minion_ids)
+            if count:
+                center_x, center_y = sum_x / count, sum_y / count
+                centers[player_id] = (center_x, center_y)
+            else:
+                center_x, center_y = 0, 0
+            if include_players:
+                player_fragments.append(self._encode_player(player, minion_ids, center_x, center_y))
+
+        # Drop cached encodings for entities that no longer exist. Every live minion
+        # was just encoded, so anything extra in the cache has been removed.
+        if len(self._minion_cache) > len(minions):
+            for minion_id in [k for k in self._minion_cache if k not in minions]:
+                del self._minion_cache[minion_id]
+                self._removals.append((tick, minion_id))
+        while self._removals and self._removals[0][0] < tick - self.history_ticks:
+            # A client that saw the snapshot of the dropped removal's tick may not have seen the removal
+            self._horizon = max(self._horizon, self._removals.popleft()[0] + 1)
+        if len(self._player_cache) > len(players):
+            self._player_cache = {k: v for k, v in self._player_cache.items() if k in players}
+
+        self.builds += 1
+        return player_fragments, minion_entries, centers
+
+    @staticmethod
+    def _assemble(player_fragments, minion_fragments, extra: Optional[dict]) -> PreEncodedJSON:
+        """``player_fragments`` of None leaves the players list out altogether."""
+        head = json.dumps(extra, separators=(',', ':'))[1:-1] + ',' if extra else ''
+        if player_fragments is not None:
+            head += '"players":[' + ','.join(player_fragments) + '],'
+        return PreEncodedJSON('{' + head + '"all_minions":[' + ','.join(minion_fragments) + ']}')
+
+    def build(self, players: dict, minions: dict, current_time: Optional[float] = None,
+              extra: Optional[dict] = None, include_players: bool = True, tick: int = 0) -> PreEncodedJSON:
+        """Encode ``{'players': [...], 'all_minions': [...]}`` for the whole world.
+
+        Walks ``minions`` once, using a single timestamp for every
+        invulnerability/can-infect check, and accumulates each player's fleet
+        center and minion ids along the way. ``extra`` holds small top-level
+        fields (tick stamps and the like) that are written ahead of the lists.
+        With ``include_players`` off only ``all_minions`` is sent. ``tick``
+        stamps any changes this build picks up (see ``build_delta``).
+        """
+        if current_time is None:
+            current_time = time.time()
+        player_fragments, minion_entries, _ = self._walk(players, minions, current_time, include_players, tick)
+        return self._assemble(player_fragments if include_players else None,
+                              [entry[2] for entry in minion_entries], extra)
+
+    def build_area_of_interest(self, players: dict, minions: dict, radius: float,
+                               current_time: Optional[float] = None,
+                               extra: Optional[dict] = None, include_players: bool = True, tick: int = 0):
+        """Encode one snapshot per player, limited to minions within ``radius`` of its fleet.
+
+        Returns ``(views, full)``: ``views`` maps each player that still has a
+        fleet to its own payload, and ``full`` is the whole-world payload for
+        everyone else. Every payload lists all player summaries unless
+        ``include_players`` is off.
+        """
+        if current_time is None:
+            current_time = time.time()
+        player_fragments, minion_entries, centers = self._walk(players, minions, current_time, include_players, tick)
+        if not include_players:
+            player_fragments = None
+
+        # Bucket minions on a grid as coarse as the radius so each viewer checks 3x3 cells
+        cells = {}
+        for entry in minion_entries:
+            cells.setdefault((int(entry[0] // radius), int(entry[1] // radius)), []).append(entry)
+
+        radius_sq = radius * radius
+        views = {}
+        for player_id, (center_x, center_y) in centers.items():
+            cell_x, cell_y = int(center_x // radius), int(center_y // radius)
+            visible = []
+            for nx in (cell_x - 1, cell_x, cell_x + 1):
+                for ny in (cell_y - 1, cell_y, cell_y + 1):
+                    for x, y, fragment in cells.get((nx, ny), ()):
+                        if (x - center_x) ** 2 + (y - center_y) ** 2 <= radius_sq:
+                            visible.append(fragment)
+            views[player_id] = self._assemble(player_fragments, visible, extra)
+
+        full = self._assemble(player_fragments, [entry[2] for entry in minion_entries], extra)
+        return views, full
+
+    def build_delta(self, players: dict, minions: dict, since_tick: int, tick: int,
+                    current_time: Optional[float] = None, extra: Optional[dict] = None) -> Optional[PreEncodedJSON]:
+        """Encode what changed since the snapshot of ``since_tick``, or None if that is too long ago.
+
+        The payload holds the player roster (without minion ids), the full
+        entries of minions that appeared or changed owner, name, size or
+        color from ``since_tick`` on, and the ids of minions removed since.
+        Positions of everything else come with the next regular snapshot.
+        """
+        if self._horizon is None or not self._horizon <= since_tick <= tick:
+            return None
+        if current_time is None:
+            current_time = time.time()
+        self._walk(players, minions, current_time, False, tick)  # Stamps anything that changed since the last build
+
+        counts = dict.fromkeys(players, 0)
+        changed = []
+        for minion_id, minion in minions.items():
+            if minion.owner_id in counts:
+                counts[minion.owner_id] += 1
+            cached = self._minion_cache[minion_id]
+            if cached[4] >= since_tick:  # Changes stamped with since_tick may have come after its snapshot
+                changed.append(cached[3])
+        removed = [minion_id for removed_tick, minion_id in self._removals if removed_tick >= since_tick]
+        roster = [{'id': player_id, 'name': player.name, 'color': player.color, 'minion_count': counts[player_id]}
+                  for player_id, player in players.items()]
+
+        fields = dict(extra or {})
+        fields['since_tick'] = since_tick
+        fields['players'] = roster
+        fields['removed_minions'] = removed
+        head = json.dumps(fields, separators=(',', ':'))[:-1]
+        return PreEncodedJSON(head + ',"changed_minions":[' + ','.join(changed) + ']}')
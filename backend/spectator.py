@@ -0,0 +1,106 @@
+import json
+import time
+from typing import Optional
+
+from outbound import PreEncodedJSON
+
+
+class SpectatorStream:
+    """One shared, coarse view of the world for every spectator.
+
+    A frame is built at most once per interval no matter how many
+    spectators are watching, and is kept small:
+
+    - positions and sizes are rounded to multiples of ``quantum`` world units
+      and sent as integers,
+    - minions and players get short integer ids that stay the same for as
+      long as the entity exists (so clients can interpolate between frames),
+    - names and colors are sent once per frame in a string table and referred
+      to by index,
+    - everything is packed into flat arrays rather than one object per entity.
+
+    Frame layout::
+
+        {"tick", "server_time", "quantum",
+         "strings": [...],
+         "players": [id, name, color, ...],
+         "minions": [id, x, y, size, owner, original_name, color, flags, ...]}
+
+    ``flags`` bit 0 is set while the minion is invulnerable. Every frame is
+    self-contained, so a spectator that skips some (see
+    ``OutboundQueues.broadcast``) simply picks up with the next one.
+    """
+
+    PLAYER_FIELDS = 3
+    MINION_FIELDS = 8
+
+    def __init__(self, quantum: float = 1.0):
+        self.quantum = quantum
+        self._minion_ids = {}  # minion id -> short id
+        self._player_ids = {}  # player id -> short id
+        self._next_id = 0
+        self.frames = 0
+        self.frame_bytes = 0
+        self.encode_time = 0.0
+
+    def _short_id(self, table: dict, key: str) -> int:
+        short_id = table.get(key)
+        if short_id is None:
+            short_id = table[key] = self._next_id
+            self._next_id += 1
+        return short_id
+
+    def build(self, players: dict, minions: dict, current_time: float, extra: Optional[dict] = None) -> PreEncodedJSON:
+        started = time.perf_counter()
+        quantum = self.quantum
+        strings = {}
+
+        def ref(value):
+            index = strings.get(value)
+            if index is None:
+                index = strings[value] = len(strings)
+            return index
+
+        player_fields = []
+        for player_id, player in players.items():
+            player_fields += (self._short_id(self._player_ids, player_id), ref(player.name), ref(player.color))
+
+        minion_fields = []
+        for minion_id, minion in minions.items():
+            owner = self._player_ids.get(minion.owner_id, -1)
+            minion_fields += (
+                self._short_id(self._minion_ids, minion_id),
+                round(minion.x / quantum),
+                round(minion.y / quantum),
+                round(minion.size / quantum),
+                owner,
+                ref(minion.original_name),
+                ref(minion.color),
+                1 if current_time - minion.last_infection_time < 2.0 else 0,
+            )
+
+        # Forget ids of entities that are gone
+        if len(self._minion_ids) > len(minions):
+            self._minion_ids = {k: v for k, v in self._minion_ids.items() if k in minions}
+        if len(self._player_ids) > len(players):
+            self._player_ids = {k: v for k, v in self._player_ids.items() if k in players}
+
+        frame = dict(extra or {})
+        frame['quantum'] = quantum
+        frame['strings'] = list(strings)
+        frame['players'] = player_fields
+        frame['minions'] = minion_fields
+        encoded = PreEncodedJSON(json.dumps(frame, separators=(',', ':')))
+
+        self.frames += 1
+        self.frame_bytes = len(encoded.json)
+        self.encode_time += time.perf_counter() - started
+        return encoded
+
+    def stats(self) -> dict:
+        """Counters for the /test status endpoint."""
+        return {
+            'frames': self.frames,
+            'last_frame_bytes': self.frame_bytes,
+            'avg_encode_ms': round(self.encode_time / max(self.frames, 1) * 1000, 3),
+        }
@@ -0,0 +1,56 @@
+import asyncio
+
+from admission import AdmissionController
+
+
+class FakeGovernor:
+    tick_budget = 1 / 60
+    tick_time_avg = 0.0
+    level = 0
+
+
+class FakeOutbound:
+    bytes_sent = 0
+
+
+def make_controller(**kwargs):
+    return AdmissionController(FakeGovernor(), FakeOutbound(), max_players=50, queue_timeout=1.0, **kwargs)
+
+
+async def no_notify(position):
+    pass
+
+
+def test_admits_straight_away_when_ok():
+    controller = make_controller()
+    assert asyncio.run(controller.admit('a', lambda: 10, no_notify)) == (True, 0)
+
+
+def test_admits_at_busy_threshold_while_slots_are_free():
+    controller = make_controller()
+    assert controller.saturation(43)['state'] == 'busy'
+    assert asyncio.run(controller.admit('a', lambda: 43, no_notify)) == (True, 0)
+    assert asyncio.run(controller.admit('b', lambda: 49, no_notify)) == (True, 0)
+
+
+def test_rejects_when_full():
+    controller = make_controller()
+    assert asyncio.run(controller.admit('a', lambda: 50, no_notify)) == (False, controller.retry_after)
+
+
+def test_queue_admits_in_order():
+    controller = make_controller()
+    population = [45]
+
+    async def join(sid):
+        admitted, _ = await controller.admit(sid, lambda: population[0], no_notify)
+        if admitted:
+            population[0] += 1
+        return sid, admitted
+
+    async def scenario():
+        return await asyncio.gather(*(join(f'p{i}') for i in range(7)))
+
+    results = asyncio.run(scenario())
+    assert [admitted for _, admitted in results] == [True] * 5 + [False] * 2
+    assert population[0] == 50
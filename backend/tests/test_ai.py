@@ -0,0 +1,25 @@
+import asyncio
+
+import ai
+from model_backends import FakeBackend
+
+
+def check_with(backend, name):
+    saved = ai.ai_resolver.backend
+    ai.ai_resolver.backend = backend
+    try:
+        return asyncio.run(ai.check_name_appropriateness(name))
+    finally:
+        ai.ai_resolver.backend = saved
+
+
+def test_malformed_name_verdict_is_no_answer():
+    backend = FakeBackend(latency='fixed:0', malformed_rate=1.0, seed=1)
+    for _ in range(5):
+        assert check_with(backend, 'Happy Dragon') is None
+    assert backend.malformed == 5
+
+
+def test_failed_name_check_is_no_answer():
+    assert check_with(FakeBackend(latency='fixed:0', error_rate=1.0), 'Happy Dragon') is None
+    assert check_with(FakeBackend(latency='fixed:0'), 'Happy Dragon') is True
@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+from inputs import BINARY_INPUT_FORMAT, BINARY_INPUT_MAGIC, InputCoalescer, decode_move_packet
+
+
+def move_event(payload) -> str:
+    return '2' + json.dumps(['move_player', payload])
+
+
+def test_decodes_text_and_binary_input():
+    assert decode_move_packet(move_event({'dx': 3, 'dy': -4, 'seq': 7})) == (3.0, -4.0, 7)
+    assert decode_move_packet(BINARY_INPUT_FORMAT.pack(BINARY_INPUT_MAGIC, 9, 5, 6)) == (5.0, 6.0, 9)
+    assert decode_move_packet('2["change_name",{}]') is None
+
+
+def test_malformed_seq_is_ignored():
+    for seq in ('12', 3.5, True, None, [1], {'n': 1}):
+        assert decode_move_packet(move_event({'dx': 1, 'dy': 2, 'seq': seq})) == (1.0, 2.0, None)
+
+
+def test_malformed_seq_does_not_break_ordering():
+    coalescer = InputCoalescer()
+    assert coalescer.offer('a', 1, 1, 5, now=0.0)
+    dx, dy, seq = decode_move_packet(move_event({'dx': 2, 'dy': 2, 'seq': 'oops'}))
+    assert coalescer.offer('a', dx, dy, seq, now=0.1)
+    assert not coalescer.offer('a', 3, 3, 4, now=0.2)  # Older than the last valid seq
+    assert coalescer.out_of_order == 1
+
+
+def test_non_numeric_direction_is_dropped():
+    assert decode_move_packet(move_event({'dx': 'abc', 'dy': 2, 'seq': 1})) is None
+    assert decode_move_packet(move_event({'dx': 1, 'dy': 'Infinity', 'seq': 1})) is None
+    coalescer = InputCoalescer()
+    # What the fallback move_player handler passes on for such a packet
+    assert not coalescer.offer('a', 'abc', 2, 1, now=0.0)
+    assert not coalescer.offer('a', 1, float('nan'), 2, now=0.0)
+    assert not coalescer.offer('a', None, [1], 3, now=0.0)
+    assert coalescer.malformed == 3
+    assert coalescer.offer('a', '3', 4, 4, now=0.0)  # Numeric strings were always accepted
+
+    class Player:
+        direction_dx = direction_dy = 0
+
+    player = Player()
+    coalescer.apply({'a': player})
+    assert (player.direction_dx, player.direction_dy) == (3.0, 4.0)
+
+
+def test_only_players_moves_are_buffered(monkeypatch):
+    import server
+
+    monkeypatch.setattr(server.sio.manager, 'sid_from_eio_sid', lambda eio_sid, namespace: 'watcher')
+    monkeypatch.setattr(server, 'players', {})
+    monkeypatch.setattr(server, 'input_coalescer', InputCoalescer())
+    packet = move_event({'dx': 1, 'dy': 2, 'seq': 1})
+
+    asyncio.run(server.sio._handle_eio_message('eio-watcher', packet))  # A spectator steering
+    assert 'watcher' not in server.input_coalescer.buckets
+
+    monkeypatch.setitem(server.players, 'watcher', object())
+    asyncio.run(server.sio._handle_eio_message('eio-watcher', packet))
+    assert server.input_coalescer.pending == {'watcher': (1.0, 2.0)}
@@ -0,0 +1,26 @@
+import pytest
+
+from moderation import NameFilter
+
+
+@pytest.fixture(scope='module')
+def name_filter():
+    return NameFilter.from_files()
+
+
+@pytest.mark.parametrize('name', [
+    'Skyscraper', 'Grapes', 'Drapes', 'Scraper', 'Grapefruit', 'Therapists', 'Analyze',
+    'Torpedoes', 'Trapezoid', 'Speedo', 'Nazir', 'Matsushita', 'Penistone', 'Bitchin',
+])
+def test_substring_hits_go_to_the_ai(name_filter, name):
+    assert name_filter.classify(name) == 'escalate'
+
+
+@pytest.mark.parametrize('name', ['fuck', 'f u c k', 'FUUUCK', 'fuck you', 'kys', 'bitch'])
+def test_exact_terms_are_rejected(name_filter, name):
+    assert name_filter.classify(name) == 'reject'
+
+
+def test_allowlisted_names_are_accepted(name_filter):
+    assert name_filter.classify('assassin') == 'accept'
+    assert name_filter.classify('Happy Dragon') == 'accept'
@@ -0,0 +1,20 @@
+from outbound import ClientSendQueue
+
+
+def entry(name):
+    return [name], 10
+
+
+def test_snapshots_are_latest_wins_per_event():
+    queue = ClientSendQueue('a')
+    queue.put_snapshot('update_game_state', entry('state 1'))
+    queue.put_snapshot('density', entry('density 1'))
+    queue.put_reliable(entry('infection'))
+    queue.put_snapshot('density', entry('density 2'))
+    queue.put_snapshot('update_game_state', entry('state 2'))
+    queue.put_snapshot('density', entry('density 3'))
+
+    assert [packets[0] for packets, _ in queue.take_pending()] == ['infection', 'state 2', 'density 3']
+    assert queue.snapshots_replaced == 3
+    assert queue.snapshots_sent == 2
+    assert queue.buffered_bytes == 0
@@ -0,0 +1,44 @@
+import struct
+from types import SimpleNamespace
+
+import persistence
+from recording import SessionReader, SessionRecorder
+
+# Far past the old 16-bit length limit, like a name after a long run of adjective pickups
+LONG_NAME = 'Mighty ' * 10000 + 'Dragon'
+
+
+def world():
+    player = SimpleNamespace(id='p1', name=LONG_NAME, color='#fff', session_token='token',
+                             direction_dx=1.0, direction_dy=2.0)
+    minion = SimpleNamespace(id='m1', original_name=LONG_NAME, owner_id='p1', color='#fff', x=3.0, y=4.0,
+                             size=40, last_infection_time=0.0, can_infect_after=0.0)
+    return {'p1': player}, {'m1': minion}
+
+
+def test_world_image_keeps_long_names():
+    players, minions = world()
+    image = persistence.encode_world(players, minions, {}, tick=7, saved_at=100.0)
+    decoded = persistence.decode_world(image, now=100.0)
+    assert decoded['players'][0]['name'] == LONG_NAME
+    assert decoded['minions'][0]['original_name'] == LONG_NAME
+
+
+def test_version_1_world_image_still_loads():
+    strings = ['p1', 'Dragon', '#fff', 'token']
+    image = b''.join([
+        persistence.HEADER.pack(persistence.WORLD_MAGIC, 1, 100.0, 7, len(strings), 1, 0, 0),
+        *(struct.pack('<H', len(value)) + value.encode() for value in strings),
+        persistence.PLAYER.pack(0, 1, 2, 3, 1.0, 2.0),
+    ])
+    assert persistence.decode_world(image, now=100.0)['players'][0]['name'] == 'Dragon'
+
+
+def test_recording_keeps_long_names(tmp_path):
+    path = str(tmp_path / 'session.rec')
+    recorder = SessionRecorder(path, 1, 100.0, 0, 'swept', b'')
+    recorder.join(100.0, 'p1', 'Dragon')
+    recorder.rename(101.0, 'p1', LONG_NAME)
+    recorder.close()
+    records = [fields for kind, fields in SessionReader(path) if kind == b'N']
+    assert records == [[101.0, 'p1', LONG_NAME]]
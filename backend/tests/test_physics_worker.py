@@ -0,0 +1,63 @@
+import asyncio
+
+import server
+
+
+class StubWorker:
+    """Finishes a step only when told to, and records the delta_time each step was started with."""
+
+    def __init__(self):
+        self.done = True
+        self.deltas = []
+
+    def collect(self):
+        return [] if self.done else None
+
+    def start(self, players, minions, delta_time, separation_stride):
+        self.deltas.append(delta_time)
+
+
+def test_busy_worker_ticks_carry_over_to_the_next_step(monkeypatch):
+    worker = StubWorker()
+    monkeypatch.setattr(server, 'physics_worker', worker)
+    monkeypatch.setattr(server, 'physics_step_time', None)
+
+    async def run():
+        await server.step_physics_worker(10.0, 1 / 60, 1)
+        worker.done = False
+        for tick in range(1, 4):  # Three ticks while the worker is still busy
+            await server.step_physics_worker(10.0 + tick / 60, 1 / 60, 1)
+        worker.done = True
+        await server.step_physics_worker(10.0 + 4 / 60, 1 / 60, 1)
+        await server.step_physics_worker(11.0, 1 / 60, 1)  # A long stall is clamped
+
+    asyncio.run(run())
+    assert len(worker.deltas) == 3
+    assert worker.deltas[0] == 1 / 60
+    assert abs(worker.deltas[1] - 4 / 60) < 1e-9
+    assert worker.deltas[2] == server.MAX_DELTA_TIME
+
+
+def test_dead_worker_is_replaced_then_given_up_on(monkeypatch):
+    monkeypatch.setattr(server, 'physics_restarts', 0)
+    monkeypatch.setattr(server, 'PHYSICS_RESTARTS', 1)
+    monkeypatch.setattr(server, 'players', {})
+    monkeypatch.setattr(server, 'minions', {})
+    server.start_physics_worker()
+
+    async def kill_and_step(current_time):
+        server.physics_worker.process.kill()
+        server.physics_worker.process.wait()
+        await server.step_physics_worker(current_time, 1 / 60, 1)
+
+    try:
+        asyncio.run(kill_and_step(1.0))
+        assert server.physics_restarts == 1
+        asyncio.run(server.step_physics_worker(1.5, 1 / 60, 1))
+        assert server.physics_worker.steps == 0 and server.physics_worker.step == 1  # The new worker took a step
+        asyncio.run(kill_and_step(2.0))
+        assert server.physics_worker is None  # Out of restarts: physics runs in-line
+    finally:
+        if server.physics_worker:
+            server.physics_worker.close()
+            server.physics_worker = None
@@ -0,0 +1,25 @@
+import json
+from types import SimpleNamespace
+
+from snapshot import SnapshotBuilder
+
+
+def minion(minion_id):
+    return SimpleNamespace(id=minion_id, original_name='Dragon', owner_id='p1', x=1.0, y=2.0, size=40,
+                           color='#fff', last_infection_time=0.0, can_infect_after=0.0)
+
+
+def test_resume_at_the_horizon_still_sees_removals():
+    builder = SnapshotBuilder(history_ticks=10)
+    players = {'p1': SimpleNamespace(id='p1', name='Dragon', color='#fff')}
+    minions = {'a': minion('a'), 'b': minion('b')}
+    builder.build(players, minions, 0.0, tick=0)
+    del minions['b']
+    builder.build(players, minions, 0.0, tick=5)  # The removal of b is logged at tick 5
+    del minions['a']
+    builder.build(players, minions, 0.0, tick=20)  # Tick 5 falls out of the history
+
+    # A client whose last snapshot was tick 5 may have built it before b went
+    assert builder.build_delta(players, minions, since_tick=5, tick=20, current_time=0.0) is None
+    delta = json.loads(builder.build_delta(players, minions, since_tick=6, tick=20, current_time=0.0).json)
+    assert delta['removed_minions'] == ['a']